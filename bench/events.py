@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import random
+import time
+from typing import Callable
+
+from attrs import define, field
+
+from .fake_slack import BOT_USER_ID, TEAM_ID
+
+APP_ID = "A0BENCH"
+USER_ID = "U0BENCHUSER"
+SHADOW_USER_ID = "U0BENCHSHADOW"
+
+QUESTIONS = [
+    "how do I rotate the API keys for the staging environment?",
+    "what changed in the last release of the deploy pipeline?",
+    "can you summarize the open issues about the login page?",
+    "why is the nightly build failing on the integration tests?",
+    "where is the runbook for restarting the queue workers?",
+]
+CHATTER = [
+    "sounds good, thanks!",
+    "I'll take a look after lunch",
+    "the meeting moved to 3pm",
+    "+1, same thing happened to me",
+]
+
+
+@define
+class SlackEvent:
+    """
+    A Slack Events API request.
+
+    Attributes:
+        kind: The kind of event, such as `dm`, `app_mention`, `shadow`, or `passive`.
+        channel: The channel of the event, which the Slack calls it causes are attributed by.
+        body: The Events API request body.
+        headers: Headers to send besides the content type and the signature, such as Slack's retry headers.
+    """
+
+    kind: str = field(kw_only=True)
+    channel: str = field(kw_only=True)
+    body: dict = field(kw_only=True)
+    headers: dict[str, str] = field(factory=dict, kw_only=True)
+
+    def signed(self, signing_secret: str) -> tuple[str, dict]:
+        """Gets the body and headers of the request, signed like Slack signs them."""
+        body = json.dumps(self.body)
+        timestamp = str(int(time.time()))
+        signature = hmac.new(
+            signing_secret.encode("utf-8"),
+            f"v0:{timestamp}:{body}".encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+        return body, {
+            "content-type": "application/json",
+            **self.headers,
+            "x-slack-request-timestamp": timestamp,
+            "x-slack-signature": f"v0={signature}",
+        }
+
+
+def dm_event(i: int, rng: random.Random) -> SlackEvent:
+    channel = f"D{i:08d}"
+    return _event(
+        "dm",
+        channel,
+        {
+            "type": "message",
+            "channel_type": "im",
+            "text": rng.choice(QUESTIONS),
+        },
+    )
+
+
+def app_mention_event(i: int, rng: random.Random) -> SlackEvent:
+    channel = f"C{i:08d}"
+    return _event(
+        "app_mention",
+        channel,
+        {
+            "type": "app_mention",
+            "channel_type": "channel",
+            "text": f"<@{BOT_USER_ID}> {rng.choice(QUESTIONS)}",
+        },
+    )
+
+
+def shadow_event(i: int, rng: random.Random) -> SlackEvent:
+    channel = f"C{i:08d}"
+    return _event(
+        "shadow",
+        channel,
+        {
+            "type": "message",
+            "channel_type": "channel",
+            "text": f"<@{SHADOW_USER_ID}> {rng.choice(QUESTIONS)}",
+        },
+    )
+
+
+def passive_event(i: int, rng: random.Random) -> SlackEvent:
+    channel = f"C{i:08d}"
+    return _event(
+        "passive",
+        channel,
+        {
+            "type": "message",
+            "channel_type": "channel",
+            "text": rng.choice(CHATTER),
+            # replies in a thread, a message that starts one is not added to it
+            "thread_ts": f"{int(time.time()) - 60}.000100",
+        },
+    )
+
+
+def bot_message_event(i: int, rng: random.Random) -> SlackEvent:
+    # another app posting in a channel, which the bot ignores
+    channel = f"C{i:08d}"
+    return _event(
+        "bot_message",
+        channel,
+        {
+            "type": "message",
+            "subtype": "bot_message",
+            "bot_id": "B0OTHERBOT",
+            "channel_type": "channel",
+            "text": rng.choice(CHATTER),
+        },
+    )
+
+
+def url_verification_event() -> SlackEvent:
+    # sent by Slack when the request URL is set, Bolt answers it without any listeners
+    return SlackEvent(
+        kind="url_verification",
+        channel="",
+        body={
+            "token": "bench",
+            "challenge": "bench-challenge",
+            "type": "url_verification",
+        },
+    )
+
+
+EVENT_FACTORIES: dict[str, Callable[[int, random.Random], SlackEvent]] = {
+    "dm": dm_event,
+    "app_mention": app_mention_event,
+    "shadow": shadow_event,
+    "passive": passive_event,
+    "bot_message": bot_message_event,
+}
+
+
+def event_corpus(count: int, mix: dict[str, float], seed: int = 0) -> list[SlackEvent]:
+    """Gets a corpus of events, drawn at random with the weights of the mix."""
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    return [
+        EVENT_FACTORIES[kind](i, rng)
+        for i, kind in enumerate(rng.choices(kinds, weights=weights, k=count))
+    ]
+
+
+def _event(kind: str, channel: str, event: dict) -> SlackEvent:
+    ts = f"{time.time():.6f}"
+    return SlackEvent(
+        kind=kind,
+        channel=channel,
+        body={
+            "token": "bench",
+            "team_id": TEAM_ID,
+            "api_app_id": APP_ID,
+            "type": "event_callback",
+            "event_id": f"Ev{channel}",
+            "event_time": int(time.time()),
+            "event": {
+                "user": USER_ID,
+                "channel": channel,
+                "ts": ts,
+                "event_ts": ts,
+                **event,
+            },
+        },
+    )
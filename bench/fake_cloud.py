@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import re
+import threading
+import uuid
+
+from attrs import define, field
+
+from .fake_server import FakeServer
+
+THREAD_PATH = re.compile(r"^/api/threads/([^/]+)(/messages)?$")
+
+
+@define
+class FakeGriptapeCloudServer(FakeServer):
+    """
+    A stand-in for the Griptape Cloud ruleset and thread endpoints, that keeps everything in memory.
+
+    Attributes:
+        rulesets: The rulesets to serve, by alias, each with its `rules` and `metadata`.
+    """
+
+    rulesets: dict[str, dict] = field(factory=dict, kw_only=True)
+
+    _threads: dict[str, dict] = field(factory=dict, init=False)
+    _state_lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def thread_count(self) -> int:
+        return len(self._threads)
+
+    def handle(
+        self, method: str, path: str, params: dict
+    ) -> tuple[int, dict, dict[str, str]]:
+        if path == "/api/rulesets" and method == "GET":
+            ruleset = self.rulesets.get(params.get("alias", ""))
+            return (
+                200,
+                {
+                    "rulesets": [
+                        {
+                            "ruleset_id": params["alias"],
+                            "alias": params["alias"],
+                            "metadata": ruleset.get("metadata", {}),
+                        }
+                    ]
+                    if ruleset is not None
+                    else []
+                },
+                {},
+            )
+        if path == "/api/rules" and method == "GET":
+            ruleset = self.rulesets.get(params.get("ruleset_id", ""), {})
+            return (
+                200,
+                {
+                    "rules": [
+                        {"rule_id": f"{params['ruleset_id']}-{i}", "rule": rule}
+                        for i, rule in enumerate(ruleset.get("rules", []))
+                    ]
+                },
+                {},
+            )
+        if path == "/api/threads":
+            return self._threads_collection(method, params)
+        match = THREAD_PATH.match(path)
+        if match is not None:
+            return self._thread(method, match.group(1), bool(match.group(2)), params)
+        return 404, {"error": "not found"}, {}
+
+    def _threads_collection(
+        self, method: str, params: dict
+    ) -> tuple[int, dict, dict[str, str]]:
+        with self._state_lock:
+            if method == "GET":
+                threads = [
+                    _public(thread)
+                    for thread in self._threads.values()
+                    if thread["alias"] == params.get("alias")
+                ]
+                return 200, {"threads": threads}, {}
+            if method == "POST":
+                thread = {
+                    "thread_id": uuid.uuid4().hex,
+                    "name": params.get("name"),
+                    "alias": params.get("alias"),
+                    "metadata": {},
+                    "messages": [],
+                }
+                self._threads[thread["thread_id"]] = thread
+                return 201, _public(thread), {}
+        return 405, {"error": "method not allowed"}, {}
+
+    def _thread(
+        self, method: str, thread_id: str, messages: bool, params: dict
+    ) -> tuple[int, dict, dict[str, str]]:
+        with self._state_lock:
+            thread = self._threads.get(thread_id)
+            if thread is None:
+                return 404, {"error": "not found"}, {}
+            if method == "GET":
+                if messages:
+                    return 200, {"messages": list(thread["messages"])}, {}
+                return 200, _public(thread), {}
+            if method == "PATCH" and not messages:
+                # like Griptape Cloud, all old messages are replaced with the new ones
+                thread["messages"] = list(params.get("messages", []))
+                thread["metadata"] = {
+                    **thread["metadata"],
+                    **{k: v for k, v in params.items() if k != "messages"},
+                }
+                return 200, _public(thread), {}
+        return 405, {"error": "method not allowed"}, {}
+
+
+def _public(thread: dict) -> dict:
+    return {key: value for key, value in thread.items() if key != "messages"}
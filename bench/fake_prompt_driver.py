@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from typing import Iterator
+
+from attrs import Factory, define, field
+from griptape.artifacts import TextArtifact
+from griptape.common import (
+    DeltaMessage,
+    Message,
+    PromptStack,
+    TextDeltaMessageContent,
+    TextMessageContent,
+)
+from griptape.drivers import BasePromptDriver
+from griptape.tokenizers import BaseTokenizer, SimpleTokenizer
+
+WORDS = (
+    "the agent read the thread and found that the answer depends on the "
+    "configuration of the service so it checked the settings and the logs"
+).split()
+
+
+@define(kw_only=True)
+class FakePromptDriver(BasePromptDriver):
+    """
+    A deterministic Prompt Driver that answers every prompt with the same text for the same input,
+    after a fixed latency and at a fixed token rate. Prompts with an output schema are answered
+    with JSON that matches it.
+
+    Attributes:
+        latency: How many seconds until the first token.
+        tokens_per_second: How fast tokens are generated after the first one.
+        output_tokens: How many tokens are in each answer.
+        score: The value given to numbers in structured output, such as the relevance score of a response.
+    """
+
+    model: str = field(default="fake", metadata={"serializable": True})
+    tokenizer: BaseTokenizer = field(
+        default=Factory(
+            lambda: SimpleTokenizer(
+                characters_per_token=4, max_input_tokens=128_000, max_output_tokens=4096
+            )
+        )
+    )
+    latency: float = field(default=0.5)
+    tokens_per_second: float = field(default=50)
+    output_tokens: int = field(default=150)
+    score: float = field(default=0.9)
+
+    def try_run(self, prompt_stack: PromptStack) -> Message:
+        tokens = self._output(prompt_stack)
+        time.sleep(self.latency + len(tokens) / self.tokens_per_second)
+        return Message(
+            content=[TextMessageContent(TextArtifact("".join(tokens)))],
+            role=Message.ASSISTANT_ROLE,
+            usage=Message.Usage(
+                input_tokens=self._input_tokens(prompt_stack),
+                output_tokens=len(tokens),
+            ),
+        )
+
+    def try_stream(self, prompt_stack: PromptStack) -> Iterator[DeltaMessage]:
+        tokens = self._output(prompt_stack)
+        time.sleep(self.latency)
+        for token in tokens:
+            yield DeltaMessage(content=TextDeltaMessageContent(token))
+            time.sleep(1 / self.tokens_per_second)
+        yield DeltaMessage(
+            usage=DeltaMessage.Usage(
+                input_tokens=self._input_tokens(prompt_stack),
+                output_tokens=len(tokens),
+            )
+        )
+
+    def _output(self, prompt_stack: PromptStack) -> list[str]:
+        if prompt_stack.output_schema is not None:
+            output = json.dumps(
+                _fake_value(prompt_stack.to_output_json_schema(), self.score)
+            )
+            return [output[i : i + 4] for i in range(0, len(output), 4)]
+
+        # the same input always gets the same answer
+        digest = hashlib.sha256(
+            prompt_stack.messages[-1].to_text().encode("utf-8")
+        ).digest()
+        offset = digest[0] % len(WORDS)
+        return [
+            f"{WORDS[(offset + i) % len(WORDS)]} " for i in range(self.output_tokens)
+        ]
+
+    def _input_tokens(self, prompt_stack: PromptStack) -> int:
+        return self.tokenizer.count_tokens(
+            "".join(message.to_text() for message in prompt_stack.messages)
+        )
+
+
+def _fake_value(schema: dict, score: float):
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            name: _fake_value(property_schema, score)
+            for name, property_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [_fake_value(schema.get("items", {}), score)]
+    if schema_type in ("number", "integer"):
+        return score if schema_type == "number" else int(score * 10)
+    if schema_type == "boolean":
+        return True
+    return "fake"
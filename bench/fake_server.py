@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from attrs import define, field
+
+
+@define
+class RecordedCall:
+    """
+    A request a fake server received.
+
+    Attributes:
+        method: The HTTP method.
+        path: The path, without the query string.
+        params: The query string and body parameters.
+        status: The status code of the response.
+        time: When the request was received.
+    """
+
+    method: str = field(kw_only=True)
+    path: str = field(kw_only=True)
+    params: dict = field(kw_only=True)
+    status: int = field(kw_only=True)
+    time: float = field(kw_only=True)
+
+
+@define
+class FakeServer(ABC):
+    """
+    A local HTTP server that stands in for an API, and records every request it receives.
+
+    Attributes:
+        latency: How many seconds to wait before responding to each request.
+    """
+
+    latency: float = field(default=0.0, kw_only=True)
+
+    calls: list[RecordedCall] = field(factory=list, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+    _server: Optional[ThreadingHTTPServer] = field(default=None, init=False)
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise ValueError(f"{type(self).__name__} is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Starts the server on a free port, and returns its URL."""
+        handler = _handler(self)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset(self) -> None:
+        """Forgets the recorded calls."""
+        with self._lock:
+            self.calls.clear()
+
+    @abstractmethod
+    def handle(
+        self, method: str, path: str, params: dict
+    ) -> tuple[int, dict, dict[str, str]]:
+        """Handles a request, and returns the status code, the JSON body, and the headers of the response."""
+        ...
+
+    def _record(self, call: RecordedCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+
+def _handler(fake: FakeServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # like a real server, so that the headers and the body of a response on a kept alive
+        # connection aren't held back waiting for the client to acknowledge each other
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self._respond("GET")
+
+        def do_POST(self) -> None:
+            self._respond("POST")
+
+        def do_PATCH(self) -> None:
+            self._respond("PATCH")
+
+        def do_DELETE(self) -> None:
+            self._respond("DELETE")
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+        def _respond(self, method: str) -> None:
+            received = time.time()
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+            params.update(self._body())
+            if fake.latency:
+                time.sleep(fake.latency)
+
+            status, body, headers = fake.handle(method, url.path, params)
+            fake._record(
+                RecordedCall(
+                    method=method,
+                    path=url.path,
+                    params=params,
+                    status=status,
+                    time=received,
+                )
+            )
+
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            data = self.rfile.read(length).decode("utf-8")
+            if "json" in (self.headers.get("Content-Type") or ""):
+                body = json.loads(data)
+                return body if isinstance(body, dict) else {}
+            return dict(parse_qsl(data))
+
+    return Handler
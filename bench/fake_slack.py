@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+from typing import Optional
+
+from attrs import Factory, define, field
+
+from .fake_server import FakeServer
+
+BOT_USER_ID = "U0BENCHBOT"
+TEAM_ID = "T0BENCH"
+
+# requests per minute, https://api.slack.com/apis/rate-limits
+DEFAULT_RATE_LIMITS = {
+    "chat.postMessage": 60,
+    "chat.update": 50,
+    "reactions.add": 50,
+    "conversations.replies": 50,
+    "assistant.threads.setStatus": 100,
+}
+# chat.postMessage is limited per channel, the rest per workspace
+PER_CHANNEL_METHODS = {"chat.postMessage"}
+
+
+@define
+class FakeSlackServer(FakeServer):
+    """
+    A stand-in for the Slack Web API, that records calls and rate limits them like Slack does.
+    Posted messages are kept, so that updates and thread replies see them.
+
+    Attributes:
+        rate_limits: The requests per minute of each method. Methods that aren't listed are not limited.
+    """
+
+    rate_limits: dict[str, float] = field(
+        default=Factory(lambda: dict(DEFAULT_RATE_LIMITS)), kw_only=True
+    )
+
+    _buckets: dict[tuple[str, Optional[str]], list[float]] = field(
+        factory=dict, init=False
+    )
+    _messages: dict[str, dict] = field(factory=dict, init=False)
+    _ts: itertools.count = field(factory=lambda: itertools.count(1), init=False)
+    _state_lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def calls_by_channel(self) -> dict[str, list[str]]:
+        """Gets the methods called for each channel, in order."""
+        by_channel = {}
+        for call in self.calls:
+            channel = call.params.get("channel") or call.params.get("channel_id")
+            if channel is not None:
+                by_channel.setdefault(channel, []).append(_method(call.path))
+        return by_channel
+
+    def rate_limited_calls(self) -> int:
+        return sum(call.status == 429 for call in self.calls)
+
+    def handle(
+        self, method: str, path: str, params: dict
+    ) -> tuple[int, dict, dict[str, str]]:
+        api_method = _method(path)
+        channel = params.get("channel") or params.get("channel_id")
+        retry_after = self._take(api_method, channel)
+        if retry_after is not None:
+            return (
+                429,
+                {"ok": False, "error": "ratelimited"},
+                {"Retry-After": str(retry_after)},
+            )
+
+        if api_method == "auth.test":
+            return (
+                200,
+                {
+                    "ok": True,
+                    "url": "https://bench.slack.com/",
+                    "team": "Bench",
+                    "user": "bench-bot",
+                    "team_id": TEAM_ID,
+                    "user_id": BOT_USER_ID,
+                    "bot_id": "B0BENCHBOT",
+                },
+                {},
+            )
+        if api_method in ("chat.postMessage", "chat.update"):
+            return 200, self._store_message(api_method, channel, params), {}
+        if api_method == "conversations.replies":
+            return 200, {"ok": True, "messages": [], "has_more": False}, {}
+        return 200, {"ok": True}, {}
+
+    def _store_message(self, api_method: str, channel: str, params: dict) -> dict:
+        with self._state_lock:
+            ts = (
+                params["ts"]
+                if api_method == "chat.update"
+                else f"{int(time.time())}.{next(self._ts):06d}"
+            )
+            message = {
+                "type": "message",
+                "user": BOT_USER_ID,
+                "ts": ts,
+                "text": params.get("text", ""),
+                "blocks": _blocks(params.get("blocks")),
+            }
+            self._messages[ts] = message
+        return {"ok": True, "channel": channel, "ts": ts, "message": message}
+
+    def _take(self, api_method: str, channel: Optional[str]) -> Optional[int]:
+        """Takes a token from the method's bucket, or gets the seconds to retry after if it is empty."""
+        limit = self.rate_limits.get(api_method)
+        if limit is None:
+            return None
+        key = (api_method, channel if api_method in PER_CHANNEL_METHODS else None)
+        now = time.monotonic()
+        with self._state_lock:
+            tokens, updated = self._buckets.get(key, [limit, now])
+            tokens = min(limit, tokens + (now - updated) * limit / 60)
+            if tokens < 1:
+                self._buckets[key] = [tokens, now]
+                return max(1, int((1 - tokens) * 60 / limit))
+            self._buckets[key] = [tokens - 1, now]
+            return None
+
+
+def _method(path: str) -> str:
+    return path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _blocks(blocks) -> list:
+    # the WebClient sends blocks as a JSON string in form bodies
+    if isinstance(blocks, str):
+        return json.loads(blocks)
+    return blocks or []
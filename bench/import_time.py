@@ -0,0 +1,188 @@
+"""
+Measures the cold start of the bot: importing `griptape_slack_handler` and handling a first event
+that doesn't need Griptape, each in a fresh interpreter, and fails if it is over budget or loads
+modules that the event doesn't need. A bot message is answered by the fast path, and a URL
+verification by Slack Bolt.
+
+    python -m bench.import_time --event bot_message --runs 5 --budget-ms 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Callable, Optional
+
+from .events import SlackEvent, bot_message_event, url_verification_event
+from .fake_cloud import FakeGriptapeCloudServer
+from .fake_slack import FakeSlackServer
+from .load_test import SIGNING_SECRET, configure_environment
+
+# modules that handling an event that doesn't need a response must not load
+RESPONSE_MODULES = (
+    "griptape",
+    "github",
+    "trafilatura",
+    "duckduckgo_search",
+    "azure.identity",
+)
+# the events that can be measured, and the modules that handling each must not load
+EVENTS: dict[str, tuple[Callable[[], SlackEvent], tuple[str, ...]]] = {
+    "bot_message": (
+        lambda: bot_message_event(0, random.Random(0)),
+        ("slack_bolt", *RESPONSE_MODULES),
+    ),
+    "url_verification": (url_verification_event, RESPONSE_MODULES),
+}
+
+CHILD = """
+import json, sys, time
+
+body, headers, forbidden = json.load(sys.stdin)
+start = time.perf_counter()
+from griptape_slack_handler import handle_slack_event
+imported = time.perf_counter()
+status = handle_slack_event(body, headers)["status"]
+handled = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_event_ms": (handled - imported) * 1000,
+    "status": status,
+    "loaded": [name for name in forbidden if name in sys.modules],
+}))
+"""
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def run_once(
+    event: SlackEvent, forbidden: tuple[str, ...]
+) -> tuple[dict, dict[str, tuple[int, int]]]:
+    """
+    Starts a fresh interpreter that imports the bot and handles the event, and gets its timings
+    and the self and cumulative import time of every module, in microseconds.
+    """
+    body, headers = event.signed(SIGNING_SECRET)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        input=json.dumps([body, headers, list(forbidden)]),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return json.loads(process.stdout.strip().splitlines()[-1]), modules
+
+
+def build_report(
+    runs: list[tuple[dict, dict[str, tuple[int, int]]]], *, top: int
+) -> dict:
+    """Summarizes the runs with medians, and the modules that took the longest to import."""
+    cumulative = defaultdict(list)
+    for _, modules in runs:
+        for name, (_, cumulative_us) in modules.items():
+            cumulative[name].append(cumulative_us / 1000)
+    median_cumulative = {
+        name: statistics.median(values) for name, values in cumulative.items()
+    }
+    packages = {name: ms for name, ms in median_cumulative.items() if "." not in name}
+    return {
+        "runs": len(runs),
+        "import_ms": statistics.median(result["import_ms"] for result, _ in runs),
+        "first_event_ms": statistics.median(
+            result["first_event_ms"] for result, _ in runs
+        ),
+        "errors": sum(result["status"] >= 400 for result, _ in runs),
+        "loaded": sorted({name for result, _ in runs for name in result["loaded"]}),
+        # cumulative, so a package includes the packages it imports
+        "slowest_packages_ms": dict(
+            sorted(packages.items(), key=lambda item: -item[1])[:top]
+        ),
+        "handler_modules_ms": {
+            name: ms
+            for name, ms in sorted(median_cumulative.items())
+            if name.startswith("griptape_slack_handler")
+        },
+    }
+
+
+def format_report(report: dict, *, budget_ms: float) -> str:
+    total = report["import_ms"] + report["first_event_ms"]
+    lines = [
+        f"runs:                  {report['runs']}",
+        f"import:                {report['import_ms']:.0f}ms",
+        f"first event:           {report['first_event_ms']:.0f}ms",
+        f"total:                 {total:.0f}ms (budget {budget_ms:.0f}ms)",
+        f"errors:                {report['errors']}",
+        f"loaded, but shouldn't: {', '.join(report['loaded']) or 'none'}",
+        "slowest packages (ms, cumulative):",
+        *(
+            f"  {name:<40} {ms:>7.1f}"
+            for name, ms in report["slowest_packages_ms"].items()
+        ),
+        "griptape_slack_handler modules (ms, cumulative):",
+        *(
+            f"  {name:<40} {ms:>7.1f}"
+            for name, ms in report["handler_modules_ms"].items()
+        ),
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--event", choices=list(EVENTS), default="bot_message")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=1000,
+        help="the most the median import and first event may take together",
+    )
+    parser.add_argument(
+        "--forbid",
+        help="modules that must not be loaded by the first event, comma separated. "
+        "Defaults to the modules that the event doesn't need",
+    )
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    event_factory, default_forbidden = EVENTS[args.event]
+    forbidden = (
+        tuple(name for name in args.forbid.split(",") if name)
+        if args.forbid is not None
+        else default_forbidden
+    )
+    slack = FakeSlackServer()
+    cloud = FakeGriptapeCloudServer()
+    configure_environment(slack.start(), cloud.start())
+    try:
+        runs = [run_once(event_factory(), forbidden) for _ in range(args.runs)]
+    finally:
+        slack.stop()
+        cloud.stop()
+
+    report = build_report(runs, top=args.top)
+    report["budget_ms"] = args.budget_ms
+    print(format_report(report, budget_ms=args.budget_ms))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    over_budget = report["import_ms"] + report["first_event_ms"] > args.budget_ms
+    return 1 if over_budget or report["loaded"] or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,463 @@
+"""
+Drives `handle_slack_event` with a corpus of Slack events at a target rate, against a stand-in
+Slack API, stand-in Griptape Cloud endpoints, and a fake LLM, and reports throughput, latency
+percentiles, and Slack calls per event.
+
+    python -m bench.load_test --rate 5 --count 200 --mix dm=4,app_mention=3,shadow=2,passive=1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent import futures
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterator, Optional
+
+from attrs import define, field
+
+from .events import SHADOW_USER_ID, SlackEvent, event_corpus
+from .fake_cloud import FakeGriptapeCloudServer
+from .fake_prompt_driver import FakePromptDriver
+from .fake_slack import BOT_USER_ID, FakeSlackServer
+
+SIGNING_SECRET = "bench-signing-secret"
+
+# the dispatcher that the stubbed handler dispatches events with, if it runs worker processes
+_dispatcher = None
+
+
+@define
+class EventResult:
+    """
+    The outcome of sending an event.
+
+    Attributes:
+        event: The event that was sent.
+        latency: How many seconds from when the event was due to be sent until it was handled.
+        status: The status code of the response, or None if handling it raised.
+    """
+
+    event: SlackEvent = field(kw_only=True)
+    latency: float = field(kw_only=True)
+    status: Optional[int] = field(kw_only=True)
+
+
+def configure_environment(
+    slack_url: str, cloud_url: str, *, shadow_user_id: str = SHADOW_USER_ID
+) -> None:
+    """Points the bot at the stand-ins. Must be called before `griptape_slack_handler` is imported."""
+    os.environ.update(
+        {
+            "SLACK_BOT_TOKEN": "xoxb-bench",
+            "SLACK_SIGNING_SECRET": SIGNING_SECRET,
+            "SLACK_API_URL": f"{slack_url}/api/",
+            "SLACK_BOT_USER_ID": BOT_USER_ID,
+            "SHADOW_USER_ID": shadow_user_id,
+            "GT_CLOUD_BASE_URL": cloud_url,
+            "GT_CLOUD_API_KEY": "bench",
+            "OPENAI_API_KEY": "bench",
+            "GITHUB_PAT": "bench",
+        }
+    )
+    os.environ.setdefault("FEATURE_SHADOW_USER", "true")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.pop("GT_CLOUD_TOOL_IDS", None)
+
+
+def run_load(
+    handle_slack_event: Callable[[str, dict], dict],
+    corpus: list[SlackEvent],
+    *,
+    rate: float,
+    concurrency: int,
+) -> list[EventResult]:
+    """Sends the events at the rate, whether or not earlier events have been handled, like Slack does."""
+    return run_schedule(
+        handle_slack_event,
+        [(i / rate, event) for i, event in enumerate(corpus)],
+        concurrency=concurrency,
+    )
+
+
+def run_schedule(
+    handle_slack_event: Callable[[str, dict], dict],
+    schedule: list[tuple[float, SlackEvent]],
+    *,
+    concurrency: int,
+    signing_secret: str = SIGNING_SECRET,
+) -> list[EventResult]:
+    """
+    Sends each event the given number of seconds after the start.
+    Latency is measured from when each event was due, so it includes any time spent queued.
+    """
+
+    def send(event: SlackEvent, due: float) -> EventResult:
+        body, headers = event.signed(signing_secret)
+        try:
+            status = handle_slack_event(body, headers)["status"]
+        except Exception:
+            status = None
+        return EventResult(event=event, latency=time.monotonic() - due, status=status)
+
+    start = time.monotonic()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = []
+        for offset, event in schedule:
+            due = start + offset
+            time.sleep(max(0.0, due - time.monotonic()))
+            pending.append(executor.submit(send, event, due))
+        return [future.result() for future in pending]
+
+
+@contextmanager
+def stubbed_handler(
+    args: argparse.Namespace, *, shadow_user_id: str = SHADOW_USER_ID
+) -> Iterator[
+    tuple[Callable[[str, dict], dict], FakeSlackServer, FakeGriptapeCloudServer]
+]:
+    """Starts the stand-ins, and gets `handle_slack_event` pointed at them with the fake LLM."""
+    slack = FakeSlackServer(
+        latency=args.slack_latency,
+        **({"rate_limits": {}} if args.no_rate_limits else {}),
+    )
+    cloud = FakeGriptapeCloudServer(latency=args.cloud_latency)
+    configure_environment(slack.start(), cloud.start(), shadow_user_id=shadow_user_id)
+    fake_llm = partial(
+        use_fake_prompt_driver,
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+    )
+    try:
+        if args.workers:
+            with _dispatching_handler(args, fake_llm) as handle_slack_event:
+                slack.reset()
+                cloud.reset()
+                yield handle_slack_event, slack, cloud
+            return
+
+        # imported late, the bot reads its environment on import. The handlers are
+        # loaded on first use, load them before the run. Loading the Griptape handler
+        # loads the Griptape config, so the LLM is swapped out after it
+        import griptape_slack_handler.griptape_handler  # noqa: F401
+        import griptape_slack_handler.slack_handler  # noqa: F401
+        from griptape_slack_handler import handle_slack_event
+        from griptape_slack_handler.metrics import metrics
+
+        fake_llm()
+        slack.reset()
+        cloud.reset()
+        metrics.reset()
+        yield handle_slack_event, slack, cloud
+    finally:
+        slack.stop()
+        cloud.stop()
+
+
+def use_fake_prompt_driver(
+    *, latency: float, tokens_per_second: float, output_tokens: int
+) -> None:
+    """Swaps the bot's LLM for the fake one."""
+    from griptape.configs import Defaults
+
+    Defaults.drivers_config.prompt_driver = FakePromptDriver(
+        latency=latency,
+        tokens_per_second=tokens_per_second,
+        output_tokens=output_tokens,
+    )
+
+
+@contextmanager
+def _dispatching_handler(
+    args: argparse.Namespace, fake_llm: Callable[[], None]
+) -> Iterator[Callable[[str, dict], dict]]:
+    global _dispatcher
+    from griptape_slack_handler.dispatcher import Dispatcher, event_key
+
+    _dispatcher = Dispatcher(
+        workers=args.workers, threads=args.concurrency, initializer=fake_llm
+    )
+    _dispatcher.start()
+    _dispatcher.wait_until_ready()
+    try:
+        # Events API events are acknowledged before they are answered, so wait for the answer
+        yield lambda body, headers: _dispatcher.dispatch(
+            body, headers, key=event_key(body)
+        ).result()
+    finally:
+        _dispatcher.stop()
+        _dispatcher = None
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the arguments that configure the stand-ins."""
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--output-tokens", type=int, default=150)
+    parser.add_argument("--slack-latency", type=float, default=0.05)
+    parser.add_argument("--cloud-latency", type=float, default=0.05)
+    parser.add_argument(
+        "--no-rate-limits", action="store_true", help="don't rate limit Slack calls"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="dispatch events to this many worker processes, 0 handles them in this process. "
+        "The bot's metrics are kept by the workers, and aren't reported",
+    )
+    parser.add_argument("--json", help="also write the report to this file")
+
+
+def write_report(report: dict, path: Optional[str]) -> None:
+    print(format_report(report))
+    if path:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def worker_load() -> Optional[dict[str, dict]]:
+    """Gets the load of every worker, if events are dispatched to worker processes."""
+    return _dispatcher.load() if _dispatcher is not None else None
+
+
+def handler_counters() -> dict[str, float]:
+    """Waits for the bot's background Slack calls to be made, and gets its metrics counters."""
+    from griptape_slack_handler.metrics import metrics
+    from griptape_slack_handler.side_effects import side_effects
+
+    side_effects.flush()
+    return metrics.snapshot()["counters"]
+
+
+def build_report(
+    results: list[EventResult],
+    *,
+    duration: float,
+    slack: Optional[FakeSlackServer] = None,
+    cloud: Optional[FakeGriptapeCloudServer] = None,
+    counters: Optional[dict[str, float]] = None,
+    workers: Optional[dict[str, dict]] = None,
+) -> dict:
+    """
+    Summarizes the results of a run. Slack calls are attributed to events by channel,
+    and are split evenly between the events of a channel that has more than one.
+    """
+    slack_calls = slack.calls_by_channel() if slack is not None else {}
+    channel_events = Counter(result.event.channel for result in results)
+
+    def event_calls(result: EventResult) -> Counter[str]:
+        share = 1 / channel_events[result.event.channel]
+        calls = Counter()
+        for method in slack_calls.get(result.event.channel, []):
+            calls[method] += share
+        return calls
+
+    report = {
+        "events": len(results),
+        "duration_s": duration,
+        "throughput_per_s": len(results) / duration if duration else 0.0,
+        "errors": sum(
+            result.status is None or result.status >= 400 for result in results
+        ),
+        "latency_ms": _percentiles([result.latency * 1000 for result in results]),
+        "by_kind": {},
+    }
+    if counters is not None:
+        # the Slack calls that responses didn't wait on, since they were made in the background
+        report["side_effects_saved_ms_per_event"] = _per_event(
+            counters.get("side_effects.saved_ms", 0), results
+        )
+        report["side_effects_dropped_per_event"] = _per_event(
+            counters.get("side_effects.dropped", 0)
+            + counters.get("side_effects.coalesced", 0),
+            results,
+        )
+        routes = {
+            route: {
+                "messages": counters.get(f"model_routing.{route}.messages", 0),
+                "input_tokens": counters.get(f"model_routing.{route}.input_tokens", 0),
+            }
+            for route in ("small", "large")
+        }
+        if any(route["messages"] for route in routes.values()):
+            report["model_routes"] = routes
+        scheduled = {
+            name: counters[name]
+            for name in sorted(counters)
+            if name.startswith("scheduler.") and name.endswith((".shed", ".deferred"))
+        }
+        if scheduled:
+            report["scheduler"] = scheduled
+        cache_hits = {
+            name.removesuffix(".lookups"): (
+                counters.get(f"{name.removesuffix('.lookups')}.local_hits", 0)
+                + counters.get(f"{name.removesuffix('.lookups')}.shared_hits", 0)
+            )
+            / counters[name]
+            for name in sorted(counters)
+            if name.endswith(".lookups") and counters[name]
+        }
+        if cache_hits:
+            report["cache_hit_ratios"] = cache_hits
+    if workers is not None:
+        report["workers"] = workers
+    if slack is not None:
+        report["slack_calls_per_event"] = _mean(
+            [sum(event_calls(result).values()) for result in results]
+        )
+        report["slack_rate_limited"] = slack.rate_limited_calls()
+    if cloud is not None:
+        report["cloud_calls_per_event"] = (
+            len(cloud.calls) / len(results) if results else 0.0
+        )
+
+    for kind in sorted({result.event.kind for result in results}):
+        kind_results = [result for result in results if result.event.kind == kind]
+        methods = sum((event_calls(result) for result in kind_results), Counter())
+        report["by_kind"][kind] = {
+            "events": len(kind_results),
+            "latency_ms": _percentiles(
+                [result.latency * 1000 for result in kind_results]
+            ),
+            "slack_calls_per_event": {
+                method: count / len(kind_results) for method, count in methods.items()
+            },
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"events:                {report['events']} in {report['duration_s']:.1f}s",
+        f"throughput:            {report['throughput_per_s']:.2f} events/s",
+        f"errors:                {report['errors']}",
+        f"latency (ms):          {_format_percentiles(report['latency_ms'])}",
+    ]
+    if "slack_calls_per_event" in report:
+        lines.append(
+            f"slack calls per event: {report['slack_calls_per_event']:.2f}"
+            f" ({report['slack_rate_limited']} rate limited)"
+        )
+    if "cloud_calls_per_event" in report:
+        lines.append(f"cloud calls per event: {report['cloud_calls_per_event']:.2f}")
+    if "side_effects_saved_ms_per_event" in report:
+        lines.append(
+            f"background slack calls: {report['side_effects_saved_ms_per_event']:.0f}ms saved"
+            f" and {report['side_effects_dropped_per_event']:.2f} calls dropped per event"
+        )
+    if "model_routes" in report:
+        lines.append(
+            "model routes:          "
+            + ", ".join(
+                f"{route} {route_report['messages']:.0f} messages"
+                f" ({route_report['input_tokens']:.0f} input tokens)"
+                for route, route_report in report["model_routes"].items()
+            )
+        )
+    if "scheduler" in report:
+        lines.append(
+            "scheduler:             "
+            + ", ".join(
+                f"{name.removeprefix('scheduler.')} {count:.0f}"
+                for name, count in report["scheduler"].items()
+            )
+        )
+    if "cache_hit_ratios" in report:
+        lines.append(
+            "cache hit ratios:      "
+            + ", ".join(
+                f"{name} {ratio:.0%}"
+                for name, ratio in report["cache_hit_ratios"].items()
+            )
+        )
+    if "workers" in report:
+        lines.append(
+            "events per worker:     "
+            + ", ".join(
+                f"{name} {worker['handled']} ({worker['restarts']} restarts)"
+                for name, worker in report["workers"].items()
+            )
+        )
+    for kind, kind_report in report["by_kind"].items():
+        calls = ", ".join(
+            f"{method} {count:.1f}"
+            for method, count in sorted(kind_report["slack_calls_per_event"].items())
+        )
+        lines.append(
+            f"  {kind:<12} {kind_report['events']:>5} events  "
+            f"{_format_percentiles(kind_report['latency_ms'])}  {calls}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=2.0, help="events per second")
+    parser.add_argument("--count", type=int, default=50, help="events to send")
+    parser.add_argument(
+        "--mix",
+        default="dm=4,app_mention=3,shadow=2,passive=1",
+        help="weights of the kinds of events",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    corpus = event_corpus(
+        args.count,
+        {
+            kind: float(weight)
+            for kind, weight in (part.split("=") for part in args.mix.split(","))
+        },
+        seed=args.seed,
+    )
+    with stubbed_handler(args) as (handle_slack_event, slack, cloud):
+        start = time.monotonic()
+        results = run_load(
+            handle_slack_event, corpus, rate=args.rate, concurrency=args.concurrency
+        )
+        duration = time.monotonic() - start
+        report = build_report(
+            results,
+            duration=duration,
+            slack=slack,
+            cloud=cloud,
+            counters=handler_counters(),
+            workers=worker_load(),
+        )
+
+    write_report(report, args.json)
+    return report
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        name: values[min(len(values) - 1, int(len(values) * percentile))]
+        for name, percentile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+    } | {"max": values[-1]}
+
+
+def _format_percentiles(percentiles: dict) -> str:
+    return "  ".join(f"{name} {value:.0f}" for name, value in percentiles.items())
+
+
+def _per_event(value: float, results: list[EventResult]) -> float:
+    return value / len(results) if results else 0.0
+
+
+def _mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Replays a log of Slack requests recorded with `FEATURE_EVENT_RECORDER` through `handle_slack_event`,
+at the original timing or faster, and reports throughput, latency percentiles, and Slack calls per
+event like `bench.load_test` does.
+
+    python -m bench.replay tmp/griptape_slack_handler/events.jsonl --speed 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import time
+from typing import TYPE_CHECKING, Optional
+
+from .events import SlackEvent
+from .load_test import (
+    add_stub_arguments,
+    build_report,
+    handler_counters,
+    run_schedule,
+    stubbed_handler,
+    write_report,
+)
+
+if TYPE_CHECKING:
+    from griptape_slack_handler.event_recorder import RecordedEvent
+
+MENTION_PATTERN = re.compile(r"<@(\w+)")
+
+
+def replay_schedule(
+    recorded: list[RecordedEvent], *, speed: float, shadow_user_id: Optional[str]
+) -> list[tuple[float, SlackEvent]]:
+    """Gets the events of a log, each due when it arrived relative to the first, sped up by `speed`."""
+    if not recorded:
+        return []
+    first = recorded[0].arrival
+    return [
+        (
+            (record.arrival - first) / speed,
+            SlackEvent(
+                kind=_kind(record.body, shadow_user_id),
+                channel=record.body.get("event", {}).get("channel", ""),
+                body=record.body,
+                headers=record.headers,
+            ),
+        )
+        for record in recorded
+    ]
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("log", help="the recorded log, which can be gzipped")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="how many times faster than recorded to send the events",
+    )
+    parser.add_argument(
+        "--shadow-user-id",
+        default=os.environ.get("SHADOW_USER_ID"),
+        help="the shadow user of the recorded workspace, if any",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="use the Slack, Griptape Cloud, and LLM configured in the environment instead of the stand-ins",
+    )
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.live:
+        from griptape_slack_handler import handle_slack_event
+
+        schedule = _load_schedule(args)
+        start = time.monotonic()
+        results = run_schedule(
+            handle_slack_event,
+            schedule,
+            concurrency=args.concurrency,
+            signing_secret=os.environ["SLACK_SIGNING_SECRET"],
+        )
+        duration = time.monotonic() - start
+        report = build_report(results, duration=duration, counters=handler_counters())
+    else:
+        stub_kwargs = (
+            {"shadow_user_id": args.shadow_user_id} if args.shadow_user_id else {}
+        )
+        with stubbed_handler(args, **stub_kwargs) as (handle_slack_event, slack, cloud):
+            schedule = _load_schedule(args)
+            start = time.monotonic()
+            results = run_schedule(
+                handle_slack_event, schedule, concurrency=args.concurrency
+            )
+            duration = time.monotonic() - start
+            report = build_report(
+                results,
+                duration=duration,
+                slack=slack,
+                cloud=cloud,
+                counters=handler_counters(),
+            )
+
+    write_report(report, args.json)
+    return report
+
+
+def _load_schedule(args: argparse.Namespace) -> list[tuple[float, SlackEvent]]:
+    # imported late, the bot reads its environment on import
+    from griptape_slack_handler.event_recorder import read_event_log
+
+    return replay_schedule(
+        sorted(read_event_log(args.log), key=lambda record: record.arrival),
+        speed=args.speed,
+        shadow_user_id=args.shadow_user_id,
+    )
+
+
+def _kind(body: dict, shadow_user_id: Optional[str]) -> str:
+    event = body.get("event", {})
+    if event.get("type") == "app_mention":
+        return "app_mention"
+    if event.get("channel_type") == "im":
+        return "dm"
+    if shadow_user_id and shadow_user_id in MENTION_PATTERN.findall(
+        event.get("text", "")
+    ):
+        return "shadow"
+    if body.get("type") == "event_callback":
+        return "passive"
+    return body.get("type", "unknown")
+
+
+if __name__ == "__main__":
+    main()
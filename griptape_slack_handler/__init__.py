@@ -1,4 +1,16 @@
-from .griptape_handler import agent
-from .slack_handler import handle_slack_event
+from .fast_path import handle_slack_event
+from .logging_config import configure_logging
+
+configure_logging()
 
 __all__ = ["handle_slack_event"]
+
+
+def __getattr__(name: str):
+    # the Griptape handler is imported on first use, so that importing the package doesn't
+    # load Griptape and the tools before they are needed
+    if name == "agent":
+        from .griptape_handler import agent
+
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
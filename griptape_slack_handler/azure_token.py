@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from attrs import define, field
+
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from azure.core.credentials import AccessToken, TokenCredential
+
+logger = logging.getLogger("griptape_slack_handler")
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+@define
+class AzureTokenProvider:
+    """
+    An `azure_ad_token_provider` that shares one credential, and keeps its token cached.
+    The token is refreshed in the background before it expires, so that prompts don't wait
+    on Azure AD. A token is only fetched on the calling thread if there is none yet, or if
+    the background refresh kept failing until the cached one expired.
+
+    Attributes:
+        credential: The credential to get tokens from.
+        scope: The scope of the tokens.
+        refresh_margin: How many seconds before the token expires to refresh it.
+        retry_interval: How many seconds to wait before retrying a failed refresh.
+    """
+
+    credential: TokenCredential = field(kw_only=True)
+    scope: str = field(default=COGNITIVE_SERVICES_SCOPE, kw_only=True)
+    refresh_margin: float = field(default=300, kw_only=True)
+    retry_interval: float = field(default=10, kw_only=True)
+
+    _token: Optional[AccessToken] = field(default=None, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False)
+
+    def __call__(self) -> str:
+        token = self._token
+        if token is None or token.expires_on <= time.time():
+            with self._lock:
+                # another thread may have fetched it while this one waited
+                token = self._token
+                if token is None or token.expires_on <= time.time():
+                    metrics.increment("azure_token.blocking_fetches")
+                    token = self._fetch()
+            self._start()
+        else:
+            metrics.increment("azure_token.cache_hits")
+        return token.token
+
+    def _fetch(self) -> AccessToken:
+        start = time.perf_counter()
+        try:
+            token = self.credential.get_token(self.scope)
+        except Exception:
+            metrics.increment("azure_token.fetch_errors")
+            raise
+        metrics.increment("azure_token.fetches")
+        metrics.observe("azure_token.fetch_ms", (time.perf_counter() - start) * 1000)
+        self._token = token
+        return token
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh, name="azure-token-refresh", daemon=True
+                )
+                self._thread.start()
+
+    def _refresh(self) -> None:
+        while True:
+            token = self._token
+            # at least retry_interval apart, in case the credential hands back a token
+            # it cached itself that is already within the margin
+            time.sleep(
+                max(
+                    self.retry_interval,
+                    token.expires_on - self.refresh_margin - time.time()
+                    if token is not None
+                    else 0,
+                )
+            )
+            try:
+                with self._lock:
+                    self._fetch()
+            except Exception:
+                logger.warning(
+                    "Error while refreshing the Azure AD token", exc_info=True
+                )
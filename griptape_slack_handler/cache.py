@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+from attrs import define, field
+
+V = TypeVar("V")
+
+
+@define
+class TtlCache(Generic[V]):
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+    Expired entries are kept until they are evicted, so callers can revalidate them.
+
+    Attributes:
+        max_size: The maximum number of entries to keep.
+        ttl: How many seconds an entry is fresh for.
+    """
+
+    max_size: int = field(default=1024, kw_only=True)
+    ttl: float = field(default=300, kw_only=True)
+
+    _entries: OrderedDict[str, tuple[float, V]] = field(factory=OrderedDict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def get(self, key: str) -> Optional[V]:
+        """Gets the value for the key if it is cached and fresh."""
+        entry = self.peek(key)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    def peek(self, key: str) -> Optional[tuple[V, bool]]:
+        """Gets the value for the key, and whether it is still fresh, even if it has expired."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            expires_at, value = self._entries[key]
+            self._entries.move_to_end(key)
+            return value, expires_at > time.monotonic()
+
+    def set(self, key: str, value: V, *, ttl: Optional[float] = None) -> None:
+        """Caches the value for the key. The TTL defaults to the cache's TTL."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def touch(self, key: str, *, ttl: Optional[float] = None) -> None:
+        """Marks a cached value as fresh again, for example after revalidating it."""
+        with self._lock:
+            if key in self._entries:
+                expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+                self._entries[key] = (expires_at, self._entries[key][1])
+
+    def delete(self, key: str) -> None:
+        """Removes the key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from attrs import define, field
+
+from .metrics import metrics
+from .shared_cache import CacheTier
+
+logger = logging.getLogger("griptape_slack_handler")
+
+TMP_SUFFIX = ".tmp"
+
+
+@define
+class DiskCache(CacheTier):
+    """
+    A size-bounded cache of byte strings in a directory, shared by every process that uses the
+    same directory. Once the cache grows past its size limit, the least recently read entries are
+    evicted first. It can be the shared tier of a Tiered Cache.
+
+    Attributes:
+        directory: The directory to store the cache in.
+        name: The name the cache reports its metrics under.
+        max_bytes: The maximum total size of the cached entries.
+    """
+
+    directory: str = field(kw_only=True)
+    name: str = field(kw_only=True)
+    max_bytes: int = field(default=256 * 1024 * 1024, kw_only=True)
+
+    _size: Optional[int] = field(default=None, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Gets the entry for the key, if it is cached."""
+        file_path = self._path(key)
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+            # the modified time doubles as the last read time for eviction
+            os.utime(file_path)
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.exception(f"Error while reading {self.name} entry {key}")
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """Caches the entry for the key. Entries larger than the whole cache are not cached."""
+        if len(data) > self.max_bytes:
+            return
+        file_path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(file_path), suffix=TMP_SUFFIX
+            )
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            replaced = _file_size(file_path)
+            os.replace(tmp_path, file_path)
+        except OSError:
+            logger.exception(f"Error while writing {self.name} entry {key}")
+            return
+
+        with self._lock:
+            self._size = self._current_size() - replaced + len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        """Removes the entry for the key."""
+        file_path = self._path(key)
+        size = _file_size(file_path)
+        try:
+            os.remove(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._size = self._current_size() - size
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        # evict down to 90% so that every write near the limit doesn't trigger a scan
+        target = self.max_bytes * 0.9
+        for file_path, stat in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            self._size -= stat.st_size
+            metrics.increment(f"{self.name}.evictions")
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(stat.st_size for _, stat in self._entries())
+        return self._size
+
+    def _entries(self) -> list[tuple[str, os.stat_result]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(TMP_SUFFIX):
+                    continue
+                file_path = os.path.join(root, name)
+                try:
+                    entries.append((file_path, os.stat(file_path)))
+                except OSError:
+                    continue
+        return entries
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
@@ -0,0 +1,503 @@
+"""
+Runs the bot as a pool of warm worker processes behind an HTTP front end, which routes the events
+of each Slack thread to the same worker.
+
+    python -m griptape_slack_handler.dispatcher --port 3000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable, Optional
+
+from attrs import define, field
+
+from .features import dispatcher_worker_threads, dispatcher_workers
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# the most seconds to wait before replacing a worker that keeps dying
+MAX_RESTART_DELAY = 30
+# the response to an event whose worker died before it answered, Slack retries it
+UNAVAILABLE_RESPONSE = {
+    "status": 503,
+    "body": "",
+    "headers": {"content-type": ["text/plain;charset=utf-8"]},
+}
+# the response to an Events API event once a worker has accepted it
+ACK_RESPONSE = {
+    "status": 200,
+    "body": "",
+    "headers": {"content-type": ["text/plain;charset=utf-8"]},
+}
+# how many accepted event IDs are remembered, to drop Slack's retries of them
+MAX_ACCEPTED_EVENTS = 10_000
+
+
+@define
+class HashRing:
+    """
+    A consistent hash ring. Every node owns many points on the ring, and a key belongs to the node
+    that owns the first point after the key's hash, so adding or removing a node only moves the
+    keys of that node.
+
+    Attributes:
+        replicas: How many points each node owns.
+    """
+
+    replicas: int = field(default=64, kw_only=True)
+
+    _points: list[int] = field(factory=list, init=False)
+    _owners: dict[int, str] = field(factory=dict, init=False)
+
+    def add(self, node: str) -> None:
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {
+            point: owner for point, owner in self._owners.items() if owner != node
+        }
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+
+@define
+class Worker:
+    """
+    A worker process, and the events it is handling.
+
+    Attributes:
+        name: The worker's name, which is its place on the hash ring.
+        process: The worker process.
+        connection: The end of the pipe to the worker that events are sent on.
+        restarts: How many times the worker has been replaced.
+        handled: How many events the worker has handled.
+        pending: The futures of the events the worker is handling, by request ID.
+        ready: Set once the worker has loaded the bot.
+    """
+
+    name: str = field()
+    process: BaseProcess = field(kw_only=True)
+    connection: Connection = field(kw_only=True)
+    restarts: int = field(default=0, kw_only=True)
+
+    handled: int = field(default=0, init=False)
+    pending: dict[int, futures.Future] = field(factory=dict, init=False)
+    ready: threading.Event = field(factory=threading.Event, init=False)
+    send_lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+
+@define
+class Dispatcher:
+    """
+    Dispatches Slack events to a fixed pool of warm worker processes, each running
+    `handle_slack_event`. Events are routed by a consistent hash of their team, channel, and
+    thread, so the events of a Slack thread always go to the same worker, which handles them in
+    order and keeps the thread's state warm. When a worker dies, its threads move to the other
+    workers until it is replaced. Events without a thread, such as URL verifications and
+    interactivity payloads, go to the least loaded worker.
+
+    Answering takes longer than the 3 seconds Slack waits for a response before it retries an
+    event, so Events API events are acknowledged as soon as a worker accepts them, and retries of
+    events that were already accepted are dropped.
+
+    Attributes:
+        workers: How many worker processes to run.
+        threads: How many events each worker handles at the same time.
+        initializer: Called in each worker once the bot is loaded, before it handles events.
+    """
+
+    workers: int = field(kw_only=True)
+    threads: int = field(default=8, kw_only=True)
+    initializer: Optional[Callable[[], None]] = field(default=None, kw_only=True)
+
+    _ring: HashRing = field(factory=HashRing, init=False)
+    _workers: dict[str, Worker] = field(factory=dict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+    _request_ids: itertools.count = field(factory=itertools.count, init=False)
+    _stopped: bool = field(default=False, init=False)
+    _accepted: set[str] = field(factory=set, init=False)
+    _accepted_order: deque[str] = field(factory=deque, init=False)
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            self._start_worker(f"worker-{i}")
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Waits for every worker to load the bot, and gets whether they did in time."""
+        with self._lock:
+            workers = list(self._workers.values())
+        return all(worker.ready.wait(timeout) for worker in workers)
+
+    def stop(self, timeout: float = 5) -> None:
+        """Lets the workers finish the events they are handling, and stops them."""
+        with self._lock:
+            self._stopped = True
+            workers = list(self._workers.values())
+        for worker in workers:
+            try:
+                with worker.send_lock:
+                    worker.connection.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def handle_slack_event(self, body: str, headers: dict) -> dict:
+        """
+        Handles a Slack request on the worker of its thread, like `handle_slack_event`. Events API
+        events are answered with an acknowledgement once the worker has accepted them, other
+        requests with the worker's response.
+        """
+        key = event_key(body)
+        event_id = _event_id(body) if key is not None else None
+        if event_id is not None and _retry_num(headers) is not None:
+            with self._lock:
+                retried = event_id in self._accepted
+            if retried:
+                metrics.increment("dispatcher.retries_dropped")
+                logger.debug(f"Dropped a retry of accepted event {event_id}")
+                return ACK_RESPONSE
+
+        future = self.dispatch(body, headers, key=key)
+        if key is None or (future.done() and future.result()["status"] >= 400):
+            return future.result()
+        if event_id is not None:
+            self._accept(event_id)
+        future.add_done_callback(_log_failed_event)
+        return ACK_RESPONSE
+
+    def dispatch(
+        self, body: str, headers: dict, *, key: Optional[str] = None
+    ) -> futures.Future[dict]:
+        """Sends a Slack request to the worker of the key, and gets the future of its response."""
+        future = futures.Future()
+        with self._lock:
+            worker = self._worker_for(key)
+            if worker is None:
+                logger.error("No worker is available to handle the event")
+                future.set_result(UNAVAILABLE_RESPONSE)
+                return future
+            request_id = next(self._request_ids)
+            worker.pending[request_id] = future
+            in_flight = len(worker.pending)
+
+        metrics.increment("dispatcher.dispatched")
+        metrics.observe(f"dispatcher.{worker.name}.in_flight", in_flight)
+        try:
+            with worker.send_lock:
+                worker.connection.send((request_id, key, body, headers))
+        except (OSError, ValueError):
+            self._worker_died(worker)
+        return future
+
+    def load(self) -> dict[str, dict]:
+        """Gets the process ID, readiness, events in flight, events handled, and restarts of every worker."""
+        with self._lock:
+            return {
+                name: {
+                    "pid": worker.process.pid,
+                    "ready": worker.ready.is_set(),
+                    "in_flight": len(worker.pending),
+                    "handled": worker.handled,
+                    "restarts": worker.restarts,
+                }
+                for name, worker in sorted(self._workers.items())
+            }
+
+    def _accept(self, event_id: str) -> None:
+        with self._lock:
+            if event_id in self._accepted:
+                return
+            self._accepted.add(event_id)
+            self._accepted_order.append(event_id)
+            if len(self._accepted_order) > MAX_ACCEPTED_EVENTS:
+                self._accepted.discard(self._accepted_order.popleft())
+
+    def _worker_for(self, key: Optional[str]) -> Optional[Worker]:
+        ready = [worker for worker in self._workers.values() if worker.ready.is_set()]
+        if not ready:
+            return None
+        if key is None:
+            return min(ready, key=lambda worker: len(worker.pending))
+        return self._workers[self._ring.node_for(key)]
+
+    def _start_worker(self, name: str, *, restarts: int = 0) -> None:
+        context = multiprocessing.get_context("spawn")
+        connection, worker_connection = context.Pipe()
+        process = context.Process(
+            target=_work,
+            args=(worker_connection, self.initializer, self.threads),
+            name=f"griptape-slack-{name}",
+            daemon=True,
+        )
+        process.start()
+        worker_connection.close()
+        worker = Worker(name, process=process, connection=connection, restarts=restarts)
+        with self._lock:
+            if self._stopped:
+                process.terminate()
+                return
+            self._workers[name] = worker
+        threading.Thread(
+            target=self._read, args=(worker,), name=f"dispatcher-{name}", daemon=True
+        ).start()
+
+    def _read(self, worker: Worker) -> None:
+        while True:
+            try:
+                message = worker.connection.recv()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                # a worker takes its threads once it is ready, so they don't wait for it to load
+                with self._lock:
+                    worker.ready.set()
+                    self._ring.add(worker.name)
+                continue
+            request_id, response = message
+            with self._lock:
+                future = worker.pending.pop(request_id, None)
+                worker.handled += 1
+            if future is not None:
+                future.set_result(response)
+        self._worker_died(worker)
+
+    def _worker_died(self, worker: Worker) -> None:
+        with self._lock:
+            if self._workers.get(worker.name) is not worker:
+                return
+            # its threads move to the next workers on the ring until it is replaced
+            del self._workers[worker.name]
+            self._ring.remove(worker.name)
+            pending = list(worker.pending.values())
+            worker.pending.clear()
+            stopped = self._stopped
+
+        for future in pending:
+            future.set_result(UNAVAILABLE_RESPONSE)
+        if stopped:
+            return
+
+        metrics.increment("dispatcher.worker_deaths")
+        delay = min(0.5 * 2**worker.restarts, MAX_RESTART_DELAY)
+        logger.error(
+            f"Worker {worker.name} died with exit code {worker.process.exitcode}, "
+            f"{len(pending)} events failed, replacing it in {delay:.1f}s"
+        )
+        timer = threading.Timer(
+            delay,
+            self._start_worker,
+            args=(worker.name,),
+            kwargs={"restarts": worker.restarts + 1},
+        )
+        timer.daemon = True
+        timer.start()
+
+
+def event_key(body: str) -> Optional[str]:
+    """Gets the team, channel, and thread of an Events API request, which its worker is chosen by."""
+    try:
+        event_body = json.loads(body)
+    except ValueError:
+        return None
+    event = event_body.get("event") if isinstance(event_body, dict) else None
+    if not isinstance(event, dict):
+        return None
+    channel = event.get("channel")
+    thread_ts = event.get("thread_ts", event.get("ts"))
+    if channel is None or thread_ts is None:
+        return None
+    return f"{event_body.get('team_id')}:{channel}:{thread_ts}"
+
+
+def _event_id(body: str) -> Optional[str]:
+    try:
+        event_body = json.loads(body)
+    except ValueError:
+        return None
+    return event_body.get("event_id") if isinstance(event_body, dict) else None
+
+
+def _retry_num(headers: dict) -> Optional[str]:
+    return next(
+        (
+            value
+            for name, value in headers.items()
+            if name.lower() == "x-slack-retry-num"
+        ),
+        None,
+    )
+
+
+def _log_failed_event(future: futures.Future[dict]) -> None:
+    # the event was already acknowledged, so Slack won't retry it
+    status = future.result()["status"]
+    if status >= 400:
+        metrics.increment("dispatcher.acknowledged_failures")
+        logger.error(f"An acknowledged event failed with status {status}")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def _work(
+    connection: Connection,
+    initializer: Optional[Callable[[], None]],
+    threads: int,
+) -> None:
+    # loads the bot before the first event, rather than while handling it
+    from . import griptape_handler, handle_slack_event, slack_handler  # noqa: F401
+
+    if initializer is not None:
+        initializer()
+    connection.send(None)
+
+    # the events of a thread are handled one at a time, in the order they arrived
+    lanes: dict[str, deque] = {}
+    lanes_lock = threading.Lock()
+    send_lock = threading.Lock()
+
+    def handle(request: tuple) -> None:
+        request_id, _, body, headers = request
+        try:
+            response = handle_slack_event(body, headers)
+        except Exception:
+            logger.exception("Error while handling a dispatched event")
+            response = {"status": 500, "body": "", "headers": {}}
+        with send_lock:
+            connection.send((request_id, response))
+
+    def handle_lane(key: str) -> None:
+        while True:
+            with lanes_lock:
+                lane = lanes[key]
+                request = lane[0]
+            handle(request)
+            with lanes_lock:
+                lane.popleft()
+                if not lane:
+                    del lanes[key]
+                    return
+
+    with futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+            key = request[1]
+            if key is None:
+                executor.submit(handle, request)
+                continue
+            with lanes_lock:
+                if key in lanes:
+                    lanes[key].append(request)
+                    continue
+                lanes[key] = deque([request])
+            executor.submit(handle_lane, key)
+
+
+def serve(dispatcher: Dispatcher, *, host: str, port: int) -> None:
+    """Serves Slack requests over HTTP, and the load of the workers at GET /load."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("content-length", 0)))
+            response = dispatcher.handle_slack_event(
+                body.decode("utf-8"), dict(self.headers.items())
+            )
+            self._respond(
+                response["status"],
+                (response["body"] or "").encode("utf-8"),
+                response["headers"],
+            )
+
+        def do_GET(self) -> None:
+            if self.path != "/load":
+                self._respond(404, b"", {})
+                return
+            self._respond(
+                200,
+                json.dumps(dispatcher.load()).encode("utf-8"),
+                {"content-type": ["application/json"]},
+            )
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug(format % args)
+
+        def _respond(self, status: int, body: bytes, headers: dict) -> None:
+            self.send_response(status)
+            for name, values in headers.items():
+                if name.lower() == "content-length":
+                    continue
+                for value in values if isinstance(values, list) else [values]:
+                    self.send_header(name, value)
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    logger.info(f"Dispatching Slack events on {host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=dispatcher_workers())
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=dispatcher_worker_threads(),
+        help="how many events each worker handles at the same time",
+    )
+    args = parser.parse_args(argv)
+
+    dispatcher = Dispatcher(workers=args.workers, threads=args.threads)
+    dispatcher.start()
+    dispatcher.wait_until_ready()
+    try:
+        serve(dispatcher, host=args.host, port=args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispatcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Iterator, Optional
+
+from attrs import define, field
+
+from .features import (
+    event_recorder_enabled,
+    event_recorder_file,
+    event_recorder_max_mb,
+)
+from .metrics import metrics
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# the signature and its timestamp are left out, a replayer signs the request again
+RECORDED_HEADERS = {"content-type", "x-slack-retry-num", "x-slack-retry-reason"}
+# the keys that route an event, which are kept. Every other string is redacted, so that message
+# contents such as links, file names, and attachments never reach the log.
+ROUTING_KEYS = {
+    "type",
+    "subtype",
+    "channel",
+    "channel_type",
+    "user",
+    "team",
+    "ts",
+    "id",
+    "authed_users",
+}
+# keys with these suffixes are IDs and timestamps, such as `team_id` and `thread_ts`
+ROUTING_KEY_SUFFIXES = ("_id", "_ts")
+MENTION_PATTERN = re.compile(r"(<[@#!][^>]*>)")
+WORD_PATTERN = re.compile(r"\w")
+
+
+@define
+class RecordedEvent:
+    """
+    A Slack request, as it was recorded.
+
+    Attributes:
+        arrival: When the request arrived, as a Unix timestamp.
+        headers: The recorded headers of the request.
+        body: The redacted body of the request.
+    """
+
+    arrival: float = field(kw_only=True)
+    headers: dict[str, str] = field(kw_only=True)
+    body: dict = field(kw_only=True)
+
+
+@define
+class EventRecorder:
+    """
+    Appends redacted Slack requests to a log, one compact JSON line each, so that the same
+    traffic can be replayed later. Every string other than the IDs, timestamps, and types that route
+    an event is replaced with text of the same shape, where every word character becomes an `x` but
+    mentions, whitespace, and punctuation are kept.
+    Only Events API requests are recorded. Interactivity payloads are form encoded, and are skipped.
+
+    Attributes:
+        path: The file to append to.
+        max_bytes: Recording stops once the file is this large.
+    """
+
+    path: str = field(kw_only=True)
+    max_bytes: int = field(default=100 * 1024 * 1024, kw_only=True)
+
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def record(self, body: str, headers: dict, *, arrival: float) -> None:
+        try:
+            parsed = json.loads(body)
+        except ValueError:
+            metrics.increment("event_recorder.skipped")
+            return
+        line = json.dumps(
+            {
+                "t": arrival,
+                "h": _recorded_headers(headers),
+                "b": redact(parsed),
+            },
+            separators=(",", ":"),
+        )
+        with self._lock:
+            try:
+                if _file_size(self.path) >= self.max_bytes:
+                    metrics.increment("event_recorder.full")
+                    return
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                logger.exception("Error while recording event")
+                return
+        metrics.increment("event_recorder.recorded")
+
+
+def read_event_log(path: str) -> Iterator[RecordedEvent]:
+    """Reads the events in a log, which can be gzipped."""
+    with (
+        gzip.open(path, "rt", encoding="utf-8")
+        if path.endswith(".gz")
+        else open(path, encoding="utf-8")
+    ) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield RecordedEvent(
+                    arrival=record["t"], headers=record["h"], body=record["b"]
+                )
+
+
+def redact(value: Any, key: Optional[str] = None) -> Any:
+    """Redacts every string in a request body, apart from the ones that route the event."""
+    if isinstance(value, dict):
+        return {k: redact(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v, key) for v in value]
+    if isinstance(value, str) and not _is_routing_key(key):
+        return _redact_text(value)
+    return value
+
+
+def _is_routing_key(key: Optional[str]) -> bool:
+    return key is not None and (
+        key in ROUTING_KEYS or key.endswith(ROUTING_KEY_SUFFIXES)
+    )
+
+
+def _redact_text(text: str) -> str:
+    # split keeps the mentions at the odd indexes
+    return "".join(
+        part if i % 2 else WORD_PATTERN.sub("x", part)
+        for i, part in enumerate(MENTION_PATTERN.split(text))
+    )
+
+
+def _recorded_headers(headers: dict) -> dict[str, str]:
+    recorded = {}
+    for name, value in headers.items():
+        if name.lower() in RECORDED_HEADERS:
+            recorded[name.lower()] = value[0] if isinstance(value, list) else value
+    return recorded
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+event_recorder = (
+    EventRecorder(
+        path=event_recorder_file(), max_bytes=event_recorder_max_mb() * 1024 * 1024
+    )
+    if event_recorder_enabled()
+    else None
+)
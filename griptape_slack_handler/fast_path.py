@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from .event_recorder import event_recorder
+from .features import fast_path_enabled, shadow_user_enabled, thread_history_enabled
+from .metrics import metrics
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# message subtypes that never get a response or get added to a thread
+IGNORED_SUBTYPES = {"bot_message", "message_changed", "message_deleted"}
+# how old a request can be before its signature is no longer accepted, like Bolt
+MAX_REQUEST_AGE = 60 * 5
+
+
+def handle_slack_event(body: str, headers: dict) -> dict:
+    """
+    Handles a Slack request. Events that won't produce any work are answered right away,
+    everything else is dispatched to Slack Bolt, which is loaded on first use.
+    """
+    if event_recorder is not None:
+        event_recorder.record(body, headers, arrival=time.time())
+    if fast_path_enabled() and is_ignorable(body, headers):
+        logger.debug("Ignoring an event that won't produce any work")
+        metrics.increment("fast_path.ignored")
+        return {
+            "status": 200,
+            "body": "",
+            "headers": {"content-type": ["text/plain;charset=utf-8"]},
+        }
+
+    from .slack_handler import handle_slack_event as dispatch
+
+    return dispatch(body, headers)
+
+
+def is_ignorable(body: str, headers: dict) -> bool:
+    """
+    Whether the request is a signed Events API message event that the message handler would do
+    nothing with: an edit, deletion, or bot message, the bot's own message, or a channel message
+    that doesn't mention the shadow user while thread history is disabled. Anything else, including
+    requests that can't be verified, is left for Slack Bolt.
+    """
+    if not body.startswith("{") or not _is_signed(body, headers):
+        return False
+    try:
+        event_body = json.loads(body)
+    except ValueError:
+        return False
+    if not isinstance(event_body, dict) or event_body.get("type") != "event_callback":
+        return False
+
+    event = event_body.get("event")
+    if not isinstance(event, dict) or event.get("type") != "message":
+        return False
+    if event.get("subtype") in IGNORED_SUBTYPES:
+        return True
+    if (
+        "SLACK_BOT_USER_ID" in os.environ
+        and event.get("user") == os.environ["SLACK_BOT_USER_ID"]
+    ):
+        return True
+    if event.get("channel_type") == "im":
+        return False
+
+    shadow_user_id = os.environ.get("SHADOW_USER_ID")
+    mentions_shadow_user = (
+        shadow_user_enabled()
+        and shadow_user_id is not None
+        and shadow_user_id in event.get("text", "")
+    )
+    return not mentions_shadow_user and not thread_history_enabled()
+
+
+def _is_signed(body: str, headers: dict) -> bool:
+    signing_secret = os.environ.get("SLACK_SIGNING_SECRET")
+    timestamp = _header(headers, "x-slack-request-timestamp")
+    signature = _header(headers, "x-slack-signature")
+    if not signing_secret or timestamp is None or signature is None:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > MAX_REQUEST_AGE:
+            return False
+    except ValueError:
+        return False
+
+    expected = hmac.new(
+        signing_secret.encode("utf-8"),
+        f"v0:{timestamp}:{body}".encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(f"v0={expected}", signature)
+
+
+def _header(headers: dict, name: str) -> Optional[str]:
+    # headers may have any case, and Bolt style headers are lists of values
+    for key, value in headers.items():
+        if key.lower() == name:
+            if isinstance(value, (list, tuple)):
+                return value[0] if value else None
+            return value
+    return None
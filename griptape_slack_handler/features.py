@@ -1,4 +1,8 @@
 import os
+import tempfile
+from typing import TypeVar
+
+T = TypeVar("T", int, float, str)
 
 
 def shadow_user_enabled() -> bool:
@@ -51,9 +55,516 @@ def thread_history_enabled() -> bool:
     return get_feature("THREAD_HISTORY", True)
 
 
+def shadow_pre_gate_enabled() -> bool:
+    """
+    Whether shadow mentions are screened by a local classifier before running the Agent. Defaults to False.
+    """
+    return get_feature("SHADOW_PRE_GATE", False)
+
+
+def shadow_pre_gate_threshold() -> float:
+    """
+    The minimum pre-gate score a shadow mention needs for the Agent to run. Defaults to 0.4.
+    """
+    return get_setting("FEATURE_SHADOW_PRE_GATE_THRESHOLD", 0.4)
+
+
+def shadow_pre_gate_context_messages() -> int:
+    """
+    How many recent thread messages the shadow pre-gate looks at. Defaults to 5.
+    """
+    return get_setting("FEATURE_SHADOW_PRE_GATE_CONTEXT_MESSAGES", 5)
+
+
+def shadow_early_abort_enabled() -> bool:
+    """
+    Whether shadow runs are streamed internally and aborted as soon as the answer is clearly not useful. Defaults to True.
+    """
+    return get_feature("SHADOW_EARLY_ABORT", True)
+
+
+def response_cache_enabled() -> bool:
+    """
+    Whether responses can be cached. Caching still has to be opted into per channel by setting
+    `"response_cache": "true"` in the metadata of the channel's own Ruleset. Defaults to True.
+    """
+    return get_feature("RESPONSE_CACHE", True)
+
+
+def response_cache_ttl() -> float:
+    """
+    How many seconds a cached response is served for. Defaults to 3600.
+    """
+    return get_setting("RESPONSE_CACHE_TTL", 3600.0)
+
+
+def response_cache_fuzzy_enabled() -> bool:
+    """
+    Whether messages that are close to a cached one, rather than the same once normalized, are served its response. Defaults to False.
+    """
+    return get_feature("RESPONSE_CACHE_FUZZY", False)
+
+
+def response_cache_similarity() -> float:
+    """
+    How similar a message has to be to a cached one to be served its response when fuzzy matching is enabled, from 0 to 1. Defaults to 0.85.
+    """
+    return get_setting("RESPONSE_CACHE_SIMILARITY", 0.85)
+
+
+def github_cache_ttl() -> float:
+    """
+    How many seconds GitHub repositories and pull requests are used before they are revalidated. Defaults to 60.
+    """
+    return get_setting("GITHUB_CACHE_TTL", 60.0)
+
+
+def github_pool_size() -> int:
+    """
+    How many keep-alive connections the shared GitHub client keeps open. Defaults to 10.
+    """
+    return get_setting("GITHUB_POOL_SIZE", 10)
+
+
+def github_content_cache_dir() -> str:
+    """
+    The directory GitHub file contents are cached in. Defaults to a directory in the system temp directory.
+    """
+    return get_setting(
+        "GITHUB_CONTENT_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "griptape_slack_handler", "github"),
+    )
+
+
+def github_content_cache_max_mb() -> int:
+    """
+    The maximum size of the GitHub file contents cache, in megabytes. Defaults to 256.
+    """
+    return get_setting("GITHUB_CONTENT_CACHE_MAX_MB", 256)
+
+
+def github_pull_request_max_bytes() -> int:
+    """
+    The maximum total size of the patches read from a pull request. Defaults to 200000.
+    """
+    return get_setting("GITHUB_PULL_REQUEST_MAX_BYTES", 200_000)
+
+
+def github_pull_request_max_tokens() -> int:
+    """
+    The maximum total number of tokens in the patches read from a pull request. Defaults to 30000.
+    """
+    return get_setting("GITHUB_PULL_REQUEST_MAX_TOKENS", 30_000)
+
+
+def web_cache_enabled() -> bool:
+    """
+    Whether scraped web pages and web search results are cached. Defaults to True.
+    """
+    return get_feature("WEB_CACHE", True)
+
+
+def web_cache_dir() -> str:
+    """
+    The directory scraped web pages and web search results are cached in. Defaults to a directory in the system temp directory.
+    """
+    return get_setting(
+        "WEB_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "griptape_slack_handler", "web"),
+    )
+
+
+def web_cache_max_mb() -> int:
+    """
+    The maximum size of the web cache, in megabytes. Defaults to 256.
+    """
+    return get_setting("WEB_CACHE_MAX_MB", 256)
+
+
+def web_page_cache_ttl() -> float:
+    """
+    How many seconds a scraped web page is used before it is revalidated. Defaults to 3600.
+    """
+    return get_setting("WEB_PAGE_CACHE_TTL", 3600.0)
+
+
+def web_search_cache_ttl() -> float:
+    """
+    How many seconds web search results are used for. Defaults to 600.
+    """
+    return get_setting("WEB_SEARCH_CACHE_TTL", 600.0)
+
+
+def web_extraction_workers() -> int:
+    """
+    How many processes extract text from scraped web pages. 0 extracts on the calling thread. Defaults to 2.
+    """
+    return get_setting("WEB_EXTRACTION_WORKERS", 2)
+
+
+def tool_output_governor_enabled() -> bool:
+    """
+    Whether large tool outputs are summarized to keep them within a token budget. Defaults to True.
+    """
+    return get_feature("TOOL_OUTPUT_GOVERNOR", True)
+
+
+def tool_output_max_tokens() -> int:
+    """
+    The maximum number of tokens in a single tool output. Defaults to 4000.
+    """
+    return get_setting("TOOL_OUTPUT_MAX_TOKENS", 4000)
+
+
+def tool_output_run_max_tokens() -> int:
+    """
+    The maximum number of tokens in all tool outputs of a single response. Defaults to 16000.
+    """
+    return get_setting("TOOL_OUTPUT_RUN_MAX_TOKENS", 16000)
+
+
+def tracing_enabled() -> bool:
+    """
+    Whether the time spent in each step of a response is traced and exported as OpenTelemetry spans. Defaults to False.
+    """
+    return get_feature("TRACING", False)
+
+
+def tracing_file() -> str:
+    """
+    The file traces are appended to as OTLP JSON. Defaults to a file in the system temp directory.
+    """
+    return get_setting(
+        "TRACING_FILE",
+        os.path.join(tempfile.gettempdir(), "griptape_slack_handler", "traces.jsonl"),
+    )
+
+
+def tracing_otlp_endpoint() -> str:
+    """
+    An OTLP/HTTP endpoint traces are also sent to, such as http://localhost:4318. Defaults to none.
+    """
+    return get_setting("TRACING_OTLP_ENDPOINT", "")
+
+
+def profiling_enabled() -> bool:
+    """
+    Whether a sample of requests, and every slow request, are profiled. Defaults to False.
+    """
+    return get_feature("PROFILING", False)
+
+
+def profiling_dir() -> str:
+    """
+    The directory profiles are written to. Defaults to a directory in the system temp directory.
+    """
+    return get_setting(
+        "PROFILING_DIR",
+        os.path.join(tempfile.gettempdir(), "griptape_slack_handler", "profiles"),
+    )
+
+
+def profiling_sample_rate() -> float:
+    """
+    The fraction of requests that are profiled from the start, between 0 and 1. Defaults to 0.01.
+    """
+    return get_setting("PROFILING_SAMPLE_RATE", 0.01)
+
+
+def profiling_slow_ms() -> float:
+    """
+    Requests running for longer than this many milliseconds are profiled. Defaults to 5000.
+    """
+    return get_setting("PROFILING_SLOW_MS", 5000.0)
+
+
+def profiling_interval_ms() -> float:
+    """
+    How many milliseconds between the samples of a profile. Defaults to 10.
+    """
+    return get_setting("PROFILING_INTERVAL_MS", 10.0)
+
+
+def profiling_max_profiles() -> int:
+    """
+    How many profiles are kept on disk, the oldest are removed first. Defaults to 100.
+    """
+    return get_setting("PROFILING_MAX_PROFILES", 100)
+
+
+def event_recorder_enabled() -> bool:
+    """
+    Whether redacted Slack requests are recorded to a log, so that they can be replayed with bench/replay.py. Defaults to False.
+    """
+    return get_feature("EVENT_RECORDER", False)
+
+
+def event_recorder_file() -> str:
+    """
+    The file Slack requests are recorded to. Defaults to a file in the system temp directory.
+    """
+    return get_setting(
+        "EVENT_RECORDER_FILE",
+        os.path.join(tempfile.gettempdir(), "griptape_slack_handler", "events.jsonl"),
+    )
+
+
+def event_recorder_max_mb() -> int:
+    """
+    Recording stops once the recorded requests are this many megabytes. Defaults to 100.
+    """
+    return get_setting("EVENT_RECORDER_MAX_MB", 100)
+
+
+def prefix_stable_prompt_enabled() -> bool:
+    """
+    Whether the system prompt is laid out from its most to its least stable content, so that providers
+    can serve the shared prefix from their prompt cache. Defaults to True.
+    """
+    return get_feature("PREFIX_STABLE_PROMPT", True)
+
+
+def prefetch_enabled() -> bool:
+    """
+    Whether the rulesets, conversation memory, and tools of a response are loaded in parallel
+    as soon as the event arrives. Defaults to True.
+    """
+    return get_feature("PREFETCH", True)
+
+
+def prefetch_workers() -> int:
+    """
+    How many threads load rulesets, conversation memory, and tools ahead of responses. Defaults to 16.
+    """
+    return get_setting("PREFETCH_WORKERS", 16)
+
+
+def side_effect_workers() -> int:
+    """
+    How many threads make cosmetic Slack calls, such as setting the typing status and reacting to messages,
+    in the background. 0 makes them on the request thread. Defaults to 4.
+    """
+    return get_setting("SIDE_EFFECT_WORKERS", 4)
+
+
+def side_effect_settle_timeout() -> float:
+    """
+    How many seconds a response waits for a typing status being set in its thread before posting,
+    so that the status doesn't show up after the response. Defaults to 0.5.
+    """
+    return get_setting("SIDE_EFFECT_SETTLE_TIMEOUT", 0.5)
+
+
+def http_pool_size() -> int:
+    """
+    How many keep-alive connections are kept per host for calls to Slack, Griptape Cloud, and other HTTP APIs.
+    Defaults to 32.
+    """
+    return get_setting("HTTP_POOL_SIZE", 32)
+
+
+def http_timeout() -> float:
+    """
+    How many seconds HTTP calls that don't set their own timeout wait for a connection or a response.
+    Defaults to 30.
+    """
+    return get_setting("HTTP_TIMEOUT", 30.0)
+
+
+def http_retries() -> int:
+    """
+    How many times HTTP calls are retried after a connection error, or a 502, 503, or 504 response to an
+    idempotent request. Defaults to 3.
+    """
+    return get_setting("HTTP_RETRIES", 3)
+
+
+def fast_path_enabled() -> bool:
+    """
+    Whether events that won't produce any work, such as edits, deletions, and bot messages, are answered
+    before Slack Bolt and Griptape are loaded. Defaults to True.
+    """
+    return get_feature("FAST_PATH", True)
+
+
+def model_routing_enabled() -> bool:
+    """
+    Whether short, simple messages are answered by a small, fast model, and everything else by the
+    default model. Defaults to False.
+    """
+    return get_feature("MODEL_ROUTING", False)
+
+
+def model_routing_small_model() -> str:
+    """
+    The model, or Azure OpenAI deployment, that simple messages are routed to. Defaults to gpt-4o-mini.
+    """
+    return get_setting("MODEL_ROUTING_SMALL_MODEL", "gpt-4o-mini")
+
+
+def model_routing_max_small_words() -> int:
+    """
+    The most words a message can have and still be routed to the small model. Defaults to 25.
+    """
+    return get_setting("MODEL_ROUTING_MAX_SMALL_WORDS", 25)
+
+
+def model_routing_max_small_context_tokens() -> int:
+    """
+    The most tokens the conversation so far can have for a message to be routed to the small model.
+    Defaults to 2000.
+    """
+    return get_setting("MODEL_ROUTING_MAX_SMALL_CONTEXT_TOKENS", 2000)
+
+
+def llm_governor_enabled() -> bool:
+    """
+    Whether LLM calls are admitted against token and request budgets, and queue fairly across Slack threads
+    once the budgets run out, rather than failing with rate limit errors. Defaults to False.
+    """
+    return get_feature("LLM_GOVERNOR", False)
+
+
+def llm_tokens_per_minute() -> int:
+    """
+    How many tokens a minute LLM calls may use, 0 for no limit. Defaults to 30000.
+    """
+    return get_setting("LLM_TOKENS_PER_MINUTE", 30000)
+
+
+def llm_requests_per_minute() -> int:
+    """
+    How many LLM calls may be made a minute, 0 for no limit. Defaults to 500.
+    """
+    return get_setting("LLM_REQUESTS_PER_MINUTE", 500)
+
+
+def llm_max_concurrency() -> int:
+    """
+    How many LLM calls a process may make at the same time. Defaults to 8.
+    """
+    return get_setting("LLM_MAX_CONCURRENCY", 8)
+
+
+def llm_governor_state_file() -> str:
+    """
+    A file that every process on the host keeps the token and request budgets in, so that they share them.
+    Defaults to none, each process has budgets of its own.
+    """
+    return get_setting("LLM_GOVERNOR_STATE_FILE", "")
+
+
+def event_scheduler_enabled() -> bool:
+    """
+    Whether answers to direct messages and mentions are worked on before shadow responses, and shadow responses
+    before passive thread history writes, and low priority work is shed when the bot is overloaded. Defaults to False.
+    """
+    return get_feature("EVENT_SCHEDULER", False)
+
+
+def scheduler_max_active() -> int:
+    """
+    How many events are worked on at the same time, the rest wait their turn by priority. Defaults to 16.
+    """
+    return get_setting("SCHEDULER_MAX_ACTIVE", 16)
+
+
+def scheduler_answer_queue() -> int:
+    """
+    How many direct messages and mentions may wait their turn, more are answered with a busy message. Defaults to 100.
+    """
+    return get_setting("SCHEDULER_ANSWER_QUEUE", 100)
+
+
+def scheduler_shadow_queue() -> int:
+    """
+    How many shadow responses may wait their turn, more are skipped. Defaults to 2.
+    """
+    return get_setting("SCHEDULER_SHADOW_QUEUE", 2)
+
+
+def scheduler_max_deferred_writes() -> int:
+    """
+    How many passive thread history writes may be deferred until the bot is idle, more are dropped. Defaults to 1000.
+    """
+    return get_setting("SCHEDULER_MAX_DEFERRED_WRITES", 1000)
+
+
+def dispatcher_workers() -> int:
+    """
+    How many worker processes the dispatcher runs. Defaults to 4.
+    """
+    return get_setting("DISPATCHER_WORKERS", 4)
+
+
+def dispatcher_worker_threads() -> int:
+    """
+    How many events each of the dispatcher's workers handles at the same time. Defaults to 8.
+    """
+    return get_setting("DISPATCHER_WORKER_THREADS", 8)
+
+
+def shared_cache_enabled() -> bool:
+    """
+    Whether rulesets, tool schemas, conversations, and GitHub refs are cached in a file shared by every worker process. Defaults to False.
+    """
+    return get_feature("SHARED_CACHE", False)
+
+
+def shared_cache_file() -> str:
+    """
+    The SQLite file the shared cache is kept in. Defaults to a file in the system temp directory.
+    """
+    return get_setting(
+        "SHARED_CACHE_FILE",
+        os.path.join(tempfile.gettempdir(), "griptape_slack_handler", "cache.sqlite3"),
+    )
+
+
+def shared_cache_max_mb() -> int:
+    """
+    The maximum size of the shared cache, in megabytes. Defaults to 256.
+    """
+    return get_setting("SHARED_CACHE_MAX_MB", 256)
+
+
+def ruleset_cache_ttl() -> float:
+    """
+    How many seconds rulesets loaded from Griptape Cloud are cached for. Defaults to 60.
+    """
+    return get_setting("RULESET_CACHE_TTL", 60.0)
+
+
+def cloud_tool_cache_ttl() -> float:
+    """
+    How many seconds Griptape Cloud tool descriptions and schemas are cached for. Defaults to 3600.
+    """
+    return get_setting("CLOUD_TOOL_CACHE_TTL", 3600.0)
+
+
+def conversation_cache_ttl() -> float:
+    """
+    How many seconds Griptape Cloud threads are cached for after they are loaded or stored. Defaults to 600.
+    """
+    return get_setting("CONVERSATION_CACHE_TTL", 600.0)
+
+
 def get_feature(feature: str, default: bool) -> bool:
     """
     Gets a feature from the environment.
     """
     default_str = "true" if default else "false"
     return os.getenv(f"FEATURE_{feature}", default_str).lower() == "true"
+
+
+def get_setting(setting: str, default: T) -> T:
+    """
+    Gets a setting from the environment, cast to the type of the default.
+    """
+    value = os.getenv(setting)
+    if value is None or value == "":
+        return default
+    try:
+        return type(default)(value)
+    except ValueError:
+        return default
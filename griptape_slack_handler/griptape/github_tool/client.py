@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TypeVar
+
+from attrs import Factory, define, field
+from github import Auth, Github, GithubRetry
+
+from ...cache import TtlCache
+from ...features import (
+    github_cache_ttl,
+    github_content_cache_dir,
+    github_content_cache_max_mb,
+    github_pool_size,
+)
+from ...metrics import metrics
+from ...shared_cache import TieredCache, shared_tier
+from .content_cache import GitHubContentCache
+
+if TYPE_CHECKING:
+    from github.GithubObject import CompletableGithubObject
+
+logger = logging.getLogger("griptape_slack_handler")
+
+T = TypeVar("T", bound="CompletableGithubObject")
+
+_client: Optional[Github] = None
+_client_lock = threading.Lock()
+
+
+@define
+class GitHubUsage:
+    """
+    The GitHub requests made by an activity, counted as they are made.
+
+    Attributes:
+        api_calls: How many requests counted against the rate limit.
+        not_modified: How many requests were answered with a 304.
+    """
+
+    api_calls: int = field(default=0, init=False)
+    not_modified: int = field(default=0, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def record(self, status: int) -> None:
+        with self._lock:
+            if status == 304:
+                self.not_modified += 1
+            else:
+                self.api_calls += 1
+
+
+# the usage of the activity that is running, activities on other threads count their own
+_usage: ContextVar[Optional[GitHubUsage]] = ContextVar("github_usage", default=None)
+
+
+class CountingRetry(GithubRetry):
+    """
+    PyGithub's default retries, which also count every response towards the usage of the
+    activity making the request. urllib3 asks the retries whether to retry each response,
+    including those that are retried, which count against the rate limit too.
+    """
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        usage = _usage.get()
+        if usage is not None:
+            usage.record(status_code)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def shared_client() -> Github:
+    """
+    Gets the process-wide GitHub client. PyGithub keeps a pooled session per client,
+    so sharing it lets every request reuse the same keep-alive connections.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Github(
+                auth=Auth.Token(os.environ["GITHUB_PAT"]),
+                pool_size=github_pool_size(),
+                per_page=100,
+                retry=CountingRetry(),
+            )
+        return _client
+
+
+@define
+class GitHubObjectCache:
+    """
+    Caches PyGithub objects, such as Repositories and Pull Requests.
+    Fresh objects are reused as is. Expired objects are revalidated with a conditional request
+    (If-None-Match/If-Modified-Since), which GitHub does not count against the rate limit when
+    nothing has changed.
+
+    Attributes:
+        ttl: How many seconds an object is used without revalidating it.
+        max_size: The maximum number of objects to keep.
+    """
+
+    ttl: float = field(default=60, kw_only=True)
+    max_size: int = field(default=256, kw_only=True)
+
+    _objects: TtlCache = field(
+        default=Factory(
+            lambda self: TtlCache(max_size=self.max_size, ttl=self.ttl),
+            takes_self=True,
+        ),
+        init=False,
+    )
+
+    def get(self, key: str, fetch: Callable[[], T]) -> T:
+        """Gets the cached object for the key, fetching it if it is not cached."""
+        entry = self._objects.peek(key)
+        if entry is None:
+            metrics.increment("github.cache.misses")
+            obj = fetch()
+            self._objects.set(key, obj)
+            return obj
+
+        obj, fresh = entry
+        if fresh:
+            metrics.increment("github.cache.hits")
+        elif obj.update():
+            metrics.increment("github.cache.modified")
+            self._objects.touch(key)
+        else:
+            metrics.increment("github.cache.not_modified")
+            self._objects.touch(key)
+        return obj
+
+
+object_cache = GitHubObjectCache(ttl=github_cache_ttl())
+# refs such as branches move, so they are only resolved to commit SHAs for as long as objects are cached
+ref_cache: TieredCache[str] = TieredCache(
+    name="github.ref_cache", ttl=github_cache_ttl(), shared=shared_tier()
+)
+content_cache = GitHubContentCache(
+    directory=github_content_cache_dir(),
+    max_bytes=github_content_cache_max_mb() * 1024 * 1024,
+)
+
+
+@contextmanager
+def track_usage(client: Github, activity: str) -> Iterator[None]:
+    """
+    Reports how many rate limited API calls an activity made, how many of its requests were
+    answered with a 304, and how much of the rate limit is left afterwards. Requests are counted
+    as they are made on the activity's context, so activities running at the same time on the
+    shared client aren't counted in each other's totals.
+    """
+    usage = GitHubUsage()
+    token = _usage.set(usage)
+    try:
+        yield
+    finally:
+        _usage.reset(token)
+        remaining, limit = _rate_limiting(client)
+        api_calls, not_modified = usage.api_calls, usage.not_modified
+        metrics.increment(f"github.{activity}.api_calls", api_calls)
+        metrics.increment(f"github.{activity}.not_modified", not_modified)
+        metrics.observe("github.rate_limit_remaining", remaining)
+        logger.info(
+            f"GitHub {activity}: {api_calls} rate limited API calls, {not_modified} not modified, "
+            f"{remaining}/{limit} remaining"
+        )
+
+
+def _rate_limiting(client: Github) -> tuple[int, int]:
+    try:
+        return client.rate_limiting
+    except Exception:
+        logger.exception("Error while getting the GitHub rate limit")
+        return -1, -1
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Callable, Union
+
+from attrs import Factory, define, field
+
+from ...disk_cache import DiskCache
+from ...shared_cache import TieredCache
+
+SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+# what cached entries on disk start with, depending on how they are encoded
+TEXT = b"t"
+JSON = b"j"
+
+# the contents of a file, the entries of a directory, or the tree of a commit
+Contents = Union[str, list[dict], dict]
+
+
+@define
+class GitHubContentCache:
+    """
+    Caches GitHub file contents and directory listings, keyed by commit SHA, in memory in front of
+    a cache on disk that every process shares. Contents at a commit never change, so entries are
+    never invalidated, only evicted when the cache grows past its size limit.
+
+    Attributes:
+        directory: The directory to store the cache in.
+        max_bytes: The maximum total size of the cached entries on disk.
+        max_entries: The maximum number of entries kept in memory.
+    """
+
+    directory: str = field(kw_only=True)
+    max_bytes: int = field(default=256 * 1024 * 1024, kw_only=True)
+    max_entries: int = field(default=256, kw_only=True)
+
+    _entries: TieredCache[Contents] = field(
+        default=Factory(
+            lambda self: TieredCache(
+                name="github.content_cache",
+                ttl=None,
+                max_size=self.max_entries,
+                shared=DiskCache(
+                    directory=self.directory,
+                    name="github.content_cache",
+                    max_bytes=self.max_bytes,
+                ),
+                dumps=_dumps,
+                loads=_loads,
+            ),
+            takes_self=True,
+        ),
+        init=False,
+    )
+
+    def get_or_fill(
+        self,
+        owner: str,
+        repo: str,
+        sha: str,
+        path: str,
+        fill: Callable[[], str | list[dict]],
+    ) -> str | list[dict]:
+        """Gets the contents of a file, or the entries of a directory, at a commit, filling them if they are not cached."""
+        return self._entries.get_or_fill(_key("path", owner, repo, sha, path), fill)
+
+    def get_or_fill_tree(
+        self, owner: str, repo: str, sha: str, fill: Callable[[], dict]
+    ) -> dict:
+        """Gets the recursive tree of a commit, filling it if it is not cached."""
+        return self._entries.get_or_fill(_key("tree", owner, repo, sha, ""), fill)
+
+
+def is_commit_sha(ref: str) -> bool:
+    """Whether the ref is already a full commit SHA."""
+    return SHA_PATTERN.match(ref) is not None
+
+
+def _dumps(contents: Contents) -> bytes:
+    # file contents are kept as plain text, so they aren't escaped into a JSON string
+    if isinstance(contents, str):
+        return TEXT + contents.encode("utf-8")
+    return JSON + json.dumps(contents).encode("utf-8")
+
+
+def _loads(data: bytes) -> Contents:
+    if data[:1] == TEXT:
+        return data[1:].decode("utf-8")
+    return json.loads(data[1:])
+
+
+def _key(kind: str, owner: str, repo: str, sha: str, path: str) -> str:
+    return f"{kind}:{owner.lower()}/{repo.lower()}@{sha}:{path.strip('/')}"
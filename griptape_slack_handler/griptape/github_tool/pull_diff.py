@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from collections import deque
+from concurrent import futures
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from attrs import define, field
+from griptape.utils import with_contextvars
+
+from ...metrics import metrics
+from ...profiler import profiled
+
+if TYPE_CHECKING:
+    from github.File import File
+    from github.PullRequest import PullRequest
+
+logger = logging.getLogger("griptape_slack_handler")
+
+MAX_LISTED_FILES = 50
+LOCKFILES = {
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "bun.lockb",
+    "poetry.lock",
+    "pipfile.lock",
+    "uv.lock",
+    "pdm.lock",
+    "cargo.lock",
+    "gemfile.lock",
+    "composer.lock",
+    "go.sum",
+    "mix.lock",
+    "podfile.lock",
+    "packages.lock.json",
+}
+GENERATED_PATTERN = re.compile(
+    r"(?:^|/)(?:dist|build|vendor|node_modules|__snapshots__|generated)/"
+    r"|\.min\.(?:js|css)$"
+    r"|\.(?:map|snap|svg)$"
+    r"|_pb2(?:_grpc)?\.pyi?$"
+    r"|\.pb\.go$"
+    r"|\.generated\.\w+$"
+)
+
+
+@define
+class PullRequestPatches:
+    """
+    The patches of a pull request that fit in the budget, and what was left out.
+
+    Attributes:
+        patches: The filename and patch of each included file, in pull request order.
+        summarized: Files that are summarized instead of included, such as lockfiles and binaries.
+        omitted: Files whose patches did not fit in the budget.
+        unfetched: How many changed files were not read because the budget was already spent.
+    """
+
+    patches: list[tuple[str, str]] = field(factory=list)
+    summarized: list[str] = field(factory=list)
+    omitted: list[str] = field(factory=list)
+    unfetched: int = field(default=0)
+
+    def left_out(self) -> Optional[str]:
+        """Describes what was left out of the patches, if anything."""
+        lines = []
+        if self.summarized:
+            lines.append(
+                "Summarized without patches (lockfiles, generated files, and binaries):"
+            )
+            lines.extend(_listed(self.summarized))
+        if self.omitted:
+            lines.append("Left out because the diff is too large:")
+            lines.extend(_listed(self.omitted))
+        if self.unfetched:
+            lines.append(
+                f"{self.unfetched} more changed files were not read because the budget was spent."
+            )
+        return "\n".join(lines) if lines else None
+
+
+@define(kw_only=True)
+class PullRequestPatchCollector:
+    """
+    Collects the patches of a pull request within a byte and token budget.
+    Pages of files are fetched concurrently but consumed in order, with only a few pages in memory
+    at once, and fetching stops once the budget is spent.
+
+    Attributes:
+        max_bytes: The maximum total size of the included patches.
+        max_tokens: The maximum total number of tokens in the included patches.
+        max_file_bytes: Patches larger than this are truncated.
+        count_tokens: Counts the tokens in a patch.
+        workers: How many pages to fetch at once.
+    """
+
+    max_bytes: int = field(default=200_000)
+    max_tokens: int = field(default=30_000)
+    max_file_bytes: int = field(default=20_000)
+    count_tokens: Callable[[str], int] = field(default=lambda text: len(text) // 4)
+    workers: int = field(default=4)
+
+    def collect(
+        self, pull_request: PullRequest, *, per_page: int
+    ) -> PullRequestPatches:
+        """Collects the patches of the pull request."""
+        result = PullRequestPatches()
+        used_bytes, used_tokens = 0, 0
+        page_count = max(1, math.ceil(pull_request.changed_files / per_page))
+        pages = self._fetch_pages(pull_request, page_count)
+        fetched = 0
+
+        for page in pages:
+            fetched += len(page)
+            for file in page:
+                summary = _file_summary(file)
+                kind = _summarized_kind(file)
+                if kind is not None:
+                    result.summarized.append(f"{summary}: {kind}")
+                    continue
+
+                patch = _truncate(file.patch, self.max_file_bytes)
+                patch_bytes = len(patch.encode("utf-8"))
+                patch_tokens = self.count_tokens(patch)
+                if (
+                    used_bytes + patch_bytes > self.max_bytes
+                    or used_tokens + patch_tokens > self.max_tokens
+                ):
+                    result.omitted.append(summary)
+                    continue
+                used_bytes += patch_bytes
+                used_tokens += patch_tokens
+                result.patches.append((file.filename, patch))
+
+            # stop fetching once there is no room left for a typical patch
+            if (
+                used_bytes >= self.max_bytes * 0.95
+                or used_tokens >= self.max_tokens * 0.95
+            ):
+                pages.close()
+                break
+
+        result.unfetched = max(0, pull_request.changed_files - fetched)
+        metrics.observe("github.pull_request.patch_bytes", used_bytes)
+        metrics.observe("github.pull_request.patch_tokens", used_tokens)
+        logger.info(
+            f"Pull request patches: {len(result.patches)} included, {len(result.summarized)} summarized, "
+            f"{len(result.omitted)} omitted, {result.unfetched} not fetched, {used_bytes} bytes, {used_tokens} tokens"
+        )
+        return result
+
+    def _fetch_pages(
+        self, pull_request: PullRequest, page_count: int
+    ) -> Iterator[list[File]]:
+        files = pull_request.get_files()
+        with futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight: deque[futures.Future[list[File]]] = deque()
+            next_page = 0
+            try:
+                while next_page < page_count or in_flight:
+                    while next_page < page_count and len(in_flight) < self.workers:
+                        in_flight.append(
+                            executor.submit(
+                                with_contextvars(profiled(files.get_page)), next_page
+                            )
+                        )
+                        next_page += 1
+                    yield in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+
+def _listed(summaries: list[str]) -> list[str]:
+    lines = [f"- {summary}" for summary in summaries[:MAX_LISTED_FILES]]
+    if len(summaries) > MAX_LISTED_FILES:
+        lines.append(f"- and {len(summaries) - MAX_LISTED_FILES} more")
+    return lines
+
+
+def _summarized_kind(file: File) -> Optional[str]:
+    filename = file.filename.lower()
+    if filename.rsplit("/", 1)[-1] in LOCKFILES:
+        return "lockfile"
+    if GENERATED_PATTERN.search(filename):
+        return "generated file"
+    if file.status == "renamed" and not file.changes:
+        return "renamed without changes"
+    if not file.patch:
+        # GitHub leaves the patch out for binary files and very large diffs
+        return "binary or too large to diff"
+    return None
+
+
+def _file_summary(file: File) -> str:
+    return f"{file.filename} ({file.status}, +{file.additions} -{file.deletions})"
+
+
+def _truncate(patch: str, max_bytes: int) -> str:
+    if len(patch.encode("utf-8")) <= max_bytes:
+        return patch
+    truncated = patch.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+    truncated = truncated[: truncated.rfind("\n") + 1] or truncated
+    remaining = patch.count("\n") - truncated.count("\n")
+    return f"{truncated}... [truncated, {remaining} more lines]"
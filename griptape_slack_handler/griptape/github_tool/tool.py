@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import os
+from concurrent import futures
 from typing import List, Optional as OptionalType
 
 from schema import Schema, Literal, Optional
@@ -11,9 +11,37 @@ from griptape.artifacts import (
     ListArtifact,
     InfoArtifact,
 )
+from griptape.configs import Defaults
+from griptape.utils import with_contextvars
 from griptape.utils.decorators import activity
 from griptape.tools import BaseTool
-from github import Auth, Github, ContentFile
+from github import Github, ContentFile
+from github.PullRequest import PullRequest
+from github.Repository import Repository
+
+from .client import (
+    content_cache,
+    object_cache,
+    ref_cache,
+    shared_client,
+    track_usage,
+)
+from .content_cache import is_commit_sha
+from .pull_diff import PullRequestPatchCollector
+from ...profiler import profiled
+from ...features import (
+    github_pool_size,
+    github_pull_request_max_bytes,
+    github_pull_request_max_tokens,
+)
+
+
+def _truncate_text(text: str, max_bytes: int) -> str:
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    truncated = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    return f"{truncated}\n... [truncated, {len(encoded) - max_bytes} more bytes]"
 
 
 def _common_schema() -> dict:
@@ -38,6 +66,21 @@ class GitHubUserTool(BaseTool):
     client: Github = field(
         default=Factory(lambda self: self._get_client(), takes_self=True)
     )
+    max_tree_entries: int = field(default=2000, kw_only=True)
+    max_files: int = field(default=20, kw_only=True)
+    max_file_bytes: int = field(default=100_000, kw_only=True)
+    max_files_bytes: int = field(default=300_000, kw_only=True)
+    max_file_workers: int = field(default=8, kw_only=True)
+    patch_collector: PullRequestPatchCollector = field(
+        default=Factory(
+            lambda: PullRequestPatchCollector(
+                max_bytes=github_pull_request_max_bytes(),
+                max_tokens=github_pull_request_max_tokens(),
+                count_tokens=Defaults.drivers_config.prompt_driver.tokenizer.count_tokens,
+                workers=min(4, github_pool_size()),
+            )
+        )
+    )
 
     @activity(
         config={
@@ -63,27 +106,161 @@ class GitHubUserTool(BaseTool):
         self, path: str, repo: str, owner: str, ref: str = "main"
     ) -> ListArtifact | TextArtifact | ErrorArtifact:
         try:
-            contents: List[ContentFile.ContentFile] | ContentFile.ContentFile = (
-                self.client.get_repo(f"{owner}/{repo}").get_contents(path, ref=ref)
-            )
+            with track_usage(self.client, "get_repo_contents"):
+                sha = self._resolve_ref(owner, repo, ref)
+                entries = content_cache.get_or_fill(
+                    owner,
+                    repo,
+                    sha,
+                    path,
+                    lambda: self._fetch_contents(owner, repo, sha, path),
+                )
+                if isinstance(entries, str):
+                    return TextArtifact(entries)
 
-            if isinstance(contents, list):
-                artifacts = []
-                for content in contents:
-                    artifacts.append(
-                        self._convert_github_content_to_artifact(
-                            content, list_mode=False
+                return ListArtifact(
+                    [
+                        TextArtifact(entry["path"])
+                        if entry["type"] == "dir"
+                        else TextArtifact(
+                            self._get_file_text(owner, repo, sha, entry["path"])
                         )
-                    )
-                return ListArtifact(artifacts)
-            else:
-                return self._convert_github_content_to_artifact(
-                    contents, list_mode=False
+                        for entry in entries
+                    ]
                 )
 
         except Exception as e:
             return ErrorArtifact(f"error getting content: {e}")
 
+    @activity(
+        config={
+            "description": "Can be used to list every file and directory in the Github repository in one call. "
+            "Use this to explore a repository instead of getting the contents of each directory.",
+            "schema": Schema(
+                {
+                    **_common_schema(),
+                    Optional(
+                        Literal(
+                            "path",
+                            description="Only list entries under this directory. Default is the whole repository.",
+                        )
+                    ): str,
+                    Optional(
+                        Literal(
+                            "ref",
+                            description="The ref to use for the repository. Default is 'main'.",
+                        )
+                    ): str,
+                }
+            ),
+        }
+    )
+    def get_repo_tree(
+        self, repo: str, owner: str, path: str = "", ref: str = "main"
+    ) -> TextArtifact | ErrorArtifact:
+        try:
+            with track_usage(self.client, "get_repo_tree"):
+                sha = self._resolve_ref(owner, repo, ref)
+                tree = content_cache.get_or_fill_tree(
+                    owner, repo, sha, lambda: self._fetch_tree(owner, repo, sha)
+                )
+
+            prefix = f"{path.strip('/')}/" if path.strip("/") else ""
+            paths = [
+                f"{entry['path']}/" if entry["type"] == "tree" else entry["path"]
+                for entry in tree["entries"]
+                if entry["path"].startswith(prefix)
+            ]
+            lines = paths[: self.max_tree_entries]
+            if len(paths) > self.max_tree_entries:
+                lines.append(
+                    f"... and {len(paths) - self.max_tree_entries} more entries, list a subdirectory to see them"
+                )
+            if tree["truncated"]:
+                lines.append(
+                    "... the repository is too large for GitHub to list in full, list a subdirectory to see the rest"
+                )
+            return TextArtifact("\n".join(lines))
+        except Exception as e:
+            return ErrorArtifact(f"error getting tree: {e}")
+
+    @activity(
+        config={
+            "description": "Can be used to get the contents of several files in the Github repository at once. "
+            "Use this instead of getting the contents of each file separately.",
+            "schema": Schema(
+                {
+                    Literal(
+                        "paths",
+                        description="The paths of the files in the repository.",
+                    ): [str],
+                    **_common_schema(),
+                    Optional(
+                        Literal(
+                            "ref",
+                            description="The ref to use for the repository. Default is 'main'.",
+                        )
+                    ): str,
+                }
+            ),
+        }
+    )
+    def get_repo_files(
+        self, paths: list[str], repo: str, owner: str, ref: str = "main"
+    ) -> ListArtifact | ErrorArtifact:
+        try:
+            with track_usage(self.client, "get_repo_files"):
+                sha = self._resolve_ref(owner, repo, ref)
+                # warm the repository cache before the files are fetched concurrently
+                self._get_repo(owner, repo)
+                requested = list(dict.fromkeys(paths))[: self.max_files]
+                with futures.ThreadPoolExecutor(
+                    max_workers=min(len(requested), self.max_file_workers) or 1
+                ) as executor:
+                    # each call gets the activity's context, so its requests are counted
+                    fetches = [
+                        executor.submit(
+                            with_contextvars(profiled(self._try_get_file_text)),
+                            owner,
+                            repo,
+                            sha,
+                            path,
+                        )
+                        for path in requested
+                    ]
+                    artifacts = []
+                    remaining = self.max_files_bytes
+                    for path, text in zip(
+                        requested, (fetch.result() for fetch in fetches)
+                    ):
+                        if isinstance(text, Exception):
+                            artifacts.append(
+                                TextArtifact(
+                                    f"File: {path}\nerror getting content: {text}"
+                                )
+                            )
+                            continue
+                        if remaining <= 0:
+                            artifacts.append(
+                                TextArtifact(
+                                    f"File: {path}\nleft out because the files are too large, get it separately"
+                                )
+                            )
+                            continue
+                        text = _truncate_text(text, min(self.max_file_bytes, remaining))
+                        remaining -= len(text.encode("utf-8"))
+                        artifacts.append(TextArtifact(f"File: {path}\n{text}"))
+
+            if len(paths) > len(requested):
+                artifacts.append(
+                    TextArtifact(
+                        f"Only the first {self.max_files} files were fetched, get the rest in another call."
+                    )
+                )
+            return ListArtifact(artifacts)
+        except Exception as e:
+            return ErrorArtifact(f"error getting files: {e}")
+
     @activity(
         config={
             "description": "Can be used to comment on a pull request or issue in the Github repository.",
@@ -106,11 +283,12 @@ class GitHubUserTool(BaseTool):
         self, pull_request_or_issue_id: str, comment: str, repo: str, owner: str
     ) -> InfoArtifact | ErrorArtifact:
         try:
-            issue_comment = (
-                self.client.get_repo(f"{owner}/{repo}")
-                .get_issue(int(pull_request_or_issue_id))
-                .create_comment(comment)
-            )
+            with track_usage(self.client, "create_issue_comment"):
+                issue_comment = (
+                    self._get_repo(owner, repo)
+                    .get_issue(int(pull_request_or_issue_id))
+                    .create_comment(comment)
+                )
             return InfoArtifact(f"comment created: {issue_comment.html_url}")
         except Exception as e:
             return ErrorArtifact(f"error creating comment: {e}")
@@ -148,14 +326,13 @@ class GitHubUserTool(BaseTool):
         comment: OptionalType[str] = None,
     ) -> InfoArtifact | ErrorArtifact:
         try:
-            pull_request = self.client.get_repo(f"{owner}/{repo}").get_pull(
-                int(pull_request_id)
-            )
-            event = "APPROVE" if approve else "COMMENT"
-            if comment is not None:
-                pull_request.create_review(body=comment, event=event)
-            else:
-                pull_request.create_review(event=event)
+            with track_usage(self.client, "review_pull_request"):
+                pull_request = self._get_pull(owner, repo, int(pull_request_id))
+                event = "APPROVE" if approve else "COMMENT"
+                if comment is not None:
+                    pull_request.create_review(body=comment, event=event)
+                else:
+                    pull_request.create_review(event=event)
 
             return InfoArtifact("pull request approved")
         except Exception as e:
@@ -180,39 +357,82 @@ class GitHubUserTool(BaseTool):
         self, pull_request_id: str, repo: str, owner: str
     ) -> ListArtifact[TextArtifact] | ErrorArtifact:
         try:
-            pull_request_files = (
-                self.client.get_repo(f"{owner}/{repo}")
-                .get_pull(int(pull_request_id))
-                .get_files()
-            )
-            pull_request_description = (
-                self.client.get_repo(f"{owner}/{repo}")
-                .get_pull(int(pull_request_id))
-                .body
-            )
+            with track_usage(self.client, "get_pull_request_data"):
+                pull_request = self._get_pull(owner, repo, int(pull_request_id))
+                patches = self.patch_collector.collect(
+                    pull_request, per_page=self.client.per_page
+                )
+            left_out = patches.left_out()
             return ListArtifact(
                 [
-                    TextArtifact(f"Description: {pull_request_description}"),
+                    TextArtifact(f"Description: {pull_request.body}"),
                     *[
-                        TextArtifact(f"File Patch: {f.patch}")
-                        for f in pull_request_files
+                        TextArtifact(f"File Patch: {filename}\n{patch}")
+                        for filename, patch in patches.patches
                     ],
+                    *([TextArtifact(left_out)] if left_out is not None else []),
                 ]
             )
         except Exception as e:
             return ErrorArtifact(f"error getting pull request data: {e}")
 
-    def _convert_github_content_to_artifact(
-        self, content: ContentFile.ContentFile, list_mode: bool = False
-    ) -> TextArtifact:
-        if content.type == "dir":
-            return TextArtifact(content.path)
-        else:
-            return (
-                TextArtifact(content.decoded_content.decode("utf-8"))
-                if not list_mode
-                else TextArtifact(content.name)
-            )
+    def _resolve_ref(self, owner: str, repo: str, ref: str) -> str:
+        if is_commit_sha(ref):
+            return ref
+        return ref_cache.get_or_fill(
+            f"{owner}/{repo}@{ref}",
+            lambda: self._get_repo(owner, repo).get_commit(ref).sha,
+        )
+
+    def _get_file_text(self, owner: str, repo: str, sha: str, path: str) -> str:
+        text = content_cache.get_or_fill(
+            owner, repo, sha, path, lambda: self._fetch_contents(owner, repo, sha, path)
+        )
+        if not isinstance(text, str):
+            raise ValueError(f"{path} is a directory")
+        return text
+
+    def _fetch_contents(
+        self, owner: str, repo: str, sha: str, path: str
+    ) -> str | list[dict]:
+        contents: List[ContentFile.ContentFile] | ContentFile.ContentFile = (
+            self._get_repo(owner, repo).get_contents(path, ref=sha)
+        )
+        if not isinstance(contents, list):
+            return contents.decoded_content.decode("utf-8")
+        return [
+            {"type": content.type, "name": content.name, "path": content.path}
+            for content in contents
+        ]
+
+    def _fetch_tree(self, owner: str, repo: str, sha: str) -> dict:
+        git_tree = self._get_repo(owner, repo).get_git_tree(sha, recursive=True)
+        return {
+            "entries": [
+                {"path": element.path, "type": element.type}
+                for element in git_tree.tree
+            ],
+            "truncated": git_tree.raw_data.get("truncated", False),
+        }
+
+    def _try_get_file_text(
+        self, owner: str, repo: str, sha: str, path: str
+    ) -> str | Exception:
+        try:
+            return self._get_file_text(owner, repo, sha, path)
+        except Exception as e:
+            return e
+
+    def _get_repo(self, owner: str, repo: str) -> Repository:
+        return object_cache.get(
+            f"repo:{owner}/{repo}", lambda: self.client.get_repo(f"{owner}/{repo}")
+        )
+
+    def _get_pull(self, owner: str, repo: str, number: int) -> PullRequest:
+        return object_cache.get(
+            f"pull:{owner}/{repo}#{number}",
+            lambda: self._get_repo(owner, repo).get_pull(number),
+        )
 
     def _get_client(self) -> Github:
-        return Github(auth=Auth.Token(os.environ["GITHUB_PAT"]))
+        return shared_client()
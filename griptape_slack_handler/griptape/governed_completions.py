@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+from griptape.drivers import OpenAiChatPromptDriver
+
+if TYPE_CHECKING:
+    import httpx
+    from griptape.drivers import BasePromptDriver
+
+    from ..llm_governor import Admission, LlmGovernor
+
+# the tokens a completion is assumed to generate when it doesn't set a maximum
+DEFAULT_OUTPUT_TOKENS = 500
+# how long to pause when a rate limited response doesn't say when to retry
+DEFAULT_RETRY_AFTER = 1.0
+# durations in OpenAI's rate limit reset headers, like 1s, 6m0s, or 20ms
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def govern_prompt_driver(
+    prompt_driver: BasePromptDriver, governor: LlmGovernor
+) -> None:
+    """
+    Makes every completion of the Prompt Driver's client wait to be admitted by the governor,
+    with the tokens it is estimated to use, and settles them with the tokens it used. Responses of
+    the provider keep the governor in step with its limits: rate limited responses pause it for as
+    long as they ask, and the remaining tokens and requests lower its budgets. The OpenAI client
+    retries rate limited calls itself, so every response is looked at, not only the last one.
+    Copies of the Prompt Driver, such as streaming ones, share its client and are governed too.
+    Prompt Drivers that don't use an OpenAI client are left as they are.
+    """
+    if not isinstance(prompt_driver, OpenAiChatPromptDriver):
+        return
+
+    client = prompt_driver.client
+    client._client.event_hooks["response"].append(
+        lambda response: _observe_limits(response, governor)
+    )
+    completions = client.chat.completions
+    create = completions.create
+
+    def governed_create(*args, **kwargs) -> Any:
+        admission = governor.acquire(_estimate_tokens(kwargs))
+        try:
+            result = create(*args, **kwargs)
+        except BaseException:
+            governor.release(admission, used_tokens=None)
+            raise
+        if kwargs.get("stream"):
+            return _governed_stream(result, governor, admission)
+        governor.release(admission, used_tokens=_total_tokens(result.usage))
+        return result
+
+    completions.create = governed_create
+
+
+def _governed_stream(
+    stream: Iterator, governor: LlmGovernor, admission: Admission
+) -> Iterator:
+    # the call isn't over until the stream is, or until it is abandoned
+    used_tokens = None
+    try:
+        for chunk in stream:
+            if chunk.usage is not None:
+                used_tokens = _total_tokens(chunk.usage)
+            yield chunk
+    finally:
+        governor.release(admission, used_tokens=used_tokens)
+
+
+def _estimate_tokens(kwargs: dict) -> int:
+    # about 4 characters a token, counting the tools since they are part of the prompt
+    prompt = json.dumps(
+        [kwargs.get("messages", []), kwargs.get("tools", [])], default=str
+    )
+    output_tokens = (
+        kwargs.get("max_completion_tokens")
+        or kwargs.get("max_tokens")
+        or DEFAULT_OUTPUT_TOKENS
+    )
+    return len(prompt) // 4 + output_tokens
+
+
+def _total_tokens(usage: Any) -> Optional[int]:
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def _observe_limits(response: httpx.Response, governor: LlmGovernor) -> None:
+    headers = response.headers
+    if response.status_code == 429:
+        governor.rate_limited(_retry_after(headers))
+        return
+    governor.budget.observe(
+        remaining_tokens=_number(headers.get("x-ratelimit-remaining-tokens")),
+        remaining_requests=_number(headers.get("x-ratelimit-remaining-requests")),
+    )
+
+
+def _retry_after(headers: httpx.Headers) -> float:
+    retry_after_ms = _number(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    retry_after = _number(headers.get("retry-after"))
+    if retry_after is not None:
+        return retry_after
+    resets = [
+        _duration(headers.get(name))
+        for name in ("x-ratelimit-reset-tokens", "x-ratelimit-reset-requests")
+    ]
+    return max(
+        (reset for reset in resets if reset is not None), default=DEFAULT_RETRY_AFTER
+    )
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _duration(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    parts = DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_SECONDS[unit] for amount, unit in parts)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional
+from urllib.parse import urljoin
+
+from attrs import define
+from griptape.artifacts import BaseArtifact, TextArtifact
+from griptape.drivers import (
+    GriptapeCloudConversationMemoryDriver,
+    GriptapeCloudRulesetDriver,
+)
+from griptape.tools import GriptapeCloudToolTool
+from griptape.utils import dict_merge
+
+from ..features import (
+    cloud_tool_cache_ttl,
+    conversation_cache_ttl,
+    ruleset_cache_ttl,
+    shared_cache_enabled,
+)
+from ..http_pool import shared_session
+from ..shared_cache import TieredCache, shared_tier
+
+if TYPE_CHECKING:
+    import requests
+    from griptape.memory.structure import Run
+    from griptape.rules import BaseRule
+
+# rulesets by name, with their rules and metadata
+ruleset_cache: Optional[TieredCache[dict]] = (
+    TieredCache(name="ruleset_cache", ttl=ruleset_cache_ttl(), shared=shared_tier())
+    if shared_cache_enabled()
+    else None
+)
+# Griptape Cloud tool descriptions and schemas, by tool ID
+cloud_tool_cache: Optional[TieredCache[Any]] = (
+    TieredCache(
+        name="cloud_tool_cache", ttl=cloud_tool_cache_ttl(), shared=shared_tier()
+    )
+    if shared_cache_enabled()
+    else None
+)
+# the messages and metadata of Griptape Cloud threads, by alias. They are only kept in the shared
+# tier, so that a thread stored by one process is never read stale from another's memory.
+conversation_cache: Optional[TieredCache[dict]] = (
+    TieredCache(
+        name="conversation_cache",
+        ttl=conversation_cache_ttl(),
+        local_ttl=0,
+        shared=shared_tier(),
+    )
+    if shared_cache_enabled()
+    else None
+)
+
+
+@define
+class PooledGriptapeCloudRulesetDriver(GriptapeCloudRulesetDriver):
+    """
+    A Griptape Cloud Ruleset Driver that calls Griptape Cloud with the shared HTTP session,
+    and caches the rulesets it loads if the shared cache is enabled.
+    """
+
+    def load(self, ruleset_name: str) -> tuple[list[BaseRule], dict[str, Any]]:
+        if ruleset_cache is None:
+            return super().load(ruleset_name)
+        return self._from_ruleset_dict(
+            ruleset_cache.get_or_fill(
+                f"{self.ruleset_id or ''}:{ruleset_name}",
+                lambda: self._load_ruleset_dict(ruleset_name),
+            )
+        )
+
+    def _load_ruleset_dict(self, ruleset_name: str) -> dict:
+        rules, meta = super().load(ruleset_name)
+        return {
+            "rules": [{"value": rule.value, "meta": rule.meta} for rule in rules],
+            "meta": meta,
+        }
+
+    def _call_api(
+        self, method: str, path: str, *, raise_for_status: bool = True
+    ) -> requests.Response:
+        res = shared_session().request(
+            method, self._get_url(path), headers=self.headers
+        )
+        if raise_for_status:
+            res.raise_for_status()
+        return res
+
+
+@define
+class PooledGriptapeCloudConversationMemoryDriver(
+    GriptapeCloudConversationMemoryDriver
+):
+    """
+    A Griptape Cloud Conversation Memory Driver that calls Griptape Cloud with the shared HTTP
+    session, and caches the threads it loads and stores if the shared cache is enabled.
+    """
+
+    def load(self) -> tuple[list[Run], dict[str, Any]]:
+        key = self._cache_key()
+        if conversation_cache is None or key is None:
+            return super().load()
+        thread = conversation_cache.get_or_fill(key, self._load_thread)
+        return [_to_run(message) for message in thread["messages"]], thread["metadata"]
+
+    def store(self, runs: list[Run], metadata: dict[str, Any]) -> None:
+        super().store(runs, metadata)
+        key = self._cache_key()
+        if conversation_cache is None or key is None:
+            return
+
+        cached = conversation_cache.get(key)
+        if cached is None or "metadata" in metadata:
+            # how Griptape Cloud merges new thread metadata isn't known here, so load it again
+            conversation_cache.delete(key)
+            return
+        conversation_cache.set(
+            key,
+            {
+                # the messages as they were sent, which is how Griptape Cloud returns them
+                "messages": [_to_message(run) for run in runs],
+                "metadata": cached["metadata"],
+            },
+        )
+
+    def _load_thread(self) -> dict:
+        runs, metadata = super().load()
+        return {
+            "messages": [
+                {
+                    "input": run.input.to_json(),
+                    "output": run.output.to_json(),
+                    # loaded runs' metadata is the message's, without the run ID
+                    "metadata": {"run_id": run.id, **(run.meta or {})},
+                }
+                for run in runs
+            ],
+            "metadata": metadata,
+        }
+
+    def _cache_key(self) -> Optional[str]:
+        # loading sets the thread ID of a driver given only an alias, so the alias comes first,
+        # for the thread to be stored under the same key it was loaded from
+        if self.alias is not None:
+            return f"alias:{self.alias}"
+        if self.thread_id is not None:
+            return f"thread:{self.thread_id}"
+        # a new thread is created on load, there is nothing to cache it by yet
+        return None
+
+    def _call_api(
+        self,
+        method: str,
+        path: str,
+        json: Optional[dict] = None,
+        *,
+        raise_for_status: bool = True,
+    ) -> requests.Response:
+        res = shared_session().request(
+            method, self._get_url(path), json=json, headers=self.headers
+        )
+        if raise_for_status:
+            res.raise_for_status()
+        return res
+
+
+@define
+class PooledGriptapeCloudToolTool(GriptapeCloudToolTool):
+    """A Griptape Cloud Tool that calls Griptape Cloud with the shared HTTP session."""
+
+    def _get_schema(self) -> dict:
+        if cloud_tool_cache is None:
+            return self._fetch_schema()
+        return cloud_tool_cache.get_or_fill(
+            f"schema:{self.tool_id}", self._fetch_schema
+        )
+
+    def _fetch_schema(self) -> dict:
+        response = shared_session().get(
+            urljoin(self.base_url, f"/api/tools/{self.tool_id}/openapi"),
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        schema = response.json()
+
+        if not isinstance(schema, dict):
+            raise RuntimeError(f"Invalid schema for tool {self.tool_id}: {schema}")
+        if "error" in schema and "tool_run_id" in schema:
+            raise RuntimeError(
+                f"Failed to retrieve schema for tool {self.tool_id}: {schema['error']}"
+            )
+        return schema
+
+    def _run_activity(self, activity_name: str, params: dict) -> BaseArtifact:
+        response = shared_session().post(
+            urljoin(
+                self.base_url, f"/api/tools/{self.tool_id}/activities/{activity_name}"
+            ),
+            json=params,
+            headers=self.headers,
+        )
+        response.raise_for_status()
+
+        try:
+            return BaseArtifact.from_dict(response.json())
+        except ValueError:
+            return TextArtifact(response.text)
+
+
+def _to_message(run: Run) -> dict:
+    # the same message that storing the run sends to Griptape Cloud
+    message = dict_merge(
+        {
+            "input": run.input.to_json(),
+            "output": run.output.to_json(),
+            "metadata": {"run_id": run.id},
+        },
+        run.meta,
+    )
+    return {key: message[key] for key in ("input", "output", "metadata")}
+
+
+def _to_run(message: dict) -> Run:
+    from griptape.memory.structure import Run
+
+    metadata = dict(message["metadata"])
+    return Run(
+        **({"id": metadata.pop("run_id")} if "run_id" in metadata else {}),
+        meta=metadata,
+        input=BaseArtifact.from_json(message["input"]),
+        output=BaseArtifact.from_json(message["output"]),
+    )
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Iterator
+
+from griptape.drivers import OpenAiChatPromptDriver
+
+from ..metrics import metrics
+from ..tracing import tracer
+
+if TYPE_CHECKING:
+    from griptape.drivers import BasePromptDriver
+
+logger = logging.getLogger("griptape_slack_handler")
+
+
+def record_prompt_cache_usage(prompt_driver: BasePromptDriver) -> None:
+    """
+    Records how many prompt tokens OpenAI served from its prompt cache, for every completion made
+    with the Prompt Driver's client. Griptape only keeps the total input tokens of a completion, so
+    the cached tokens are read off the usage of the OpenAI response instead.
+    Copies of the Prompt Driver, such as streaming ones, share its client and are recorded too.
+    Prompt Drivers that don't use an OpenAI client are left as they are.
+    """
+    if not isinstance(prompt_driver, OpenAiChatPromptDriver):
+        return
+
+    completions = prompt_driver.client.chat.completions
+    create = completions.create
+
+    def create_and_record(*args, **kwargs) -> Any:
+        result = create(*args, **kwargs)
+        if kwargs.get("stream"):
+            return _record_stream(result)
+        if result.usage is not None:
+            _record(result.usage)
+        return result
+
+    completions.create = create_and_record
+
+
+def _record_stream(stream: Iterator) -> Iterator:
+    # the usage comes in the last chunk, when requested with stream_options
+    for chunk in stream:
+        if chunk.usage is not None:
+            _record(chunk.usage)
+        yield chunk
+
+
+def _record(usage: Any) -> None:
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+    prompt_tokens = usage.prompt_tokens or 0
+    ratio = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+
+    metrics.increment("llm.prompt_tokens", prompt_tokens)
+    metrics.increment("llm.cached_prompt_tokens", cached_tokens)
+    metrics.observe("llm.cached_prompt_ratio", ratio)
+    span = tracer.current_span()
+    if span is not None:
+        span.set_attribute("llm.cached_input_tokens", cached_tokens)
+    logger.debug(
+        f"Prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached ({ratio:.0%}), "
+        f"{metrics.ratio('llm.cached_prompt_tokens', 'llm.prompt_tokens'):.0%} overall"
+    )
@@ -8,7 +8,7 @@ from griptape.events import BaseEvent
 from griptape.drivers import BaseEventListenerDriver
 from griptape.tools import BaseTool
 
-from ..slack_util import typing_message
+from ..side_effects import side_effects
 
 if TYPE_CHECKING:
     from slack_sdk import WebClient
@@ -95,8 +95,8 @@ class SlackEventListenerDriver(BaseEventListenerDriver):
                         )
                     self._slack_responses[res["ts"]] = res.data
                 else:
-                    typing_message(
-                        message=payload.get("text", ""),
+                    side_effects.set_status(
+                        payload.get("text", ""),
                         thread_ts=self.thread_ts,
                         channel=self.channel,
                         client=self.web_client,
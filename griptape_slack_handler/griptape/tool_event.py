@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from attrs import define, field
 
@@ -17,7 +17,15 @@ class ToolEvent(BaseEvent):
     Attributes:
         tools: The tools to use for the event.
         stream: Whether the Prompt Driver is streaming.
+        activity: The activity whose output size is being reported, if any.
+        output_tokens: How many tokens the activity's output had.
+        governed_tokens: How many tokens of the output were passed on to the LLM.
+        governed_action: What was done to the output to fit the budget, if anything.
     """
 
     tools: list[BaseTool] = field()
     stream: bool = field(default=False)
+    activity: Optional[str] = field(default=None)
+    output_tokens: Optional[int] = field(default=None)
+    governed_tokens: Optional[int] = field(default=None)
+    governed_action: Optional[str] = field(default=None)
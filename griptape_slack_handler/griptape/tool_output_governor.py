@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Callable
+
+from attrs import Factory, define, field
+from griptape.artifacts import (
+    BaseArtifact,
+    ErrorArtifact,
+    InfoArtifact,
+    ListArtifact,
+    TextArtifact,
+)
+from griptape.chunkers import TextChunker
+from griptape.drivers import LocalRulesetDriver
+from griptape.engines import PromptSummaryEngine
+from griptape.events import EventBus
+from griptape.memory import TaskMemory
+from griptape.rules import Rule, Ruleset
+
+from ..metrics import metrics
+from .tool_event import ToolEvent
+
+if TYPE_CHECKING:
+    from griptape.tasks import ActionsSubtask
+    from griptape.tokenizers import BaseTokenizer
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# below this, a summary is too short to be worth the extra LLM call
+MIN_SUMMARY_TOKENS = 200
+
+
+@define(kw_only=True)
+class ToolOutputGovernor(TaskMemory):
+    """
+    An output memory for Tools that keeps their outputs within a per-artifact and a per-run token budget.
+    Outputs that fit are passed through unchanged. Outputs that don't are chunked and summarized down to
+    the budget, and are truncated if summarizing fails. Once the run's budget is spent, outputs are left out.
+    The size of every output is reported with a ToolEvent.
+
+    Attributes:
+        max_artifact_tokens: The maximum number of tokens in a single tool output.
+        max_run_tokens: The maximum number of tokens in all tool outputs of a run.
+        summary_engine: The engine used to summarize outputs that are too large.
+        stream: Whether the Prompt Driver is streaming, for the ToolEvents.
+    """
+
+    name: str = field(default="ToolOutputGovernor")
+    max_artifact_tokens: int = field(default=4000)
+    max_run_tokens: int = field(default=16000)
+    summary_engine: PromptSummaryEngine = field(
+        default=Factory(lambda: PromptSummaryEngine())
+    )
+    stream: bool = field(default=False)
+
+    _used_tokens: int = field(default=0, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    @property
+    def tokenizer(self) -> BaseTokenizer:
+        return self.summary_engine.prompt_driver.tokenizer
+
+    def process_output(
+        self,
+        tool_activity: Callable,
+        subtask: ActionsSubtask,
+        output_artifact: BaseArtifact,
+    ) -> BaseArtifact:
+        tool = getattr(tool_activity, "__self__")
+        activity_name = getattr(tool_activity, "name")
+        output_tokens = self.tokenizer.count_tokens(output_artifact.to_text())
+
+        with self._lock:
+            budget = min(
+                self.max_artifact_tokens, self.max_run_tokens - self._used_tokens
+            )
+            # reserve the budget now, tools in the same subtask run concurrently
+            reserved = min(output_tokens, max(budget, 0))
+            self._used_tokens += reserved
+
+        if output_tokens <= budget or isinstance(output_artifact, ErrorArtifact):
+            governed = output_artifact
+            action = None
+        elif budget < MIN_SUMMARY_TOKENS:
+            governed = InfoArtifact(
+                f"The output of {tool.name}.{activity_name} was left out, because the tool outputs "
+                "for this request are already too large. Answer with what you have."
+            )
+            action = "left out"
+        else:
+            governed = self._summarize(output_artifact, subtask, budget)
+            action = "summarized"
+
+        governed_tokens = self.tokenizer.count_tokens(governed.to_text())
+        with self._lock:
+            self._used_tokens += governed_tokens - reserved
+
+        metrics.observe(f"tool_output.{tool.name}.tokens", output_tokens)
+        metrics.observe(f"tool_output.{tool.name}.governed_tokens", governed_tokens)
+        if action is not None:
+            metrics.increment(f"tool_output.{action.replace(' ', '_')}")
+            logger.info(
+                f"Tool output of {tool.name}.{activity_name} {action}: {output_tokens} -> {governed_tokens} tokens"
+            )
+        EventBus.publish_event(
+            ToolEvent(
+                tools=[tool],
+                stream=self.stream,
+                activity=activity_name,
+                output_tokens=output_tokens,
+                governed_tokens=governed_tokens,
+                governed_action=action,
+            )
+        )
+        return governed
+
+    def _summarize(
+        self, artifact: BaseArtifact, subtask: ActionsSubtask, budget: int
+    ) -> TextArtifact:
+        chunks = TextChunker(
+            tokenizer=self.tokenizer, max_tokens=self.summary_engine.max_chunker_tokens
+        ).chunk(artifact.to_text())
+        try:
+            summary = self.summary_engine.summarize_artifacts(
+                ListArtifact(chunks),
+                rulesets=[
+                    Ruleset(
+                        name="Tool Output",
+                        # the rules are all here, don't look the ruleset up
+                        ruleset_driver=LocalRulesetDriver(),
+                        rules=[
+                            Rule(f"The summary must be shorter than {budget} tokens."),
+                            *(
+                                [
+                                    Rule(
+                                        f"Keep the details needed for this: {subtask.thought}"
+                                    )
+                                ]
+                                if subtask.thought
+                                else []
+                            ),
+                        ],
+                    )
+                ],
+            )
+        except Exception:
+            logger.exception("Error while summarizing tool output, truncating it")
+            summary = None
+
+        if summary is None or self.tokenizer.count_tokens(summary.value) > budget:
+            excerpt = TextChunker(tokenizer=self.tokenizer, max_tokens=budget).chunk(
+                artifact.to_text()
+            )[0]
+            return TextArtifact(
+                f"{excerpt.value}\n... [truncated, the output was too large]"
+            )
+        return TextArtifact(f"Summary of a large output: {summary.value}")
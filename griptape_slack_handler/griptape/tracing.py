@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional
+
+from attrs import define
+from griptape.drivers import BaseObservabilityDriver
+from griptape.events import (
+    ActionChunkEvent,
+    BaseEvent,
+    EventListener,
+    FinishActionsSubtaskEvent,
+    FinishPromptEvent,
+    StartActionsSubtaskEvent,
+    TextChunkEvent,
+)
+
+from ..tracing import tracer
+from .griptape_cloud import PooledGriptapeCloudConversationMemoryDriver
+from .tool_event import ToolEvent
+
+if TYPE_CHECKING:
+    from griptape.common import Observable
+    from griptape.memory.structure import Run
+
+PROMPT_SPAN_NAME = "llm.prompt"
+TOOL_SPAN_NAME = "tool.activity"
+
+
+@define
+class TracingObservabilityDriver(BaseObservabilityDriver):
+    """
+    An Observability Driver that records the calls griptape marks as observable as spans,
+    such as every LLM call and every tool activity.
+    """
+
+    def observe(self, call: Observable.Call) -> Any:
+        with tracer.span(*_span_name_and_attributes(call)):
+            return call()
+
+    def get_span_id(self) -> Optional[str]:
+        span = tracer.current_span()
+        return span.span_id if span is not None else None
+
+
+@define
+class TracedGriptapeCloudConversationMemoryDriver(
+    PooledGriptapeCloudConversationMemoryDriver
+):
+    """A Griptape Cloud Conversation Memory Driver that records loading and storing the conversation as spans."""
+
+    def store(self, runs: list[Run], metadata: dict[str, Any]) -> None:
+        with tracer.span(
+            "memory.store", {"memory.alias": self.alias, "memory.runs": len(runs)}
+        ):
+            super().store(runs, metadata)
+
+    def load(self) -> tuple[list[Run], dict[str, Any]]:
+        with tracer.span("memory.load", {"memory.alias": self.alias}) as span:
+            runs, metadata = super().load()
+            span.set_attribute("memory.runs", len(runs))
+            return runs, metadata
+
+
+def trace_event_listener() -> EventListener:
+    """
+    Gets an Event Listener that adds griptape's events to the current span,
+    such as the time to the first token of an LLM call.
+    """
+    return EventListener(
+        trace_event_handler,
+        event_types=[
+            TextChunkEvent,
+            ActionChunkEvent,
+            FinishPromptEvent,
+            StartActionsSubtaskEvent,
+            FinishActionsSubtaskEvent,
+            ToolEvent,
+        ],
+    )
+
+
+def trace_event_handler(event: BaseEvent) -> None:
+    # events are published on the thread that caused them, so the current span is the one they are about
+    span = tracer.current_span()
+    if span is None:
+        return None
+
+    if isinstance(event, (TextChunkEvent, ActionChunkEvent)):
+        if (
+            span.name == PROMPT_SPAN_NAME
+            and "llm.time_to_first_token_ms" not in span.attributes
+        ):
+            span.set_attribute("llm.time_to_first_token_ms", span.elapsed_ms)
+            span.add_event("first_token")
+    elif isinstance(event, FinishPromptEvent):
+        span.set_attribute("llm.input_tokens", event.input_token_count)
+        span.set_attribute("llm.output_tokens", event.output_token_count)
+    elif isinstance(event, StartActionsSubtaskEvent):
+        span.add_event(
+            "actions.start",
+            {
+                "actions": [
+                    f"{action['name']}.{action['path']}"
+                    for action in event.subtask_actions or []
+                ]
+            },
+        )
+    elif isinstance(event, FinishActionsSubtaskEvent):
+        span.add_event("actions.finish")
+    elif isinstance(event, ToolEvent) and event.tools:
+        if event.output_tokens is not None:
+            span.add_event(
+                "tool.output",
+                {
+                    "tool.name": event.tools[0].name,
+                    "tool.activity": event.activity,
+                    "tool.output_tokens": event.output_tokens,
+                    "tool.governed_tokens": event.governed_tokens,
+                    "tool.governed_action": event.governed_action,
+                },
+            )
+        else:
+            span.add_event(
+                "tools.selected", {"tools": [tool.name for tool in event.tools]}
+            )
+    return None
+
+
+def _span_name_and_attributes(call: Observable.Call) -> tuple[str, dict]:
+    tags = call.tags or []
+    instance = call.instance
+    if "PromptDriver.run()" in tags:
+        return PROMPT_SPAN_NAME, {
+            "llm.model": getattr(instance, "model", None),
+            "llm.stream": getattr(instance, "stream", None),
+        }
+    if "Tool.run()" in tags:
+        activity = call.args[0] if call.args else call.kwargs.get("activity")
+        return TOOL_SPAN_NAME, {
+            "tool.name": getattr(instance, "name", None),
+            "tool.activity": getattr(activity, "name", None),
+        }
+    class_name = f"{type(instance).__name__}." if instance is not None else ""
+    return f"{class_name}{call.func.__name__}()", {}
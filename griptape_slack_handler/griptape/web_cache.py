@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import zlib
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from attrs import define, field
+from griptape.artifacts import ListArtifact, TextArtifact
+from griptape.drivers import DuckDuckGoWebSearchDriver, TrafilaturaWebScraperDriver
+from griptape.loaders import WebLoader
+from griptape.utils import import_optional_dependency
+
+from ..disk_cache import DiskCache
+from ..http_pool import shared_session
+from ..features import (
+    web_cache_dir,
+    web_cache_max_mb,
+    web_extraction_workers,
+)
+from ..metrics import metrics
+
+logger = logging.getLogger("griptape_slack_handler")
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref_src"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+web_cache = DiskCache(
+    directory=web_cache_dir(),
+    name="web_cache",
+    max_bytes=web_cache_max_mb() * 1024 * 1024,
+)
+
+_executor: Optional[futures.ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+@define
+class CachedWebLoader(WebLoader):
+    """
+    A Web Loader that loads pages with the Web Scraper Driver's `scrape_url`,
+    so that a caching driver can skip fetching and extracting pages it already has.
+    """
+
+    def load(self, source: str) -> TextArtifact:
+        artifact = self.web_scraper_driver.scrape_url(source)
+        artifact.reference = self.reference
+        return artifact
+
+
+@define
+class CachedTrafilaturaWebScraperDriver(TrafilaturaWebScraperDriver):
+    """
+    A Trafilatura Web Scraper Driver that caches the extracted text of pages, keyed by normalized URL.
+    Cached pages are used as is for the TTL, and are then revalidated with their ETag or Last-Modified
+    validators. Extraction runs in a process pool, so that it doesn't hold the GIL on the calling thread.
+
+    Attributes:
+        cache: The cache to store extracted pages in.
+        ttl: How many seconds a cached page is used before it is revalidated.
+        timeout: How many seconds to wait for a revalidation or an extraction.
+    """
+
+    cache: DiskCache = field(default=web_cache, kw_only=True)
+    ttl: float = field(default=3600, kw_only=True)
+    timeout: float = field(default=30, kw_only=True)
+
+    def scrape_url(self, url: str) -> TextArtifact:
+        key = f"page:{normalize_url(url)}"
+        cached = _load(self.cache.get(key))
+        if cached is not None and time.time() - cached["fetched_at"] < self.ttl:
+            metrics.increment("web_cache.page.hits")
+            return TextArtifact(cached["text"])
+
+        if cached is not None and (cached["etag"] or cached["last_modified"]):
+            page, headers = self._revalidate(url, cached)
+            if page is None:
+                metrics.increment("web_cache.page.not_modified")
+                self._store(key, cached["text"], headers)
+                return TextArtifact(cached["text"])
+        else:
+            page, headers = self._fetch(url)
+
+        metrics.increment("web_cache.page.misses")
+        artifact = self.extract_page(page)
+        self._store(key, artifact.value, headers)
+        return artifact
+
+    def extract_page(self, page: str) -> TextArtifact:
+        executor = _extraction_executor()
+        if executor is None:
+            return super().extract_page(page)
+
+        future = executor.submit(_extract_page, page, include_links=self.include_links)
+        try:
+            return TextArtifact(future.result(timeout=self.timeout))
+        except BrokenProcessPool:
+            logger.exception("Web extraction process pool broke, extracting in thread")
+            _reset_extraction_executor(executor)
+            return super().extract_page(page)
+        except futures.TimeoutError:
+            metrics.increment("web_cache.extraction_timeouts")
+            logger.warning(f"Web extraction took longer than {self.timeout}s")
+            # an extraction that already started can't be stopped, so later ones get a new pool
+            if not future.cancel():
+                _reset_extraction_executor(executor)
+            raise Exception("can't extract page")
+
+    def _fetch(self, url: str) -> tuple[str, dict]:
+        trafilatura = import_optional_dependency("trafilatura")
+        # fetch_url does the same, but doesn't return the headers with the validators
+        response = trafilatura.downloads.fetch_response(
+            url, decode=True, no_ssl=self.no_ssl, with_headers=True
+        )
+        if not response or response.status != 200 or not response.html:
+            raise Exception("can't access URL")
+        return response.html, response.headers or {}
+
+    def _revalidate(self, url: str, cached: dict) -> tuple[Optional[str], dict]:
+        """Gets the page if it changed, or None if it was not modified."""
+        headers = {}
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            response = shared_session().get(
+                url, headers=headers, timeout=self.timeout, verify=not self.no_ssl
+            )
+        except requests.RequestException:
+            return self._fetch(url)
+
+        response_headers = {k.lower(): v for k, v in response.headers.items()}
+        if response.status_code == 304:
+            validators = {
+                "etag": cached["etag"],
+                "last-modified": cached["last_modified"],
+            }
+            return None, {**validators, **response_headers}
+        if response.status_code != 200:
+            return self._fetch(url)
+        return response.text, response_headers
+
+    def _store(self, key: str, text: str, headers: dict) -> None:
+        if "no-store" in headers.get("cache-control", ""):
+            return
+        self.cache.set(
+            key,
+            _dump(
+                {
+                    "text": text,
+                    "fetched_at": time.time(),
+                    "etag": headers.get("etag"),
+                    "last_modified": headers.get("last-modified"),
+                }
+            ),
+        )
+
+
+@define
+class CachedDuckDuckGoWebSearchDriver(DuckDuckGoWebSearchDriver):
+    """
+    A DuckDuckGo Web Search Driver that caches search results for a short TTL.
+
+    Attributes:
+        cache: The cache to store search results in.
+        ttl: How many seconds search results are used for.
+    """
+
+    cache: DiskCache = field(default=web_cache, kw_only=True)
+    ttl: float = field(default=600, kw_only=True)
+
+    def search(self, query: str, **kwargs) -> ListArtifact:
+        key = "search:" + json.dumps(
+            {
+                "query": " ".join(query.lower().split()),
+                "region": f"{self.language}-{self.country}",
+                "results_count": self.results_count,
+                "kwargs": kwargs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        cached = _load(self.cache.get(key))
+        if cached is not None and time.time() - cached["fetched_at"] < self.ttl:
+            metrics.increment("web_cache.search.hits")
+            return ListArtifact([TextArtifact(result) for result in cached["results"]])
+
+        metrics.increment("web_cache.search.misses")
+        results = super().search(query, **kwargs)
+        self.cache.set(
+            key,
+            _dump(
+                {
+                    "fetched_at": time.time(),
+                    "results": [result.value for result in results.value],
+                }
+            ),
+        )
+        return results
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that equivalent URLs share a cache entry.
+    Lowercases the scheme and host, and drops default ports, fragments, and tracking parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not name.startswith("utm_") and name not in TRACKING_PARAMS
+        )
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def _extract_page(page: str, *, include_links: bool) -> str:
+    # the base driver's extraction, so that pages are extracted the same way in the pool
+    return (
+        TrafilaturaWebScraperDriver(include_links=include_links)
+        .extract_page(page)
+        .value
+    )
+
+
+def _extraction_executor() -> Optional[futures.ProcessPoolExecutor]:
+    global _executor
+    workers = web_extraction_workers()
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn instead of fork, forking a process with running threads can deadlock the child
+            _executor = futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _reset_extraction_executor(executor: futures.ProcessPoolExecutor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _dump(entry: dict) -> bytes:
+    return zlib.compress(json.dumps(entry).encode("utf-8"))
+
+
+def _load(data: Optional[bytes]) -> Optional[dict]:
+    if data is None:
+        return None
+    try:
+        return json.loads(zlib.decompress(data))
+    except (zlib.error, ValueError):
+        return None
@@ -1,28 +1,29 @@
 import os
 import logging
 from typing import Optional
-import rich.logging
-import logging
+from attrs import evolve
 
 from griptape.configs import Defaults
 from griptape.configs.drivers import AzureOpenAiDriversConfig
-from griptape.drivers import (
-    GriptapeCloudConversationMemoryDriver,
-    GriptapeCloudRulesetDriver,
-)
+from griptape.drivers import BasePromptDriver, GriptapeCloudConversationMemoryDriver
+from griptape.memory.structure import ConversationMemory
+from griptape.observability import Observability
 
-logging.basicConfig(
-    level=logging.WARNING,
-    format="%(message)s",
-    handlers=[rich.logging.RichHandler()],
-    force=True,
+from .features import tracing_enabled
+from .griptape.griptape_cloud import (
+    PooledGriptapeCloudConversationMemoryDriver,
+    PooledGriptapeCloudRulesetDriver,
+)
+from .griptape.governed_completions import govern_prompt_driver
+from .griptape.prompt_cache_usage import record_prompt_cache_usage
+from .llm_governor import llm_governor
+from .griptape.tracing import (
+    TracedGriptapeCloudConversationMemoryDriver,
+    TracingObservabilityDriver,
 )
 
-# Set desired logging level for
+# Griptape sets the level of its logger when it is imported
 logging.getLogger("griptape").setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
-logging.getLogger("griptape_slack_handler").setLevel(
-    os.environ.get("LOG_LEVEL", logging.INFO)
-)
 
 
 def load_griptape_config() -> None:
@@ -30,29 +31,48 @@ def load_griptape_config() -> None:
     if "OPENAI_API_KEY" not in os.environ:
         from azure.identity import DefaultAzureCredential
 
-        def azure_ad_token_provider():
-            return (
-                DefaultAzureCredential()
-                .get_token("https://cognitiveservices.azure.com/.default")
-                .token
-            )
+        from .azure_token import AzureTokenProvider
 
         Defaults.drivers_config = AzureOpenAiDriversConfig(
-            azure_ad_token_provider=azure_ad_token_provider,
+            # one credential and token for every driver, refreshed before it expires
+            azure_ad_token_provider=AzureTokenProvider(
+                credential=DefaultAzureCredential()
+            ),
             azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
         )
         Defaults.drivers_config.prompt_driver.api_version = (
             "2024-08-01-preview"  # needed for structured output
         )
 
-    Defaults.drivers_config.ruleset_driver = GriptapeCloudRulesetDriver(
+    prepare_prompt_driver(Defaults.drivers_config.prompt_driver)
+
+    Defaults.drivers_config.ruleset_driver = PooledGriptapeCloudRulesetDriver(
         raise_not_found=False
     )
     Defaults.drivers_config.conversation_memory_driver = (
-        GriptapeCloudConversationMemoryDriver()
+        TracedGriptapeCloudConversationMemoryDriver()
+        if tracing_enabled()
+        else PooledGriptapeCloudConversationMemoryDriver()
     )
+    if tracing_enabled():
+        # records every LLM call and tool activity as a span
+        Observability.set_global_driver(TracingObservabilityDriver())
+
+
+def prepare_prompt_driver(prompt_driver: BasePromptDriver) -> None:
+    """Records the prompt cache usage of the Prompt Driver's client, and governs it if enabled."""
+    record_prompt_cache_usage(prompt_driver)
+    if llm_governor is not None:
+        govern_prompt_driver(prompt_driver, llm_governor)
 
 
-def set_thread_alias(thread_alias: Optional[str]) -> None:
-    """Set the thread alias for the conversation memory driver."""
-    Defaults.drivers_config.conversation_memory_driver.alias = thread_alias
+def thread_conversation_memory(thread_alias: Optional[str]) -> ConversationMemory:
+    """
+    Loads the conversation memory of a thread, with its own copy of the memory driver.
+    The driver keeps the thread it finds first, so a shared one would mix up threads
+    that are answered at the same time.
+    """
+    driver = Defaults.drivers_config.conversation_memory_driver
+    if isinstance(driver, GriptapeCloudConversationMemoryDriver):
+        driver = evolve(driver, alias=thread_alias, thread_id=None)
+    return ConversationMemory(conversation_memory_driver=driver)
@@ -17,12 +17,16 @@ from griptape.events import (
 
 from .griptape.tool_event import ToolEvent
 from .griptape.slack_event_listener_driver import SlackEventListenerDriver
+from .griptape.tracing import trace_event_listener
+from .tracing import tracer
 from .slack_util import thought_block, action_block, emoji_block
 
 logger = logging.getLogger("griptape_slack_handler")
 
 
 def event_listeners(*, stream: bool, **kwargs) -> list[EventListener]:
+    trace_listeners = [trace_event_listener()] if tracer.enabled else []
+
     # if stream is True, we will use the batched driver to deliver chunk events
     # and continuously update the slack message
     if stream:
@@ -36,7 +40,8 @@ def event_listeners(*, stream: bool, **kwargs) -> list[EventListener]:
                     ActionChunkEvent,
                 ],
                 event_listener_driver=stream_driver,
-            )
+            ),
+            *trace_listeners,
         ]
 
     # WIP: use event listeners to create different UXs of different actions the LLM is taking
@@ -51,7 +56,8 @@ def event_listeners(*, stream: bool, **kwargs) -> list[EventListener]:
                 FinishActionsSubtaskEvent,
             ],
             event_listener_driver=driver,
-        )
+        ),
+        *trace_listeners,
     ]
 
 
@@ -75,6 +81,9 @@ def tool_event_handler(event: ToolEvent) -> Optional[dict]:
     if not event.tools:
         return None
 
+    if event.output_tokens is not None:
+        return tool_output_handler(event)
+
     if event.stream:
         return {
             "text": f"Tools needed: {', '.join([tool.name for tool in event.tools])}\n\n",
@@ -86,6 +95,26 @@ def tool_event_handler(event: ToolEvent) -> Optional[dict]:
         }
 
 
+def tool_output_handler(event: ToolEvent) -> Optional[dict]:
+    tool_name = event.tools[0].name
+    logger.debug(
+        f"Tool output size of {tool_name}.{event.activity}: {event.output_tokens} tokens, "
+        f"{event.governed_tokens} passed on"
+    )
+    if event.governed_action is None or event.stream:
+        return None
+
+    return {
+        "text": f"is reading the output of {tool_name}...",
+        "blocks": [
+            emoji_block(
+                ":scissors:",
+                f"The output of {tool_name}.{event.activity} was too large, so it was {event.governed_action}",
+            )
+        ],
+    }
+
+
 def start_structure_handler(event: StartStructureRunEvent) -> Optional[dict]:
     return {
         "text": "is reading the data...",
@@ -4,35 +4,72 @@ import os
 from typing import Optional, TYPE_CHECKING
 import logging
 import re
+import time
+from contextlib import nullcontext
+from attrs import evolve
 from schema import Schema, Literal
 
 from griptape.events import EventBus
 from griptape.artifacts import ErrorArtifact, TextArtifact
 from griptape.rules import Ruleset, Rule, BaseRule
 from griptape.structures import Agent
-from griptape.memory.structure import ConversationMemory, Run
+from griptape.memory.structure import Run
 from griptape.engines import EvalEngine
+from griptape.configs import Defaults
+from griptape.drivers import LocalRulesetDriver
 
 from griptape_slack_handler.griptape_event_handlers import ToolEvent
 
-from .griptape_tool_box import get_tools
-from .griptape_config import load_griptape_config, set_thread_alias
-from .features import dynamic_rulesets_enabled, dynamic_tools_enabled
+from .griptape_tool_box import get_tools, get_tool_registry_names
+from .griptape_config import (
+    load_griptape_config,
+    prepare_prompt_driver,
+    thread_conversation_memory,
+)
+from .features import (
+    dynamic_rulesets_enabled,
+    dynamic_tools_enabled,
+    model_routing_enabled,
+    model_routing_max_small_context_tokens,
+    model_routing_max_small_words,
+    model_routing_small_model,
+    prefix_stable_prompt_enabled,
+    response_cache_enabled,
+    response_cache_ttl,
+    response_cache_fuzzy_enabled,
+    response_cache_similarity,
+)
+from .model_routing import RouteUsage, route_message, routed_prompt_driver
+from .response_cache import ResponseCache, agent_fingerprint, channel_opted_in
+from .shadow import ShadowRunAborted
+from .tracing import tracer
 
 if TYPE_CHECKING:
     from griptape.events import EventListener
+    from griptape.tools import BaseTool
+    from .prefetch import Prefetch
+    from .shadow import ShadowAbortMonitor
 
 
 logger = logging.getLogger("griptape_slack_handler")
 
+# the ids that rulesets are aliased with, from the most to the least widely shared
+RULESET_ID_ORDER = ("app_id", "team_id", "channel_id", "user_id")
+STATIC_RULESET_NAME = "Slack"
+
 
 load_griptape_config()
 
+response_cache = ResponseCache(
+    ttl=response_cache_ttl(),
+    fuzzy=response_cache_fuzzy_enabled(),
+    similarity_threshold=response_cache_similarity(),
+)
+
 
 def try_add_to_thread(
     message: str, *, thread_alias: Optional[str] = None, user_id: str
 ) -> None:
-    set_thread_alias(thread_alias)
     # find all the user_ids @ mentions in the message
     mentioned_user_ids = re.findall(r"<@([\w]+)>", message)
     rulesets = [Ruleset(name=mentioned_user) for mentioned_user in mentioned_user_ids]
@@ -43,7 +80,7 @@ def try_add_to_thread(
         if ruleset.meta.get("type") == "bot":
             return
 
-    memory = ConversationMemory()
+    memory = thread_conversation_memory(thread_alias)
     # WIP. since messages that do not tag the bot are not being added to the cloud Thread,
     # the bot can miss context. This inserts those messages into the Thread, which
     # later can be used to provide context via ConversationMemory. this seems to work okay,
@@ -59,16 +96,84 @@ def try_add_to_thread(
 
 
 def get_rulesets(**kwargs) -> list[Ruleset]:
-    return (
-        [Ruleset(name=value) for value in kwargs.values()]
-        if dynamic_rulesets_enabled()
-        else []
+    with tracer.span("get_rulesets") as span:
+        rulesets = [Ruleset(name=name) for name in get_ruleset_names(**kwargs)]
+        span.set_attribute("rulesets.count", len(rulesets))
+        return rulesets
+
+
+def get_ruleset_names(**kwargs) -> list[str]:
+    """Gets the names of the rulesets to pull in for the ids of an event, without loading them."""
+    if not dynamic_rulesets_enabled():
+        return []
+    if prefix_stable_prompt_enabled():
+        kwargs = {
+            key: kwargs[key]
+            for key in sorted(
+                kwargs,
+                key=lambda key: RULESET_ID_ORDER.index(key)
+                if key in RULESET_ID_ORDER
+                else len(RULESET_ID_ORDER),
+            )
+        }
+    return list(kwargs.values())
+
+
+def response_cache_opted_in(rulesets: list[Ruleset], *, channel_id: str) -> bool:
+    """Whether response caching is enabled, and opted into by the channel's ruleset."""
+    return response_cache_enabled() and channel_opted_in(
+        rulesets, channel_id=channel_id
+    )
+
+
+def get_cached_response(
+    message: str, *, user_id: str, channel_id: str, rulesets: list[Ruleset]
+) -> Optional[str]:
+    """Gets a cached response to the message, if the same Agent has answered it recently in the channel."""
+    hit = response_cache.get(
+        message,
+        fingerprint=agent_fingerprint(
+            rulesets, get_tool_registry_names(), channel_id=channel_id
+        ),
+        user_id=user_id,
+    )
+    return hit.response if hit is not None else None
+
+
+def cache_response(
+    message: str,
+    response: str,
+    *,
+    user_id: str,
+    channel_id: str,
+    rulesets: list[Ruleset],
+) -> None:
+    """Caches the Agent's response to the message in the channel."""
+    response_cache.set(
+        message,
+        response,
+        fingerprint=agent_fingerprint(
+            rulesets, get_tool_registry_names(), channel_id=channel_id
+        ),
+        user_id=user_id,
+    )
+
+
+def add_cached_run_to_thread(
+    message: str, response: str, *, thread_alias: Optional[str] = None
+) -> None:
+    """Adds a cached response to the thread, so that follow up messages have it for context."""
+    thread_conversation_memory(thread_alias).add_run(
+        Run(input=TextArtifact(message), output=TextArtifact(response))
     )
 
 
 def _default_rules(**kwargs) -> list[BaseRule]:
+    return [*_request_rules(**kwargs), *_static_rules()]
+
+
+def _static_rules() -> list[BaseRule]:
     return [
-        Rule(f"Slack user '{kwargs.get('user_id')}' has sent this message."),
         Rule(
             "You can tag Slack users with the following format: <@USER_ID>, where USER_ID is the user's Slack ID."
         ),
@@ -80,6 +185,40 @@ def _default_rules(**kwargs) -> list[BaseRule]:
     ]
 
 
+def _request_rules(**kwargs) -> list[BaseRule]:
+    return [Rule(f"Slack user '{kwargs.get('user_id')}' has sent this message.")]
+
+
+def _prompt_layout(
+    tools: list[BaseTool], rulesets: list[Ruleset], *, user_id: str
+) -> dict:
+    """
+    Gets the tools, rulesets, and rules of the Agent. In the prefix stable layout, the system prompt
+    goes from the bot's identity and static rules, through the tools and the rulesets from the most
+    to the least widely shared, to the details of the request, which Griptape renders last.
+    """
+    if not prefix_stable_prompt_enabled():
+        return {
+            "tools": tools,
+            "rulesets": rulesets,
+            "rules": _default_rules(user_id=user_id),
+        }
+    return {
+        # dynamically chosen tools come in the order the LLM listed them
+        "tools": sorted(tools, key=lambda tool: tool.name),
+        "rulesets": [
+            # local driver: Griptape Cloud must not add rules from its own "Slack" ruleset
+            Ruleset(
+                name=STATIC_RULESET_NAME,
+                rules=_static_rules(),
+                ruleset_driver=LocalRulesetDriver(),
+            ),
+            *rulesets,
+        ],
+        "rules": _request_rules(user_id=user_id),
+    }
+
+
 def agent(
     message: str,
     *,
@@ -88,29 +227,82 @@ def agent(
     rulesets: list[Ruleset],
     event_listeners: list[EventListener],
     stream: bool,
+    abort_monitor: Optional[ShadowAbortMonitor] = None,
+    prefetched: Optional[Prefetch] = None,
 ) -> str:
-    set_thread_alias(thread_alias)
-    logger.debug(f"Setting thread alias to: {thread_alias}")
+    """
+    Runs the Agent on the message. If the tools and conversation memory were prefetched,
+    they are waited on instead of being loaded here.
+    """
     EventBus.add_event_listeners(event_listeners)
 
-    if dynamic_tools_enabled():
+    dynamic = prefetched.dynamic if prefetched is not None else dynamic_tools_enabled()
+    if dynamic:
         logger.debug("Dynamic tools enabled")
         EventBus.publish_event(ToolEvent(tools=[], stream=stream), flush=True)
-        tools = get_tools(message, dynamic=True)
+    conversation_memory = (
+        prefetched.conversation_memory()
+        if prefetched is not None
+        else thread_conversation_memory(thread_alias)
+    )
+    tools = (
+        prefetched.tools()
+        if prefetched is not None
+        else get_tools(
+            message,
+            dynamic=dynamic,
+            stream=stream,
+            conversation_memory=conversation_memory,
+        )
+    )
+    if dynamic:
         EventBus.publish_event(ToolEvent(tools=tools, stream=stream), flush=True)
-    else:
-        tools = get_tools(message, dynamic=False)
 
     logger.debug(f"Tools used for request: {', '.join([tool.name for tool in tools])}")
 
+    prompt_driver = Defaults.drivers_config.prompt_driver
+    usage = None
+    if model_routing_enabled():
+        route = route_message(
+            message,
+            rulesets=rulesets,
+            tools=tools,
+            dynamic_tools=dynamic,
+            conversation_memory=conversation_memory,
+            tokenizer=prompt_driver.tokenizer,
+            max_small_words=model_routing_max_small_words(),
+            max_small_context_tokens=model_routing_max_small_context_tokens(),
+        )
+        prompt_driver = routed_prompt_driver(
+            prompt_driver,
+            route,
+            small_model=model_routing_small_model(),
+            prepare=prepare_prompt_driver,
+        )
+        usage = RouteUsage(route)
+        EventBus.add_event_listener(usage.event_listener())
+
     agent = Agent(
-        tools=tools,
-        rulesets=rulesets,
-        rules=_default_rules(user_id=user_id),
-        stream=stream,
+        **_prompt_layout(tools, rulesets, user_id=user_id),
+        conversation_memory=conversation_memory,
+        # the abort monitor needs the run streamed, regardless of how it is sent to Slack
+        prompt_driver=(
+            abort_monitor.prompt_driver(prompt_driver)
+            if abort_monitor is not None
+            else evolve(prompt_driver, stream=stream)
+        ),
     )
-    output = agent.run(message).output
+    start = time.perf_counter()
+    try:
+        with abort_monitor.monitoring() if abort_monitor is not None else nullcontext():
+            output = agent.run(message).output
+    finally:
+        if usage is not None:
+            EventBus.remove_event_listener(usage.event_listener())
+            usage.record((time.perf_counter() - start) * 1000)
     if isinstance(output, ErrorArtifact):
+        if isinstance(output.exception, ShadowRunAborted):
+            raise output.exception
         raise ValueError(output.to_text())
     return output.to_text()
 
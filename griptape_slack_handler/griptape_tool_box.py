@@ -1,6 +1,6 @@
 import logging
 import os
-import requests
+from typing import Callable, Optional
 
 from griptape.memory.structure.base_conversation_memory import BaseConversationMemory
 from griptape.tools import (
@@ -10,28 +10,74 @@ from griptape.tools import (
     DateTimeTool,
     GriptapeCloudToolTool,
 )
-from griptape.drivers import TrafilaturaWebScraperDriver, DuckDuckGoWebSearchDriver
+from griptape.drivers import (
+    BaseWebSearchDriver,
+    TrafilaturaWebScraperDriver,
+    DuckDuckGoWebSearchDriver,
+)
 from griptape.loaders import WebLoader
 from griptape.structures import Agent
 from griptape.tasks import PromptTask
 from griptape.rules import Rule
 
 from .griptape.read_only_conversation_memory import ReadOnlyConversationMemory
-from .griptape.github_tool.tool import GitHubUserTool
+from .griptape.tool_output_governor import ToolOutputGovernor
+from .griptape.griptape_cloud import PooledGriptapeCloudToolTool, cloud_tool_cache
+from .http_pool import shared_session
+from .profiler import profile_tool_threads, request_profiler
+from .tracing import tracer
+from .features import (
+    tool_output_governor_enabled,
+    tool_output_max_tokens,
+    tool_output_run_max_tokens,
+    web_cache_enabled,
+    web_page_cache_ttl,
+    web_search_cache_ttl,
+)
 
 logger = logging.getLogger("griptape_slack_handler")
 
 
-def get_tools(message: str, *, dynamic: bool = False) -> list[BaseTool]:
+def get_tools(
+    message: str,
+    *,
+    dynamic: bool = False,
+    stream: bool = False,
+    conversation_memory: Optional[BaseConversationMemory] = None,
+) -> list[BaseTool]:
     """
     Gets tools for the Agent to use. if dynamic=True, the LLM will decide what tools to use
-    based on the user input and the conversation history.
+    based on the user input and the conversation history, which is loaded from the current
+    thread unless an already loaded conversation_memory is given.
     """
-    tools_dict = _init_tools_dict()
+    with tracer.span("get_tools", {"tools.dynamic": dynamic}) as span:
+        tools = _get_tools(
+            message,
+            dynamic=dynamic,
+            stream=stream,
+            conversation_memory=conversation_memory,
+        )
+        span.set_attribute("tools.names", [tool.name for tool in tools])
+        return tools
+
+
+def _get_tools(
+    message: str,
+    *,
+    dynamic: bool,
+    stream: bool,
+    conversation_memory: Optional[BaseConversationMemory],
+) -> list[BaseTool]:
+    cloud_tools_dict = _build_cloud_tools_dict()
     if not dynamic:
-        return [tool for tool, _ in tools_dict.values()]
+        return _init_tools(
+            [*BUILTIN_TOOLS, *cloud_tools_dict], cloud_tools_dict, stream=stream
+        )
 
-    tools_descriptions = {k: description for k, (_, description) in tools_dict.items()}
+    tools_descriptions = {
+        **{name: description for name, (_, description) in BUILTIN_TOOLS.items()},
+        **{name: description for name, (_, description) in cloud_tools_dict.items()},
+    }
 
     # TODO: Use EvalEngine to determine which tools to use
     agent = Agent(
@@ -48,57 +94,176 @@ def get_tools(message: str, *, dynamic: bool = False) -> list[BaseTool]:
                 ],
             ),
         ],
-        conversation_memory=ReadOnlyConversationMemory(),
+        conversation_memory=(
+            ReadOnlyConversationMemory(
+                autoload=False, runs=list(conversation_memory.runs)
+            )
+            if conversation_memory is not None
+            else ReadOnlyConversationMemory()
+        ),
     )
     output = agent.run(message, tools_descriptions).output.value
     tool_names = output.split(",") if output != "None" else []
-    return [tools_dict[tool_name.strip()][0] for tool_name in tool_names]
+    return _init_tools(
+        [tool_name.strip() for tool_name in tool_names], cloud_tools_dict, stream=stream
+    )
 
 
-def _init_tools_dict() -> dict[str, tuple[BaseTool, str]]:
+def get_tool_registry_names() -> list[str]:
     """
-    Initializes the tools dictionary.
-    The return value is a dictionary where the key is the tool name
-    and the value is a tuple containing the Tool object and a description
-    of what the tool can do
+    Gets the names of every tool that can be given to the Agent, without initializing them.
+    Griptape Cloud tools are named by their tool ID.
     """
-    cloud_tools_dict = {}
+    cloud_tool_ids = (
+        os.environ["GT_CLOUD_TOOL_IDS"].split(",")
+        if "GT_CLOUD_TOOL_IDS" in os.environ
+        else []
+    )
+    return [*BUILTIN_TOOLS, *cloud_tool_ids]
 
-    if "GT_CLOUD_TOOL_IDS" in os.environ:
-        cloud_tool_ids = os.environ["GT_CLOUD_TOOL_IDS"].split(",")
-        tools = [GriptapeCloudToolTool(tool_id=tool_id) for tool_id in cloud_tool_ids]
-        cloud_tools_dict = {
-            tool.name: (tool, _get_cloud_tool_description(tool)) for tool in tools
-        }
-    return {
-        "web_scraper": (
-            WebScraperTool(
-                web_loader=WebLoader(web_scraper_driver=TrafilaturaWebScraperDriver()),
-            ),
-            "Can be used find information on a web page. Should be used with web_search.",
-        ),
-        "web_search": (
-            WebSearchTool(
-                web_search_driver=DuckDuckGoWebSearchDriver(),
+
+def _init_tools(
+    tool_names: list[str],
+    cloud_tools_dict: dict[str, tuple[BaseTool, str]],
+    *,
+    stream: bool = False,
+) -> list[BaseTool]:
+    """
+    Initializes the tools with the given names. Built-in tools are only built, and their
+    dependencies only imported, when they are given to the Agent.
+    """
+    tools = [
+        cloud_tools_dict[name][0]
+        if name in cloud_tools_dict
+        else BUILTIN_TOOLS[name][0]()
+        for name in tool_names
+    ]
+    if tool_output_governor_enabled():
+        # one governor for all of the tools, so that the run budget is shared
+        governor = ToolOutputGovernor(
+            max_artifact_tokens=tool_output_max_tokens(),
+            max_run_tokens=tool_output_run_max_tokens(),
+            stream=stream,
+        )
+        for tool in tools:
+            _add_output_governor(tool, governor)
+    if request_profiler is not None:
+        for tool in tools:
+            profile_tool_threads(tool)
+    return tools
+
+
+def _add_output_governor(tool: BaseTool, governor: ToolOutputGovernor) -> None:
+    """
+    Adds the governor after the tool's own output memories, such as its TaskMemory, so it only
+    sees the outputs that go to the LLM. Off prompt tools without output memories are left as
+    they are, the Agent gives them its TaskMemory and their outputs never go to the LLM.
+    Cloud tools are reused across requests, so the governor of an earlier request is replaced.
+    """
+    if tool.output_memory is None and tool.off_prompt:
+        return
+    output_memory = tool.output_memory or {}
+    tool.output_memory = {
+        getattr(activity, "name"): [
+            *(
+                memory
+                for memory in output_memory.get(getattr(activity, "name"), [])
+                if not isinstance(memory, ToolOutputGovernor)
             ),
-            "Can be used to search the web for information. Should be used with web_scraper.",
-        ),
-        "datetime": (
-            DateTimeTool(),
-            "Can be used to find the current date and time.",
-        ),
-        "github": (
-            GitHubUserTool(),
-            "Can be used to interact with Github as a user.",
-        ),
-        **cloud_tools_dict,
+            governor,
+        ]
+        for activity in tool.activities()
     }
 
 
+def _build_cloud_tools_dict() -> dict[str, tuple[BaseTool, str]]:
+    """
+    Builds the Griptape Cloud tools, and the descriptions of what they can do.
+    """
+    if "GT_CLOUD_TOOL_IDS" not in os.environ:
+        return {}
+
+    cloud_tool_ids = os.environ["GT_CLOUD_TOOL_IDS"].split(",")
+    tools = [PooledGriptapeCloudToolTool(tool_id=tool_id) for tool_id in cloud_tool_ids]
+    return {tool.name: (tool, _get_cloud_tool_description(tool)) for tool in tools}
+
+
+def _web_scraper_tool() -> BaseTool:
+    return WebScraperTool(web_loader=_get_web_loader())
+
+
+def _web_search_tool() -> BaseTool:
+    return WebSearchTool(web_search_driver=_get_web_search_driver())
+
+
+def _github_tool() -> BaseTool:
+    from .griptape.github_tool.tool import GitHubUserTool
+
+    return GitHubUserTool()
+
+
+def _get_web_loader() -> WebLoader:
+    """
+    Gets the Web Loader for the web scraper, which caches scraped pages if the web cache is enabled.
+    """
+    if not web_cache_enabled():
+        return WebLoader(web_scraper_driver=TrafilaturaWebScraperDriver())
+
+    from .griptape.web_cache import CachedTrafilaturaWebScraperDriver, CachedWebLoader
+
+    return CachedWebLoader(
+        web_scraper_driver=CachedTrafilaturaWebScraperDriver(ttl=web_page_cache_ttl())
+    )
+
+
+def _get_web_search_driver() -> BaseWebSearchDriver:
+    """
+    Gets the Web Search Driver for web search, which caches results if the web cache is enabled.
+    """
+    if not web_cache_enabled():
+        return DuckDuckGoWebSearchDriver()
+
+    from .griptape.web_cache import CachedDuckDuckGoWebSearchDriver
+
+    return CachedDuckDuckGoWebSearchDriver(ttl=web_search_cache_ttl())
+
+
 def _get_cloud_tool_description(tool: GriptapeCloudToolTool) -> str:
     """
-    Returns a description of the cloud tool.
+    Returns a description of the cloud tool, which is cached if the shared cache is enabled.
     """
-    return requests.get(
-        f"{os.environ['GT_CLOUD_BASE_URL']}/api/tools/{tool.tool_id}"
-    ).json()["description"]
+    if cloud_tool_cache is None:
+        return _fetch_cloud_tool_description(tool)
+    return cloud_tool_cache.get_or_fill(
+        f"description:{tool.tool_id}", lambda: _fetch_cloud_tool_description(tool)
+    )
+
+
+def _fetch_cloud_tool_description(tool: GriptapeCloudToolTool) -> str:
+    return (
+        shared_session()
+        .get(f"{os.environ['GT_CLOUD_BASE_URL']}/api/tools/{tool.tool_id}")
+        .json()["description"]
+    )
+
+
+# The built-in tools, by name, with a function that builds the tool
+# and a description of what the tool can do
+BUILTIN_TOOLS: dict[str, tuple[Callable[[], BaseTool], str]] = {
+    "web_scraper": (
+        _web_scraper_tool,
+        "Can be used find information on a web page. Should be used with web_search.",
+    ),
+    "web_search": (
+        _web_search_tool,
+        "Can be used to search the web for information. Should be used with web_scraper.",
+    ),
+    "datetime": (
+        DateTimeTool,
+        "Can be used to find the current date and time.",
+    ),
+    "github": (
+        _github_tool,
+        "Can be used to interact with Github as a user.",
+    ),
+}
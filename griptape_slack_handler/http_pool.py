@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from slack_sdk import WebClient
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from .features import http_pool_size, http_retries, http_timeout
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from urllib.request import Request
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# http status codes that are retried, for requests whose method can be retried
+RETRY_STATUSES = (502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        metrics.increment("http.connections_opened")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        metrics.increment("http.connections_opened")
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    An HTTP Adapter that keeps connections alive for reuse, gives requests a timeout if they
+    don't have one, and records how many connections it opens and how many are in use.
+    """
+
+    def __init__(self, *, timeout: float, **kwargs) -> None:
+        self.timeout = timeout
+        self._in_use = 0
+        self._in_use_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        with self._in_use_lock:
+            self._in_use += 1
+            in_use = self._in_use
+        metrics.increment("http.requests")
+        metrics.observe("http.pool_utilization", in_use / self._pool_maxsize)
+        start = time.perf_counter()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            metrics.observe("http.request_ms", (time.perf_counter() - start) * 1000)
+            with self._in_use_lock:
+                self._in_use -= 1
+
+
+def shared_session() -> requests.Session:
+    """
+    Gets the process-wide HTTP session. Every host gets a pool of keep-alive connections, so calls
+    to the same host reuse connections instead of paying for a TCP and TLS handshake each time.
+    Connection errors are retried, as are 502, 503, and 504 responses to idempotent requests.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = PooledHTTPAdapter(
+                timeout=http_timeout(),
+                pool_connections=http_pool_size(),
+                pool_maxsize=http_pool_size(),
+                max_retries=Retry(
+                    total=http_retries(),
+                    backoff_factor=0.2,
+                    status_forcelist=RETRY_STATUSES,
+                    raise_on_status=False,
+                ),
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class PooledWebClient(WebClient):
+    """
+    A Slack WebClient that makes its calls with the shared HTTP session. The WebClient opens a
+    new connection for every call otherwise.
+    """
+
+    def _perform_urllib_http_request_internal(
+        self, url: str, req: Request
+    ) -> dict[str, Any]:
+        # proxies and custom SSL contexts are only supported by urllib
+        if self.proxy is not None or self.ssl is not None:
+            return super()._perform_urllib_http_request_internal(url, req)
+
+        response = shared_session().post(
+            url,
+            data=req.data,
+            headers=dict(req.header_items()),
+            timeout=self.timeout,
+        )
+        if response.headers.get("content-type") == "application/gzip":
+            # admin.analytics.getFile
+            return {
+                "status": response.status_code,
+                "headers": response.headers,
+                "body": response.content,
+            }
+        return {
+            "status": response.status_code,
+            "headers": response.headers,
+            "body": response.content.decode(response.encoding or "utf-8"),
+        }
+
+
+def pooled_web_client(
+    client: WebClient, *, team_id: Optional[str] = None
+) -> PooledWebClient:
+    """Gets a copy of the WebClient that makes its calls with the shared HTTP session."""
+    return PooledWebClient(**web_client_kwargs(client, team_id=team_id))
+
+
+def web_client_kwargs(client: WebClient, *, team_id: Optional[str] = None) -> dict:
+    """Gets the arguments to make a copy of the WebClient with."""
+    return {
+        "token": client.token,
+        "base_url": client.base_url,
+        "timeout": client.timeout,
+        "ssl": client.ssl,
+        "proxy": client.proxy,
+        "headers": client.headers,
+        "team_id": team_id,
+        "retry_handlers": client.retry_handlers,
+    }
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from attrs import define, field
+
+from .features import (
+    llm_governor_enabled,
+    llm_governor_state_file,
+    llm_max_concurrency,
+    llm_requests_per_minute,
+    llm_tokens_per_minute,
+)
+from .metrics import metrics
+from .tracing import tracer
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# the Slack thread that LLM calls are made for, calls are queued fairly across threads
+_thread_key: ContextVar[str] = ContextVar("llm_governor_thread_key", default="")
+
+
+@contextmanager
+def llm_thread(thread_ts: Optional[str]) -> Iterator[None]:
+    """Attributes the LLM calls made in the block, and in tasks it submits, to a Slack thread."""
+    token = _thread_key.set(thread_ts or "")
+    try:
+        yield
+    finally:
+        _thread_key.reset(token)
+
+
+@define
+class RateBudget:
+    """
+    Token buckets for the tokens and requests a minute that the LLM provider allows. The buckets
+    refill continuously, and may go below zero when a call uses more tokens than estimated.
+    When a file is given, the buckets are kept in it under a lock, so every process on the host
+    shares them.
+
+    Attributes:
+        tokens_per_minute: The size of the token bucket, 0 for no limit.
+        requests_per_minute: The size of the request bucket, 0 for no limit.
+        path: The file the buckets are shared through, if any.
+    """
+
+    tokens_per_minute: float = field()
+    requests_per_minute: float = field()
+    path: Optional[str] = field(default=None, kw_only=True)
+
+    _state: dict = field(init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self._state = self._full_state()
+
+    def try_take(self, tokens: float, requests: float = 1) -> float:
+        """
+        Takes the tokens and requests if the buckets have them, and gets 0. Otherwise takes nothing,
+        and gets how many seconds until they will.
+        """
+        with self._locked_state() as state:
+            now = time.time()
+            self._refill(state, now)
+            wait = max(
+                state["paused_until"] - now,
+                _shortfall(state["tokens"], tokens, self.tokens_per_minute),
+                _shortfall(state["requests"], requests, self.requests_per_minute),
+                0.0,
+            )
+            if wait == 0:
+                state["tokens"] -= tokens
+                state["requests"] -= requests
+            return wait
+
+    def settle(self, tokens: float) -> None:
+        """Takes more tokens, or gives them back if negative, once a call's actual usage is known."""
+        with self._locked_state() as state:
+            state["tokens"] = min(state["tokens"] - tokens, self.tokens_per_minute)
+
+    def pause(self, seconds: float) -> None:
+        """Admits nothing for the given number of seconds, such as when the provider asks to retry later."""
+        with self._locked_state() as state:
+            state["paused_until"] = max(state["paused_until"], time.time() + seconds)
+
+    def observe(
+        self, *, remaining_tokens: Optional[float], remaining_requests: Optional[float]
+    ) -> None:
+        """Lowers the buckets to what the provider says is left, since other clients share its limits."""
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            if remaining_tokens is not None:
+                state["tokens"] = min(state["tokens"], remaining_tokens)
+            if remaining_requests is not None:
+                state["requests"] = min(state["requests"], remaining_requests)
+
+    def _refill(self, state: dict, now: float) -> None:
+        elapsed = max(now - state["updated"], 0.0)
+        state["tokens"] = min(
+            state["tokens"] + elapsed * self.tokens_per_minute / 60,
+            self.tokens_per_minute,
+        )
+        state["requests"] = min(
+            state["requests"] + elapsed * self.requests_per_minute / 60,
+            self.requests_per_minute,
+        )
+        state["updated"] = now
+
+    def _full_state(self) -> dict:
+        return {
+            "tokens": float(self.tokens_per_minute),
+            "requests": float(self.requests_per_minute),
+            "paused_until": 0.0,
+            "updated": time.time(),
+        }
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[dict]:
+        with self._lock:
+            if not self.path:
+                yield self._state
+                return
+
+            import fcntl
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read())
+                    except ValueError:
+                        # a new file, or one written by a process that died mid-write
+                        state = self._full_state()
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@define
+class Admission:
+    """
+    An LLM call that was admitted by the governor.
+
+    Attributes:
+        tokens: The tokens that were taken from the budget for the call.
+        queue_wait: How many seconds the call waited to be admitted.
+    """
+
+    tokens: float = field(kw_only=True)
+    queue_wait: float = field(kw_only=True)
+
+
+@define
+class LlmGovernor:
+    """
+    Admits LLM calls against the token and request budgets, and a limit on how many are made at
+    the same time. Calls that can't be admitted yet wait in a queue per Slack thread, and the
+    queues take turns, so one busy thread can't hold up the others.
+
+    Attributes:
+        budget: The token and request budgets.
+        max_concurrency: How many calls may be made at the same time.
+    """
+
+    budget: RateBudget = field()
+    max_concurrency: int = field(kw_only=True)
+
+    _queues: dict[str, deque] = field(factory=dict, init=False)
+    _turns: deque = field(factory=deque, init=False)
+    _in_flight: int = field(default=0, init=False)
+    _condition: threading.Condition = field(factory=threading.Condition, init=False)
+
+    def acquire(self, tokens: float) -> Admission:
+        """Waits until a call estimated to use the tokens can be made, and takes them from the budget."""
+        if self.budget.tokens_per_minute > 0:
+            # a call bigger than the bucket could never be admitted otherwise
+            tokens = min(tokens, self.budget.tokens_per_minute)
+        key = _thread_key.get()
+        waiter = object()
+        start = time.perf_counter()
+        with self._condition:
+            if key not in self._queues:
+                self._queues[key] = deque()
+                self._turns.append(key)
+            self._queues[key].append(waiter)
+            try:
+                while True:
+                    if (
+                        self._is_next(key, waiter)
+                        and self._in_flight < self.max_concurrency
+                    ):
+                        # only the next call takes from the budget, which may lock a file,
+                        # so it lets go of the queues meanwhile and others can join or leave
+                        self._condition.release()
+                        try:
+                            wait = self.budget.try_take(tokens)
+                        finally:
+                            self._condition.acquire()
+                        if wait == 0:
+                            break
+                        # shared budgets may be refilled by other processes, look again soon
+                        self._condition.wait(timeout=min(wait, 1.0))
+                    else:
+                        self._condition.wait()
+            finally:
+                self._leave(key, waiter)
+                self._condition.notify_all()
+            self._in_flight += 1
+            in_flight = self._in_flight
+
+        queue_wait = time.perf_counter() - start
+        metrics.increment("llm_governor.admitted")
+        metrics.observe("llm_governor.queue_wait_ms", queue_wait * 1000)
+        metrics.observe("llm_governor.in_flight", in_flight)
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute("llm.queue_wait_ms", queue_wait * 1000)
+        if queue_wait >= 1:
+            logger.debug(f"LLM call waited {queue_wait:.1f}s to be admitted")
+        return Admission(tokens=tokens, queue_wait=queue_wait)
+
+    def release(self, admission: Admission, *, used_tokens: Optional[float]) -> None:
+        """Ends the call, and settles the budget with the tokens it actually used, if they are known."""
+        if used_tokens is not None:
+            self.budget.settle(used_tokens - admission.tokens)
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def rate_limited(self, retry_after: float) -> None:
+        """Holds back every call for as long as the provider asked, after it rejected one."""
+        metrics.increment("llm_governor.rate_limited")
+        logger.warning(f"LLM provider rate limit hit, pausing for {retry_after:.1f}s")
+        self.budget.pause(retry_after)
+        with self._condition:
+            self._condition.notify_all()
+
+    def _is_next(self, key: str, waiter: object) -> bool:
+        return self._turns[0] == key and self._queues[key][0] is waiter
+
+    def _leave(self, key: str, waiter: object) -> None:
+        queue = self._queues[key]
+        was_next = self._turns[0] == key and queue[0] is waiter
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[key]
+            self._turns.remove(key)
+        elif was_next:
+            # the thread had its turn, the next thread goes first
+            self._turns.rotate(-1)
+
+
+def _shortfall(level: float, amount: float, per_minute: float) -> float:
+    # how many seconds until the bucket has the amount, buckets without a limit never run short
+    if per_minute <= 0 or level >= amount:
+        return 0.0
+    return (amount - level) / (per_minute / 60)
+
+
+llm_governor = (
+    LlmGovernor(
+        RateBudget(
+            llm_tokens_per_minute(),
+            llm_requests_per_minute(),
+            path=llm_governor_state_file() or None,
+        ),
+        max_concurrency=llm_max_concurrency(),
+    )
+    if llm_governor_enabled()
+    else None
+)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional
+
+
+class LazyRichHandler(logging.Handler):
+    """
+    A logging Handler that creates a `rich.logging.RichHandler` when the first record is logged,
+    so that rich is only imported if something is logged.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._handler: Optional[logging.Handler] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._handler is None:
+            import rich.logging
+
+            self._handler = rich.logging.RichHandler()
+            self._handler.setFormatter(self.formatter)
+        self._handler.handle(record)
+
+
+def configure_logging() -> None:
+    """Configures logging. The level of the griptape logger is set when Griptape is loaded."""
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(message)s",
+        handlers=[LazyRichHandler()],
+        force=True,
+    )
+
+    logging.getLogger("griptape_slack_handler").setLevel(
+        os.environ.get("LOG_LEVEL", logging.INFO)
+    )
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Optional
+
+from attrs import define, field
+
+logger = logging.getLogger("griptape_slack_handler")
+
+
+@define
+class Metrics:
+    """
+    In-process counters and timings that live for the lifetime of the process.
+
+    Attributes:
+        max_samples: How many of the most recent observations to keep per timing.
+    """
+
+    max_samples: int = field(default=1000, kw_only=True)
+
+    _counters: dict[str, float] = field(factory=dict, init=False)
+    _observations: dict[str, list[float]] = field(factory=dict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Adds the value to the named counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """Records an observation, such as a duration in milliseconds."""
+        with self._lock:
+            samples = self._observations.setdefault(name, [])
+            samples.append(value)
+            if len(samples) > self.max_samples:
+                del samples[0 : len(samples) - self.max_samples]
+
+    def counter(self, name: str) -> float:
+        """Gets the value of the named counter."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def ratio(self, numerator: str, denominator: str) -> float:
+        """Gets the ratio between two counters, or 0 if the denominator is 0."""
+        with self._lock:
+            total = self._counters.get(denominator, 0)
+            return self._counters.get(numerator, 0) / total if total else 0.0
+
+    def percentile(self, name: str, percentile: float) -> Optional[float]:
+        """Gets the percentile (0-100) of the recent observations of the named timing."""
+        with self._lock:
+            samples = sorted(self._observations.get(name, []))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        """Gets a copy of all counters, and a summary of all timings."""
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {
+                name: list(values) for name, values in self._observations.items()
+            }
+
+        summaries = {}
+        for name, values in observations.items():
+            values.sort()
+            summaries[name] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": values[len(values) // 2],
+                "p99": values[min(len(values) - 1, int(len(values) * 0.99))],
+                "max": values[-1],
+            }
+        return {"counters": counters, "observations": summaries}
+
+    def reset(self) -> None:
+        """Clears all counters and timings."""
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+metrics = Metrics()
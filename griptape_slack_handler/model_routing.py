@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+
+from attrs import define, evolve, field, fields
+from griptape.events import EventListener, FinishPromptEvent
+
+from .metrics import metrics
+from .shadow import LINK_PATTERN, MENTION_PATTERN, REQUEST_WORDS, WORD_PATTERN
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from griptape.drivers import BasePromptDriver
+    from griptape.memory.structure import BaseConversationMemory
+    from griptape.rules import Ruleset
+    from griptape.tokenizers import BaseTokenizer
+    from griptape.tools import BaseTool
+
+logger = logging.getLogger("griptape_slack_handler")
+
+SMALL_ROUTE = "small"
+LARGE_ROUTE = "large"
+# the ruleset metadata key that pins the route of the messages a ruleset applies to
+ROUTE_META_KEY = "model_route"
+
+# words that suggest that the answer needs one of the tools
+TOOL_WORDS = {
+    "github",
+    "repo",
+    "repository",
+    "pr",
+    "pull",
+    "issue",
+    "commit",
+    "branch",
+    "diff",
+    "search",
+    "google",
+    "lookup",
+    "latest",
+    "news",
+    "today",
+    "tomorrow",
+    "yesterday",
+    "date",
+    "time",
+    "website",
+    "page",
+    "url",
+    "docs",
+    "documentation",
+}
+CODE_PATTERN = re.compile(r"`|\n\s{2,}\S")
+
+# the small model's Prompt Driver, by the default driver it was copied from and the model
+_small_drivers: dict[tuple[int, str], tuple[BasePromptDriver, BasePromptDriver]] = {}
+_small_drivers_lock = threading.Lock()
+
+# USD per million input and output tokens, by model prefix, https://openai.com/api/pricing
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+
+@define(frozen=True)
+class ModelRoute:
+    """
+    The model that a message is routed to.
+
+    Attributes:
+        name: The route, `small` or `large`.
+        reasons: Why the message was routed there.
+    """
+
+    name: str = field()
+    reasons: list[str] = field(factory=list)
+
+
+def route_message(
+    message: str,
+    *,
+    rulesets: list[Ruleset],
+    tools: list[BaseTool],
+    dynamic_tools: bool,
+    conversation_memory: Optional[BaseConversationMemory],
+    tokenizer: BaseTokenizer,
+    max_small_words: int,
+    max_small_context_tokens: int,
+) -> ModelRoute:
+    """
+    Routes a message to the small model if it is short and simple, and to the large model if it
+    looks like it needs tools, code, or long context. A `model_route` of `small` or `large` in the
+    metadata of any of the rulesets, such as the channel's, pins the route. If the rulesets disagree,
+    the large model is used.
+    """
+    pinned = {
+        str(ruleset.meta.get(ROUTE_META_KEY, "")).lower() for ruleset in rulesets
+    } & {SMALL_ROUTE, LARGE_ROUTE}
+    if pinned:
+        return ModelRoute(
+            name=LARGE_ROUTE if LARGE_ROUTE in pinned else SMALL_ROUTE,
+            reasons=["ruleset"],
+        )
+
+    reasons = []
+    words = WORD_PATTERN.findall(
+        LINK_PATTERN.sub(" ", MENTION_PATTERN.sub(" ", message)).lower()
+    )
+    if dynamic_tools and tools:
+        reasons.append("tools")
+    if not dynamic_tools and TOOL_WORDS.intersection(words):
+        reasons.append("tool_words")
+    if LINK_PATTERN.search(message):
+        reasons.append("link")
+    if CODE_PATTERN.search(message):
+        reasons.append("code")
+    if REQUEST_WORDS.intersection(words):
+        reasons.append("request")
+    if len(words) > max_small_words:
+        reasons.append("long_message")
+    if (
+        conversation_memory is not None
+        and _context_tokens(conversation_memory, tokenizer) > max_small_context_tokens
+    ):
+        reasons.append("long_context")
+    return ModelRoute(
+        name=LARGE_ROUTE if reasons else SMALL_ROUTE, reasons=reasons or ["simple"]
+    )
+
+
+def routed_prompt_driver(
+    prompt_driver: BasePromptDriver,
+    route: ModelRoute,
+    *,
+    small_model: str,
+    prepare: Optional[Callable[[BasePromptDriver], None]] = None,
+) -> BasePromptDriver:
+    """
+    Gets the Prompt Driver for the route. The small model's driver is a copy of the default one,
+    with its settings but a client of its own, since an Azure OpenAI client is bound to the
+    deployment it was built for. It is made once per driver and model, and given to prepare,
+    such as to govern its client, before it is first used.
+    """
+    if route.name != SMALL_ROUTE:
+        return prompt_driver
+    key = (id(prompt_driver), small_model)
+    with _small_drivers_lock:
+        if key not in _small_drivers:
+            small_driver = _small_prompt_driver(prompt_driver, small_model)
+            if prepare is not None:
+                prepare(small_driver)
+            # the default driver is kept with it, so that its id isn't reused
+            _small_drivers[key] = (prompt_driver, small_driver)
+        return _small_drivers[key][1]
+
+
+def _small_prompt_driver(
+    prompt_driver: BasePromptDriver, small_model: str
+) -> BasePromptDriver:
+    init_args = {field.alias for field in fields(type(prompt_driver)) if field.init}
+    changes: dict = {"model": small_model}
+    # Azure OpenAI calls deployments rather than models
+    if "azure_deployment" in init_args:
+        changes["azure_deployment"] = small_model
+    # without a client, the driver builds one for the small model when it is first used
+    if "client" in init_args:
+        changes["client"] = None
+    return evolve(prompt_driver, **changes)
+
+
+@define
+class RouteUsage:
+    """
+    Adds up the tokens and cost of the LLM calls made while answering a message.
+
+    Attributes:
+        route: The route the message was sent to.
+    """
+
+    route: ModelRoute = field()
+
+    input_tokens: float = field(default=0, init=False)
+    output_tokens: float = field(default=0, init=False)
+    cost: float = field(default=0, init=False)
+    _listener: Optional[EventListener] = field(default=None, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def event_listener(self) -> EventListener:
+        if self._listener is None:
+            self._listener = EventListener(
+                self.on_event, event_types=[FinishPromptEvent]
+            )
+        return self._listener
+
+    def on_event(self, event: FinishPromptEvent) -> None:
+        input_tokens = event.input_token_count or 0
+        output_tokens = event.output_token_count or 0
+        price = model_price(event.model)
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            if price is not None:
+                self.cost += (
+                    input_tokens * price[0] + output_tokens * price[1]
+                ) / 1_000_000
+
+    def record(self, latency_ms: float) -> None:
+        """Records the latency, tokens, and cost of the route in the metrics and the current span."""
+        name = self.route.name
+        metrics.increment(f"model_routing.{name}.messages")
+        metrics.observe(f"model_routing.{name}.latency_ms", latency_ms)
+        metrics.increment(f"model_routing.{name}.input_tokens", self.input_tokens)
+        metrics.increment(f"model_routing.{name}.output_tokens", self.output_tokens)
+        metrics.increment(f"model_routing.{name}.cost_usd", self.cost)
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute("llm.route", name)
+            span.set_attribute("llm.route.reasons", self.route.reasons)
+            span.set_attribute("llm.cost_usd", self.cost)
+        logger.debug(
+            f"Answered with the {name} model in {latency_ms:.0f}ms for ${self.cost:.5f}, "
+            f"reasons={', '.join(self.route.reasons)}"
+        )
+
+
+def model_price(model: str) -> Optional[tuple[float, float]]:
+    """Gets the USD price per million input and output tokens of the model, if it is known."""
+    prefix = max(
+        (prefix for prefix in MODEL_PRICES if model.startswith(prefix)),
+        key=len,
+        default=None,
+    )
+    return MODEL_PRICES[prefix] if prefix is not None else None
+
+
+def _context_tokens(
+    conversation_memory: BaseConversationMemory, tokenizer: BaseTokenizer
+) -> int:
+    runs = conversation_memory.runs
+    if conversation_memory.max_runs is not None:
+        runs = runs[-conversation_memory.max_runs :]
+    return sum(
+        tokenizer.count_tokens(run.input.to_text())
+        + tokenizer.count_tokens(run.output.to_text())
+        for run in runs
+    )
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import logging
+from concurrent import futures
+from typing import TYPE_CHECKING, Optional
+
+from attrs import define, field
+from griptape.rules import Ruleset
+from griptape.utils import with_contextvars
+
+from .features import dynamic_tools_enabled, prefetch_workers
+from .griptape_config import thread_conversation_memory
+from .griptape_handler import get_ruleset_names
+from .griptape_tool_box import get_tools
+from .metrics import metrics
+from .profiler import profiled
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from griptape.memory.structure import ConversationMemory
+    from griptape.tools import BaseTool
+
+logger = logging.getLogger("griptape_slack_handler")
+
+executor = futures.ThreadPoolExecutor(
+    max_workers=prefetch_workers(), thread_name_prefix="prefetch"
+)
+
+
+@define
+class Prefetch:
+    """
+    The rulesets, conversation memory, and tools of a response, loading in parallel.
+
+    Attributes:
+        ruleset_futures: The rulesets, one future each, in the order they are given to the Agent.
+        memory_future: The conversation memory of the thread.
+        tools_future: The tools, chosen by the LLM if dynamic tools are enabled.
+        dynamic: Whether the tools are chosen by the LLM.
+    """
+
+    ruleset_futures: list[futures.Future[Ruleset]] = field(kw_only=True)
+    memory_future: futures.Future[ConversationMemory] = field(kw_only=True)
+    tools_future: futures.Future[list[BaseTool]] = field(kw_only=True)
+    dynamic: bool = field(kw_only=True)
+
+    def rulesets(self) -> list[Ruleset]:
+        with tracer.span("get_rulesets") as span:
+            rulesets = [future.result() for future in self.ruleset_futures]
+            span.set_attribute("rulesets.count", len(rulesets))
+            return rulesets
+
+    def conversation_memory(self) -> ConversationMemory:
+        return self.memory_future.result()
+
+    def tools(self) -> list[BaseTool]:
+        return self.tools_future.result()
+
+    def cancel(self) -> None:
+        """Cancels whatever hasn't started yet, such as when a cached response is sent instead."""
+        for future in [*self.ruleset_futures, self.memory_future, self.tools_future]:
+            if future.cancel():
+                metrics.increment("prefetch.cancelled")
+
+
+def prefetch(
+    message: str,
+    *,
+    thread_alias: Optional[str],
+    stream: bool,
+    **kwargs,
+) -> Prefetch:
+    """
+    Starts loading everything a response needs that doesn't depend on anything else, as soon as the
+    event arrives: each ruleset for the ids in kwargs, the conversation memory of the thread, and the
+    tools. Tasks are run with the caller's context, so that their spans are part of its trace.
+    """
+    metrics.increment("prefetch.started")
+    ruleset_futures = [
+        executor.submit(with_contextvars(profiled(Ruleset)), name=name)
+        for name in get_ruleset_names(**kwargs)
+    ]
+    memory_future = executor.submit(
+        with_contextvars(profiled(thread_conversation_memory)), thread_alias
+    )
+
+    dynamic = dynamic_tools_enabled()
+
+    def load_tools() -> list[BaseTool]:
+        # the LLM chooses tools with the conversation for context. Waiting on the memory here
+        # can't deadlock the pool, it was submitted first so it has already been picked up
+        return get_tools(
+            message,
+            dynamic=dynamic,
+            stream=stream,
+            conversation_memory=memory_future.result() if dynamic else None,
+        )
+
+    tools_future = executor.submit(with_contextvars(profiled(load_tools)))
+    return Prefetch(
+        ruleset_futures=ruleset_futures,
+        memory_future=memory_future,
+        tools_future=tools_future,
+        dynamic=dynamic,
+    )
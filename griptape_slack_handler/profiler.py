@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import FrameType
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TypeVar
+
+from attrs import define, field
+
+from .features import (
+    profiling_dir,
+    profiling_enabled,
+    profiling_interval_ms,
+    profiling_max_profiles,
+    profiling_sample_rate,
+    profiling_slow_ms,
+)
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from griptape.tools import BaseTool
+
+logger = logging.getLogger("griptape_slack_handler")
+
+T = TypeVar("T")
+
+
+@define
+class ProfileSession:
+    """
+    The samples of a single request.
+
+    Attributes:
+        metadata: The metadata of the request, such as the Slack event ID.
+        sampled: Whether the request is profiled from the start, instead of once it is slow.
+        sample_from: The monotonic time to start sampling at.
+        thread_ids: The threads working on the request, whose stacks are sampled.
+    """
+
+    metadata: dict = field(kw_only=True)
+    sampled: bool = field(kw_only=True)
+    sample_from: float = field(kw_only=True)
+
+    thread_ids: set[int] = field(factory=set, init=False)
+    stacks: Counter[str] = field(factory=Counter, init=False)
+    samples: int = field(default=0, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def add_thread(self, thread_id: int) -> bool:
+        """Adds the thread to the request, and gets whether it wasn't already part of it."""
+        with self._lock:
+            added = thread_id not in self.thread_ids
+            self.thread_ids.add(thread_id)
+            return added
+
+    def remove_thread(self, thread_id: int) -> None:
+        with self._lock:
+            self.thread_ids.discard(thread_id)
+
+    def threads(self) -> frozenset[int]:
+        with self._lock:
+            return frozenset(self.thread_ids)
+
+
+# the profile session of the request that the current code works on, if it is profiled
+_session: ContextVar[Optional[ProfileSession]] = ContextVar(
+    "profile_session", default=None
+)
+
+
+@define
+class RequestProfiler:
+    """
+    A sampling profiler for requests. A fraction of requests are profiled from the start,
+    and every other request is profiled once it has been running for longer than the slow threshold.
+    Profiles are written as folded stacks, which flamegraph.pl, speedscope, and most flame graph
+    viewers can read, next to a JSON file with the metadata of the request.
+
+    A single background thread samples the stacks of a request's threads with `sys._current_frames`:
+    the thread it is handled on, and the threads that work on it, such as tool threads, which
+    `profile_thread` adds. It sleeps until a request is due to be sampled, so a request that
+    isn't costs a dictionary insert and delete.
+
+    Attributes:
+        directory: The directory to write profiles to.
+        sample_rate: The fraction of requests to profile from the start, between 0 and 1.
+        slow_ms: Requests running longer than this many milliseconds are profiled.
+        interval_ms: How many milliseconds between samples.
+        max_profiles: How many profiles to keep, the oldest are removed first.
+    """
+
+    directory: str = field(kw_only=True)
+    sample_rate: float = field(default=0.01, kw_only=True)
+    slow_ms: float = field(default=5000, kw_only=True)
+    interval_ms: float = field(default=10, kw_only=True)
+    max_profiles: int = field(default=100, kw_only=True)
+
+    _sessions: dict[int, ProfileSession] = field(factory=dict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+    _wake: threading.Event = field(factory=threading.Event, init=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False)
+
+    @contextmanager
+    def profile(self, metadata: dict) -> Iterator[None]:
+        """Profiles the code in the context if the request is sampled, or once it is slow."""
+        start = time.monotonic()
+        sampled = random.random() < self.sample_rate
+        session = ProfileSession(
+            metadata=metadata,
+            sampled=sampled,
+            sample_from=start if sampled else start + self.slow_ms / 1000,
+        )
+        session.add_thread(threading.get_ident())
+        token = _session.set(session)
+        with self._lock:
+            self._sessions[id(session)] = session
+            self._start()
+        try:
+            yield
+        finally:
+            _session.reset(token)
+            with self._lock:
+                del self._sessions[id(session)]
+            duration_ms = (time.monotonic() - start) * 1000
+            if session.samples:
+                self._write(session, duration_ms)
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._sample, name="profiler", daemon=True
+            )
+            self._thread.start()
+        self._wake.set()
+
+    def _sample(self) -> None:
+        interval = self.interval_ms / 1000
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                sessions = [
+                    session
+                    for session in self._sessions.values()
+                    if now >= session.sample_from
+                ]
+                if not sessions:
+                    # sleep until the first request is due, or until a new one starts
+                    self._wake.clear()
+                    timeout = min(
+                        (
+                            session.sample_from - now
+                            for session in self._sessions.values()
+                        ),
+                        default=None,
+                    )
+            if not sessions:
+                self._wake.wait(timeout)
+                continue
+
+            threads = {id(session): session.threads() for session in sessions}
+            stacks = _thread_stacks(
+                sys._current_frames(), frozenset().union(*threads.values())
+            )
+            with self._lock:
+                # skip the sessions that ended while sampling, they are being written
+                for session in sessions:
+                    if id(session) in self._sessions:
+                        session.stacks.update(
+                            stacks[thread_id]
+                            for thread_id in threads[id(session)]
+                            if thread_id in stacks
+                        )
+                        session.samples += 1
+            time.sleep(interval)
+
+    def _write(self, session: ProfileSession, duration_ms: float) -> None:
+        reason = "sampled" if session.sampled else "slow"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{session.metadata.get('event_id') or id(session)}"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{name}.folded"), "w") as f:
+                f.writelines(
+                    f"{stack} {count}\n" for stack, count in session.stacks.items()
+                )
+            with open(os.path.join(self.directory, f"{name}.json"), "w") as f:
+                json.dump(
+                    {
+                        **session.metadata,
+                        "reason": reason,
+                        "duration_ms": duration_ms,
+                        "slow": duration_ms >= self.slow_ms,
+                        "samples": session.samples,
+                        "interval_ms": self.interval_ms,
+                    },
+                    f,
+                )
+            self._prune()
+        except OSError:
+            logger.exception("Error while writing profile")
+            return
+        metrics.increment(f"profiler.{reason}")
+        logger.info(f"Wrote {reason} profile {name} of a {duration_ms:.0f}ms request")
+
+    def _prune(self) -> None:
+        profiles = sorted(
+            entry.path
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".folded")
+        )
+        for path in profiles[: max(len(profiles) - self.max_profiles, 0)]:
+            for file_path in (path, f"{path[: -len('.folded')]}.json"):
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+    """
+    Samples the current thread as part of the request it works on, while in the block, such as
+    in a task that the request submitted to a pool. Does nothing if the request isn't profiled.
+    """
+    session = _session.get()
+    if session is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    added = session.add_thread(thread_id)
+    try:
+        yield
+    finally:
+        # a thread that was already part of the request, such as its own, stays part of it
+        if added:
+            session.remove_thread(thread_id)
+
+
+def profiled(func: Callable[..., T]) -> Callable[..., T]:
+    """Wraps the function to run in `profile_thread`, for tasks that are submitted to a pool."""
+
+    def wrapper(*args, **kwargs) -> T:
+        with profile_thread():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def profile_tool_threads(tool: BaseTool) -> None:
+    """
+    Samples the threads that the tool's activities run on as part of the request they work on.
+    Griptape runs every activity on a thread of its own, with the context of the request.
+    """
+    on_before_run, on_after_run = tool.on_before_run, tool.on_after_run
+
+    def before_run(tool: BaseTool) -> None:
+        session = _session.get()
+        if session is not None:
+            session.add_thread(threading.get_ident())
+        if on_before_run is not None:
+            on_before_run(tool)
+
+    def after_run(tool: BaseTool) -> None:
+        if on_after_run is not None:
+            on_after_run(tool)
+        session = _session.get()
+        if session is not None:
+            session.remove_thread(threading.get_ident())
+
+    tool.on_before_run = before_run
+    tool.on_after_run = after_run
+
+
+def _thread_stacks(
+    frames: dict[int, FrameType], thread_ids: frozenset[int]
+) -> dict[int, str]:
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = {}
+    for thread_id, frame in frames.items():
+        if thread_id not in thread_ids:
+            continue
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(
+                f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+        names.append(thread_names.get(thread_id, str(thread_id)))
+        stacks[thread_id] = ";".join(reversed(names))
+    return stacks
+
+
+request_profiler = (
+    RequestProfiler(
+        directory=profiling_dir(),
+        sample_rate=profiling_sample_rate(),
+        slow_ms=profiling_slow_ms(),
+        interval_ms=profiling_interval_ms(),
+        max_profiles=profiling_max_profiles(),
+    )
+    if profiling_enabled()
+    else None
+)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from attrs import Factory, define, field
+
+from .cache import TtlCache
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from griptape.rules import Ruleset
+
+logger = logging.getLogger("griptape_slack_handler")
+
+MENTION_PATTERN = re.compile(r"<@[\w]+>")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+USER_PLACEHOLDER = "<@{user_id}>"
+# the ruleset metadata key that opts a channel into response caching
+OPT_IN_META_KEY = "response_cache"
+# words that can differ between near-duplicate messages, every other word has to match.
+# Negations are left out, since they flip the meaning of a question.
+STOPWORDS = frozenset(
+    "a an the is are was were be been am i me my we our you your it its this that these those "
+    "to of in on at for with by from as and or so do does did can could would should will "
+    "please hey hi hello thanks pls".split()
+)
+
+
+@define(frozen=True)
+class CachedResponse:
+    """
+    A response stored in the ResponseCache.
+
+    Attributes:
+        response: The response, with the asking user's mentions replaced by a placeholder.
+        words: The normalized words of the message that was answered, in order.
+    """
+
+    response: str = field()
+    words: tuple[str, ...] = field()
+
+
+@define(frozen=True)
+class ResponseCacheHit:
+    """
+    A response found in the ResponseCache.
+
+    Attributes:
+        response: The response, addressed to the user that is asking now.
+        similarity: How similar the asked message is to the cached one, 1.0 for an exact match.
+    """
+
+    response: str = field()
+    similarity: float = field()
+
+
+@define
+class ResponseCache:
+    """
+    Caches Agent responses by normalized message and by a fingerprint of everything else the Agent
+    was given. With fuzzy matching, messages that are not an exact match are looked up in a word
+    index. They are a hit if they have the same words as a cached message with the same fingerprint,
+    apart from stopwords, and their words are similar enough in order.
+
+    Attributes:
+        ttl: How many seconds a response is served for.
+        max_size: The maximum number of responses to keep.
+        fuzzy: Whether near-duplicate messages are a hit, not only exact matches.
+        similarity_threshold: The minimum similarity of the word sequences for a near-duplicate hit.
+    """
+
+    ttl: float = field(default=3600, kw_only=True)
+    max_size: int = field(default=512, kw_only=True)
+    fuzzy: bool = field(default=False, kw_only=True)
+    similarity_threshold: float = field(default=0.85, kw_only=True)
+
+    _entries: TtlCache[CachedResponse] = field(
+        default=Factory(
+            lambda self: TtlCache(max_size=self.max_size, ttl=self.ttl),
+            takes_self=True,
+        ),
+        init=False,
+    )
+    # fingerprint -> word -> cache keys that contain the word
+    _index: dict[str, dict[str, set[str]]] = field(factory=dict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def get(
+        self, message: str, *, fingerprint: str, user_id: str
+    ) -> Optional[ResponseCacheHit]:
+        """Gets a cached response for the message, and records the lookup in the metrics."""
+        start = time.perf_counter()
+        normalized = normalize_message(message)
+        metrics.increment("response_cache.lookups")
+
+        cached = self._entries.get(_key(fingerprint, normalized))
+        similarity = 1.0
+        if cached is None and self.fuzzy:
+            cached, similarity = self._nearest(fingerprint, normalized)
+
+        if cached is None:
+            metrics.increment("response_cache.misses")
+            return None
+
+        metrics.increment("response_cache.hits")
+        if similarity < 1.0:
+            metrics.increment("response_cache.near_hits")
+        metrics.observe("response_cache.hit_ms", (time.perf_counter() - start) * 1000)
+        logger.info(
+            f"Response cache hit (similarity {similarity:.2f}), "
+            f"hit rate {metrics.ratio('response_cache.hits', 'response_cache.lookups'):.0%}"
+        )
+        return ResponseCacheHit(
+            response=cached.response.replace(USER_PLACEHOLDER, f"<@{user_id}>"),
+            similarity=similarity,
+        )
+
+    def set(
+        self, message: str, response: str, *, fingerprint: str, user_id: str
+    ) -> None:
+        """Caches the response to the message."""
+        normalized = normalize_message(message)
+        if not normalized:
+            return
+        key = _key(fingerprint, normalized)
+        words = tuple(normalized.split())
+        self._entries.set(
+            key,
+            CachedResponse(
+                response=response.replace(f"<@{user_id}>", USER_PLACEHOLDER),
+                words=words,
+            ),
+        )
+        if not self.fuzzy:
+            return
+        with self._lock:
+            index = self._index.setdefault(fingerprint, {})
+            for word in words:
+                index.setdefault(word, set()).add(key)
+
+    def _nearest(
+        self, fingerprint: str, normalized: str
+    ) -> tuple[Optional[CachedResponse], float]:
+        words = normalized.split()
+        content_words = _content_words(words)
+        if not words:
+            return None, 0.0
+
+        with self._lock:
+            index = self._index.get(fingerprint, {})
+            candidates = set().union(*(index.get(word, set()) for word in words))
+
+        best, best_similarity = None, 0.0
+        for key in candidates:
+            cached = self._entries.get(key)
+            if cached is None:
+                self._unindex(fingerprint, key)
+                continue
+            # "staging" and "production", or "not", make a different question
+            if _content_words(cached.words) != content_words:
+                continue
+            # "mysql to postgres" and "postgres to mysql" have the same words in another order
+            similarity = SequenceMatcher(a=words, b=cached.words).ratio()
+            if similarity > best_similarity:
+                best, best_similarity = cached, similarity
+
+        if best_similarity < self.similarity_threshold:
+            return None, 0.0
+        return best, best_similarity
+
+    def _unindex(self, fingerprint: str, key: str) -> None:
+        with self._lock:
+            index = self._index.get(fingerprint, {})
+            for word in [word for word, keys in index.items() if key in keys]:
+                index[word].discard(key)
+                if not index[word]:
+                    del index[word]
+
+
+def normalize_message(message: str) -> str:
+    """Lowercases the message, and removes mentions, punctuation, and extra whitespace."""
+    return " ".join(WORD_PATTERN.findall(MENTION_PATTERN.sub(" ", message).lower()))
+
+
+def _content_words(words: Iterable[str]) -> frozenset[str]:
+    return frozenset(word for word in words if word not in STOPWORDS)
+
+
+def channel_opted_in(rulesets: list[Ruleset], *, channel_id: str) -> bool:
+    """
+    Whether the channel opted into response caching, with `response_cache` set to `true` in the
+    metadata of its own ruleset. Rulesets that apply to more than the channel, such as the team's,
+    can't opt it in, since its answers could be served in other channels.
+    """
+    return any(
+        str(ruleset.meta.get(OPT_IN_META_KEY, "")).lower() == "true"
+        for ruleset in rulesets
+        if ruleset.name == channel_id
+    )
+
+
+def agent_fingerprint(
+    rulesets: list[Ruleset], tool_names: list[str], *, channel_id: str
+) -> str:
+    """
+    Fingerprints the channel, and the rulesets and tools the Agent would be given. Responses are
+    only served in the channel they were answered in, so private channels and DMs stay private.
+    Rulesets without rules or metadata do not change the Agent, so they are left out.
+    """
+    return hashlib.sha256(
+        json.dumps(
+            {
+                "channel_id": channel_id,
+                "rulesets": [
+                    {
+                        "name": ruleset.name,
+                        "rules": [rule.to_text() for rule in ruleset.rules],
+                        "meta": ruleset.meta,
+                    }
+                    for ruleset in rulesets
+                    if ruleset.rules or ruleset.meta
+                ],
+                "tools": sorted(tool_names),
+            },
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+def _key(fingerprint: str, normalized: str) -> str:
+    return f"{fingerprint}:{normalized}"
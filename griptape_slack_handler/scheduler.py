@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from attrs import define, field
+
+from .features import (
+    event_scheduler_enabled,
+    scheduler_answer_queue,
+    scheduler_max_active,
+    scheduler_max_deferred_writes,
+    scheduler_shadow_queue,
+)
+from .metrics import metrics
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# answers to direct messages and mentions
+ANSWER = "answer"
+# shadow responses, which are only sent if they turn out to be relevant
+SHADOW = "shadow"
+# messages added to thread history without a response
+PASSIVE = "passive"
+# the classes of events, most important first
+PRIORITIES = (ANSWER, SHADOW, PASSIVE)
+
+
+@define
+class EventScheduler:
+    """
+    Works on Slack events by priority: answers first, then shadow responses, then passive writes
+    to thread history. Up to `max_active` events are worked on at the same time. The rest wait
+    in a bounded queue per class, and an event is shed when its class's queue is full. Passive
+    writes never wait. If they can't run right away, they are deferred until the scheduler is
+    idle, and run in the background.
+
+    Attributes:
+        max_active: How many events are worked on at the same time.
+        queue_limits: How many events of each class may wait their turn.
+        max_deferred: How many passive writes may be deferred, more are dropped.
+    """
+
+    max_active: int = field(kw_only=True)
+    queue_limits: dict[str, int] = field(kw_only=True)
+    max_deferred: int = field(default=1000, kw_only=True)
+
+    _queues: dict[str, deque[object]] = field(
+        factory=lambda: {event_class: deque() for event_class in PRIORITIES},
+        init=False,
+    )
+    _active: int = field(default=0, init=False)
+    _deferred: deque[Callable[[], None]] = field(factory=deque, init=False)
+    _condition: threading.Condition = field(factory=threading.Condition, init=False)
+    _running_deferred: bool = field(default=False, init=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False)
+
+    def run(self, event_class: str, work: Callable[[], None]) -> bool:
+        """Does the work once it is its turn. Gets whether it was done, or shed because its queue was full."""
+        start = time.perf_counter()
+        if not self._enter(event_class):
+            metrics.increment(f"scheduler.{event_class}.shed")
+            logger.warning(f"Overloaded, shedding a {event_class} event")
+            return False
+
+        metrics.observe(
+            f"scheduler.{event_class}.queue_wait_ms",
+            (time.perf_counter() - start) * 1000,
+        )
+        try:
+            work()
+        finally:
+            self._leave()
+        return True
+
+    def defer(self, event_class: str, work: Callable[[], None]) -> None:
+        """Does the work right away if the scheduler is idle, otherwise in the background once it is."""
+        with self._condition:
+            if not self._is_idle():
+                if len(self._deferred) >= self.max_deferred:
+                    metrics.increment(f"scheduler.{event_class}.shed")
+                    logger.warning(f"Overloaded, dropping a {event_class} event")
+                    return
+                self._deferred.append(work)
+                metrics.increment(f"scheduler.{event_class}.deferred")
+                self._start()
+                return
+            self._active += 1
+
+        try:
+            work()
+        finally:
+            self._leave()
+
+    def flush(self, timeout: float = 5) -> None:
+        """Waits for the deferred work to be done, such as before the process exits."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._deferred and not self._running_deferred,
+                timeout=timeout,
+            )
+
+    def _enter(self, event_class: str) -> bool:
+        queue = self._queues[event_class]
+        with self._condition:
+            if self._active < self.max_active and not any(
+                self._queues[waiting_class]
+                for waiting_class in PRIORITIES[: PRIORITIES.index(event_class) + 1]
+            ):
+                self._active += 1
+                return True
+            if len(queue) >= self.queue_limits.get(event_class, 0):
+                return False
+
+            waiter = object()
+            queue.append(waiter)
+            try:
+                self._condition.wait_for(
+                    lambda: self._active < self.max_active
+                    and self._next_waiter() is waiter
+                )
+            finally:
+                queue.remove(waiter)
+                self._condition.notify_all()
+            self._active += 1
+            return True
+
+    def _leave(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _next_waiter(self) -> Optional[object]:
+        for event_class in PRIORITIES:
+            if self._queues[event_class]:
+                return self._queues[event_class][0]
+        return None
+
+    def _is_idle(self) -> bool:
+        return self._active < self.max_active and self._next_waiter() is None
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._work_deferred, name="deferred-events", daemon=True
+            )
+            self._thread.start()
+
+    def _work_deferred(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._deferred and self._is_idle())
+                work = self._deferred.popleft()
+                self._active += 1
+                self._running_deferred = True
+            try:
+                work()
+            except Exception:
+                logger.exception("Error while doing deferred work")
+            finally:
+                with self._condition:
+                    self._running_deferred = False
+                self._leave()
+
+
+event_scheduler = (
+    EventScheduler(
+        max_active=scheduler_max_active(),
+        queue_limits={
+            ANSWER: scheduler_answer_queue(),
+            SHADOW: scheduler_shadow_queue(),
+        },
+        max_deferred=scheduler_max_deferred_writes(),
+    )
+    if event_scheduler_enabled()
+    else None
+)
+if event_scheduler is not None:
+    atexit.register(event_scheduler.flush)
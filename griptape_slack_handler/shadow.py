@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from attrs import define, evolve, field
+from griptape.events import (
+    BaseEvent,
+    EventBus,
+    EventListener,
+    StartPromptEvent,
+    TextChunkEvent,
+    ActionChunkEvent,
+)
+
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from griptape.drivers import BasePromptDriver
+
+logger = logging.getLogger("griptape_slack_handler")
+
+MENTION_PATTERN = re.compile(r"<[@#!][^>]*>")
+LINK_PATTERN = re.compile(r"<https?://[^>]*>")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+QUESTION_WORDS = {
+    "what",
+    "how",
+    "why",
+    "where",
+    "when",
+    "who",
+    "which",
+    "can",
+    "could",
+    "would",
+    "does",
+    "do",
+    "is",
+    "are",
+    "should",
+    "any",
+    "anyone",
+    "has",
+    "have",
+}
+REQUEST_WORDS = {
+    "please",
+    "pls",
+    "help",
+    "explain",
+    "review",
+    "check",
+    "find",
+    "show",
+    "debug",
+    "fix",
+    "summarize",
+    "compare",
+    "recommend",
+    "know",
+}
+ACKNOWLEDGEMENTS = {
+    "thanks",
+    "thank",
+    "thx",
+    "ty",
+    "ok",
+    "okay",
+    "k",
+    "cool",
+    "nice",
+    "great",
+    "awesome",
+    "lol",
+    "haha",
+    "yes",
+    "yep",
+    "no",
+    "nope",
+    "sure",
+    "congrats",
+    "hi",
+    "hello",
+    "hey",
+    "morning",
+    "bye",
+    "you",
+}
+FYI_WORDS = {"fyi", "cc", "heads", "announcement", "reminder"}
+UNSURE_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?:i'?m|i am) (?:not (?:sure|certain|aware)|unsure|unable to)"
+    r"|i (?:don'?t|do not) (?:know|have (?:enough|any|access|information))"
+    r"|i (?:can'?t|cannot|could not|couldn'?t) (?:help|find|determine|access|answer|provide|tell)"
+    r"|(?:not enough|insufficient) (?:information|context)"
+    r"|could you (?:please )?(?:clarify|provide|share)"
+    r")\b"
+)
+
+
+class ShadowRunAborted(ValueError):
+    """
+    Raised from inside a shadow Agent run to cancel it once the partial answer is clearly not worth sending.
+    """
+
+
+class _AbortedRunFilter(logging.Filter):
+    """
+    Drops the traceback Griptape logs for a task that ended because its shadow run was aborted,
+    since an abort is expected and is logged when it is handled.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not (
+            record.exc_info is not None
+            and isinstance(record.exc_info[1], ShadowRunAborted)
+        )
+
+
+_aborted_run_filter = _AbortedRunFilter()
+# how many shadow runs are using the filter, it is only attached while there are any
+_aborted_run_filter_users = 0
+_aborted_run_filter_lock = threading.Lock()
+
+
+@contextmanager
+def _quiet_aborted_runs() -> Iterator[None]:
+    global _aborted_run_filter_users
+    griptape_logger = logging.getLogger("griptape")
+    with _aborted_run_filter_lock:
+        _aborted_run_filter_users += 1
+        griptape_logger.addFilter(_aborted_run_filter)
+    try:
+        yield
+    finally:
+        with _aborted_run_filter_lock:
+            _aborted_run_filter_users -= 1
+            if not _aborted_run_filter_users:
+                griptape_logger.removeFilter(_aborted_run_filter)
+
+
+@define(frozen=True)
+class ShadowGateDecision:
+    """
+    The result of screening a shadow mention before running the Agent.
+
+    Attributes:
+        attempt: Whether the Agent should run.
+        score: How answerable the message looks, from 0 to 1.
+        confidence: How confident the pre-gate is in its decision, from 0 to 1.
+        reasons: The signals that contributed to the score.
+    """
+
+    attempt: bool = field()
+    score: float = field()
+    confidence: float = field()
+    reasons: list[str] = field(factory=list)
+
+
+def shadow_pre_gate(
+    message: str, *, context: list[str], threshold: float
+) -> ShadowGateDecision:
+    """
+    Scores how likely it is that the Agent can give a useful answer to a shadow mention, using only
+    the message text and the recent messages in the thread. Records the decision in the metrics.
+    """
+    score, reasons = _score_message(message, context)
+    attempt = score >= threshold
+    # distance from the threshold, scaled to 0-1 on whichever side the score landed
+    span = (1 - threshold) if attempt else threshold
+    confidence = min(1.0, abs(score - threshold) / span) if span else 1.0
+    decision = ShadowGateDecision(
+        attempt=attempt, score=score, confidence=confidence, reasons=reasons
+    )
+
+    metrics.increment("shadow.pre_gate.evaluated")
+    metrics.observe("shadow.pre_gate.confidence", confidence)
+    if not attempt:
+        metrics.increment("shadow.pre_gate.skipped")
+    logger.info(
+        f"Shadow pre-gate {'attempting' if attempt else 'skipping'} response: "
+        f"score={score:.2f}, confidence={confidence:.2f}, reasons={', '.join(reasons) or 'none'}, "
+        f"gated out so far={metrics.ratio('shadow.pre_gate.skipped', 'shadow.pre_gate.evaluated'):.0%}"
+    )
+    return decision
+
+
+@define(kw_only=True)
+class ShadowAbortMonitor:
+    """
+    Judges the partial output of a streamed shadow run, and aborts the run as soon as the answer is
+    clearly an "I'm not sure" or a restatement of the question.
+
+    Attributes:
+        message: The message the shadow run is answering.
+        min_chars: How much of an answer to wait for before judging it.
+        max_chars: How much of an answer to judge. Answers that look fine up to here are left alone.
+    """
+
+    message: str = field()
+    min_chars: int = field(default=200)
+    max_chars: int = field(default=600)
+
+    _text: str = field(default="", init=False)
+    _has_actions: bool = field(default=False, init=False)
+    _owner: int = field(factory=threading.get_ident, init=False)
+    _listener: Optional[EventListener] = field(default=None, init=False)
+
+    def prompt_driver(self, prompt_driver: BasePromptDriver) -> BasePromptDriver:
+        """Gets a streaming copy of the Prompt Driver that does not retry aborted runs."""
+        return evolve(
+            prompt_driver,
+            stream=True,
+            ignored_exception_types=(
+                *prompt_driver.ignored_exception_types,
+                ShadowRunAborted,
+            ),
+        )
+
+    @contextmanager
+    def monitoring(self) -> Iterator[None]:
+        """Judges the output of the runs in the block, and keeps Griptape from logging their aborts as errors."""
+        EventBus.add_event_listener(self.event_listener())
+        try:
+            with _quiet_aborted_runs():
+                yield
+        finally:
+            EventBus.remove_event_listener(self.event_listener())
+
+    def event_listener(self) -> EventListener:
+        """Gets the Event Listener that feeds the streamed output to the monitor."""
+        if self._listener is None:
+            self._listener = EventListener(
+                self.on_event,
+                event_types=[StartPromptEvent, TextChunkEvent, ActionChunkEvent],
+            )
+        return self._listener
+
+    def on_event(self, event: BaseEvent) -> None:
+        # tools run on other threads, only the run's own prompts are judged
+        if threading.get_ident() != self._owner:
+            return None
+
+        if isinstance(event, StartPromptEvent):
+            self._text = ""
+            self._has_actions = False
+        elif isinstance(event, ActionChunkEvent):
+            # text streamed alongside actions is the LLM thinking, not its answer
+            self._has_actions = True
+        elif isinstance(event, TextChunkEvent) and not self._has_actions:
+            checked = len(self._text)
+            self._text += event.token
+            if checked < self.max_chars and len(self._text) >= self.min_chars:
+                self._judge()
+        return None
+
+    def _judge(self) -> None:
+        answer = self._text[: self.max_chars]
+        if UNSURE_PATTERN.search(answer.lower()):
+            self._abort("unsure")
+        if _is_restatement(self.message, answer):
+            self._abort("restatement")
+
+    def _abort(self, reason: str) -> None:
+        metrics.increment("shadow.abort.aborted")
+        metrics.increment(f"shadow.abort.{reason}")
+        metrics.observe("shadow.abort.chars", len(self._text))
+        raise ShadowRunAborted(
+            f"shadow answer looks like {reason} after {len(self._text)} characters"
+        )
+
+
+def _is_restatement(message: str, answer: str) -> bool:
+    message_words = set(WORD_PATTERN.findall(MENTION_PATTERN.sub(" ", message).lower()))
+    answer_words = WORD_PATTERN.findall(answer.lower())
+    if not message_words or not answer_words:
+        return False
+    repeated = sum(1 for word in answer_words if word in message_words)
+    return repeated / len(answer_words) >= 0.7
+
+
+def _score_message(message: str, context: list[str]) -> tuple[float, list[str]]:
+    has_link = LINK_PATTERN.search(message) is not None
+    text = LINK_PATTERN.sub(" link ", MENTION_PATTERN.sub(" ", message)).strip()
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return 0.0, ["only mentions"]
+
+    # plain statements, such as problem reports, pass the default threshold on their own
+    score = 0.45
+    reasons = []
+    if all(word in ACKNOWLEDGEMENTS for word in words):
+        return 0.05, ["acknowledgement"]
+
+    if "?" in text:
+        score += 0.25
+        reasons.append("question mark")
+    if words[0] in QUESTION_WORDS:
+        score += 0.2
+        reasons.append("interrogative")
+    is_request = bool(REQUEST_WORDS.intersection(words))
+    if is_request:
+        score += 0.15
+        reasons.append("request")
+    if "`" in text or has_link:
+        score += 0.1
+        reasons.append("code or link")
+    if words[0] in FYI_WORDS or message.lower().lstrip().startswith("cc "):
+        score -= 0.25
+        reasons.append("fyi")
+    if len(words) < 4 and "?" not in text and not is_request:
+        score -= 0.2
+        reasons.append("short statement")
+    if context and "?" not in text and any("?" in previous for previous in context):
+        # a statement in a thread that already has an open question is often follow-up detail
+        score += 0.1
+        reasons.append("thread has question")
+
+    return max(0.0, min(1.0, score)), reasons
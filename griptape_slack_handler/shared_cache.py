@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from attrs import Factory, define, field
+
+from .cache import TtlCache
+from .features import shared_cache_enabled, shared_cache_file, shared_cache_max_mb
+from .metrics import metrics
+
+logger = logging.getLogger("griptape_slack_handler")
+
+V = TypeVar("V")
+
+# shared entries start with a format version and the wall clock time they expire at, 0 for never
+HEADER = struct.Struct("!Bd")
+HEADER_VERSION = 1
+# how many seconds a process may take to fill an entry before others stop waiting for it
+FILL_LEASE = 30.0
+# how often processes waiting for another process to fill an entry look for it
+FILL_POLL = 0.05
+# how many seconds may pass before reading a shared entry marks it as recently used again
+TOUCH_INTERVAL = 60.0
+# how much of its size limit may be written to the shared tier between checks of its size
+CHECK_SIZE_EVERY = 0.05
+
+
+class CacheTier(ABC):
+    """A store of byte strings that a Tiered Cache keeps its entries in, such as one shared by every process."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Gets the entry for the key, if it is stored."""
+
+    @abstractmethod
+    def set(self, key: str, data: bytes) -> None:
+        """Stores the entry for the key."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes the entry for the key."""
+
+    def try_lease(self, key: str, seconds: float) -> bool:
+        """
+        Takes the right to fill the entry for the key for the given number of seconds, if no other
+        process has it. Tiers that can't coordinate processes always grant it.
+        """
+        return True
+
+    def release_lease(self, key: str) -> None:
+        """Gives up the right to fill the entry for the key."""
+
+
+@define
+class SqliteCacheTier(CacheTier):
+    """
+    A size-bounded store of byte strings in a SQLite file, shared by every process that uses the
+    same file. Once it grows past its size limit, the least recently read entries are evicted first.
+    Errors are logged and treated as misses, so a broken file never breaks a response.
+
+    Attributes:
+        path: The SQLite file to store the entries in.
+        name: The name the tier reports its metrics under.
+        max_bytes: The maximum total size of the stored entries.
+    """
+
+    path: str = field(kw_only=True)
+    name: str = field(default="shared_cache", kw_only=True)
+    max_bytes: int = field(default=256 * 1024 * 1024, kw_only=True)
+
+    _connections: threading.local = field(factory=threading.local, init=False)
+    _written: Optional[int] = field(default=None, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value, used_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, used_at = row
+            now = time.time()
+            # marking every read would turn reads into writes, which processes take turns on
+            if now - used_at > TOUCH_INTERVAL:
+                connection.execute(
+                    "UPDATE entries SET used_at = ? WHERE key = ?", (now, key)
+                )
+            return bytes(value)
+        except sqlite3.Error:
+            logger.exception(f"Error while reading {self.name} entry {key}")
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """Stores the entry for the key. Entries larger than the whole tier are not stored."""
+        if len(data) > self.max_bytes:
+            return
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, used_at) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            with self._lock:
+                # the first write checks the size, since other processes may have filled the file
+                written = (self._written or 0) + len(data)
+                check_size = (
+                    self._written is None
+                    or written >= self.max_bytes * CHECK_SIZE_EVERY
+                )
+                self._written = 0 if check_size else written
+            if check_size:
+                self._evict(connection)
+        except sqlite3.Error:
+            logger.exception(f"Error while writing {self.name} entry {key}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error:
+            logger.exception(f"Error while deleting {self.name} entry {key}")
+
+    def try_lease(self, key: str, seconds: float) -> bool:
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute(
+                "DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)",
+                (key, now + seconds),
+            )
+            return cursor.rowcount == 1
+        except sqlite3.Error:
+            logger.exception(f"Error while leasing {self.name} entry {key}")
+            return True
+
+    def release_lease(self, key: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM leases WHERE key = ?", (key,))
+        except sqlite3.Error:
+            logger.exception(f"Error while releasing {self.name} entry {key}")
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        (size,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if size <= self.max_bytes:
+            return
+
+        # evict down to 90% so that every write near the limit doesn't trigger a scan
+        target = self.max_bytes * 0.9
+        evicted = []
+        cursor = connection.execute("SELECT key, size FROM entries ORDER BY used_at")
+        for key, entry_size in cursor:
+            if size <= target:
+                break
+            evicted.append((key,))
+            size -= entry_size
+        cursor.close()
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        metrics.increment(f"{self.name}.evictions", len(evicted))
+
+    def _connection(self) -> sqlite3.Connection:
+        # connections can't be shared across threads, or used by a forked process
+        if getattr(self._connections, "pid", None) != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self._connections.connection = connection
+            self._connections.pid = os.getpid()
+        return self._connections.connection
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+@define
+class TieredCache(Generic[V]):
+    """
+    A cache with an in-process LRU tier in front of an optional shared tier, such as a SQLite file
+    every worker process uses. Values are serialized for the shared tier, as JSON by default.
+    Fills are single-flight: one caller fills a missing entry while the others wait for it, both
+    within the process, and across processes if the shared tier can lease entries.
+
+    Lookups are reported as the `{name}.lookups`, `{name}.local_hits`, `{name}.shared_hits`, and
+    `{name}.misses` metrics.
+
+    Attributes:
+        name: The name the cache reports its metrics under.
+        ttl: How many seconds an entry is fresh for, None for never expiring.
+        local_ttl: How many seconds the in-process tier keeps an entry for before looking in the
+            shared tier again, defaults to the entry's TTL. 0 keeps nothing in the process.
+        max_size: The maximum number of entries in the in-process tier.
+        shared: The shared tier, if any.
+        dumps: Serializes a value for the shared tier.
+        loads: Deserializes a value from the shared tier.
+    """
+
+    name: str = field(kw_only=True)
+    ttl: Optional[float] = field(default=300, kw_only=True)
+    local_ttl: Optional[float] = field(default=None, kw_only=True)
+    max_size: int = field(default=1024, kw_only=True)
+    shared: Optional[CacheTier] = field(default=None, kw_only=True)
+    dumps: Callable[[V], bytes] = field(default=_json_dumps, kw_only=True)
+    loads: Callable[[bytes], V] = field(default=_json_loads, kw_only=True)
+
+    _local: TtlCache[V] = field(
+        default=Factory(lambda self: TtlCache(max_size=self.max_size), takes_self=True),
+        init=False,
+    )
+    _filling: dict[str, Future] = field(factory=dict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def get(self, key: str) -> Optional[V]:
+        """Gets the value for the key if it is cached and fresh in either tier."""
+        metrics.increment(f"{self.name}.lookups")
+        value = self._local.get(key)
+        if value is not None:
+            metrics.increment(f"{self.name}.local_hits")
+            return value
+        value = self._get_shared(key)
+        if value is not None:
+            metrics.increment(f"{self.name}.shared_hits")
+            return value
+        metrics.increment(f"{self.name}.misses")
+        return None
+
+    def set(self, key: str, value: V, *, ttl: Optional[float] = None) -> None:
+        """Caches the value for the key in both tiers. The TTL defaults to the cache's TTL."""
+        ttl = self.ttl if ttl is None else ttl
+        self._set_local(key, value, ttl)
+        if self.shared is None:
+            return
+        try:
+            data = self.dumps(value)
+        except Exception:
+            logger.exception(f"Error while serializing {self.name} entry {key}")
+            return
+        expires_at = 0.0 if ttl is None else time.time() + ttl
+        self.shared.set(key, HEADER.pack(HEADER_VERSION, expires_at) + data)
+
+    def delete(self, key: str) -> None:
+        """Removes the key from both tiers."""
+        self._local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def get_or_fill(
+        self, key: str, fill: Callable[[], V], *, ttl: Optional[float] = None
+    ) -> V:
+        """
+        Gets the value for the key, filling it with the function if it is not cached. Callers that
+        miss while another caller is filling the same key wait for its value instead.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            future = self._filling.get(key)
+            filling = future is None
+            if filling:
+                future = self._filling[key] = Future()
+        if not filling:
+            metrics.increment(f"{self.name}.fill_waits")
+            return future.result()
+
+        try:
+            value = self._fill(key, fill, ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._filling[key]
+
+    def _fill(self, key: str, fill: Callable[[], V], ttl: Optional[float]) -> V:
+        # another caller may have filled the entry since this one missed
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        leased = self.shared is None
+        if not leased:
+            deadline = time.monotonic() + FILL_LEASE
+            while not (leased := self.shared.try_lease(key, FILL_LEASE)):
+                if time.monotonic() >= deadline:
+                    # the process that had the lease is taking too long, or died
+                    break
+                time.sleep(FILL_POLL)
+                value = self._get_shared(key)
+                if value is not None:
+                    metrics.increment(f"{self.name}.fill_waits")
+                    return value
+
+        try:
+            value = fill()
+            metrics.increment(f"{self.name}.fills")
+            if value is not None:
+                self.set(key, value, ttl=ttl)
+            return value
+        finally:
+            if leased and self.shared is not None:
+                self.shared.release_lease(key)
+
+    def _get_shared(self, key: str) -> Optional[V]:
+        if self.shared is None:
+            return None
+        data = self.shared.get(key)
+        if data is None or len(data) < HEADER.size:
+            return None
+        version, expires_at = HEADER.unpack_from(data)
+        if version != HEADER_VERSION:
+            return None
+        ttl = None if expires_at == 0 else expires_at - time.time()
+        if ttl is not None and ttl <= 0:
+            return None
+        try:
+            value = self.loads(data[HEADER.size :])
+        except Exception:
+            logger.exception(f"Error while deserializing {self.name} entry {key}")
+            return None
+        self._set_local(key, value, ttl)
+        return value
+
+    def _set_local(self, key: str, value: V, ttl: Optional[float]) -> None:
+        if self.local_ttl is not None:
+            ttl = self.local_ttl if ttl is None else min(ttl, self.local_ttl)
+        if ttl is None:
+            ttl = math.inf
+        if ttl > 0:
+            self._local.set(key, value, ttl=ttl)
+
+
+_shared_tier: Optional[SqliteCacheTier] = None
+_shared_tier_lock = threading.Lock()
+
+
+def shared_tier() -> Optional[CacheTier]:
+    """Gets the tier shared by every worker process on the host, if the shared cache is enabled."""
+    global _shared_tier
+
+    if not shared_cache_enabled():
+        return None
+    with _shared_tier_lock:
+        if _shared_tier is None:
+            _shared_tier = SqliteCacheTier(
+                path=shared_cache_file(),
+                max_bytes=shared_cache_max_mb() * 1024 * 1024,
+            )
+        return _shared_tier
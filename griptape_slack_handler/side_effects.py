@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Callable, Optional
+
+from attrs import define, field
+
+from .features import side_effect_settle_timeout, side_effect_workers
+from .metrics import metrics
+from .slack_util import react_to_message, typing_message
+
+if TYPE_CHECKING:
+    from slack_sdk import WebClient
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# how many threads the last typing status is remembered for
+MAX_REMEMBERED_STATUSES = 1000
+
+
+@define
+class SideEffect:
+    """
+    A Slack call that a response doesn't need to wait on.
+
+    Attributes:
+        call: Makes the call.
+        status: The typing status it sets, if it sets one.
+    """
+
+    call: Callable[[], None] = field(kw_only=True)
+    status: Optional[str] = field(default=None, kw_only=True)
+
+
+@define
+class SideEffectLane:
+    """
+    Makes cosmetic Slack calls, such as setting the typing status and reacting to messages, in the
+    background so that responses never wait on them. Calls for the same Slack thread are made one at
+    a time, in order. A typing status is dropped if it is the same as the thread's current one,
+    and only the latest of the statuses waiting to be set for a thread is set.
+
+    Attributes:
+        workers: How many threads make the calls. 0 makes them on the calling thread.
+        settle_timeout: How many seconds a response waits for a thread's call in progress
+            before posting.
+    """
+
+    workers: int = field(default=4, kw_only=True)
+    settle_timeout: float = field(default=0.5, kw_only=True)
+
+    _queues: dict[tuple[str, str], deque[SideEffect]] = field(factory=dict, init=False)
+    _ready: deque[tuple[str, str]] = field(factory=deque, init=False)
+    _running: set[tuple[str, str]] = field(factory=set, init=False)
+    _statuses: OrderedDict[tuple[str, str], str] = field(
+        factory=OrderedDict, init=False
+    )
+    _condition: threading.Condition = field(factory=threading.Condition, init=False)
+    _threads: list[threading.Thread] = field(factory=list, init=False)
+
+    def set_status(
+        self, message: str = "", *, thread_ts: str, channel: str, client: WebClient
+    ) -> None:
+        """Sets the typing status of the thread, like `typing_message`."""
+        self._submit(
+            (channel, thread_ts),
+            SideEffect(
+                call=lambda: typing_message(
+                    message, thread_ts=thread_ts, channel=channel, client=client
+                ),
+                status=message,
+            ),
+        )
+
+    def react(
+        self,
+        reaction: str,
+        *,
+        ts: str,
+        thread_ts: str,
+        channel: str,
+        client: WebClient,
+    ) -> None:
+        """Reacts to a message in the thread, like `react_to_message`."""
+        self._submit(
+            (channel, thread_ts),
+            SideEffect(
+                call=lambda: react_to_message(
+                    reaction, ts=ts, channel=channel, client=client
+                )
+            ),
+        )
+
+    def settle(
+        self, *, thread_ts: str, channel: str, timeout: Optional[float] = None
+    ) -> None:
+        """
+        Drops the statuses waiting to be set for a thread, and waits for a call already being made
+        for it to finish, for up to `timeout` seconds (`settle_timeout` by default). Slack clears the
+        typing status when a message is posted, so this is called before posting one, so that an
+        earlier status doesn't show up after it.
+        """
+        key = (channel, thread_ts)
+        with self._condition:
+            queue = self._queues.get(key)
+            if queue is not None:
+                dropped = [effect for effect in queue if effect.status is not None]
+                metrics.increment("side_effects.dropped", len(dropped))
+                queue = deque(effect for effect in queue if effect.status is None)
+                if queue:
+                    self._queues[key] = queue
+                else:
+                    del self._queues[key]
+            self._condition.wait_for(
+                lambda: key not in self._running,
+                timeout=self.settle_timeout if timeout is None else timeout,
+            )
+            self._statuses.pop(key, None)
+
+    def flush(self, timeout: float = 5) -> None:
+        """Waits for every call to be made, such as before the process exits."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._queues and not self._running, timeout=timeout
+            )
+
+    def _submit(self, key: tuple[str, str], effect: SideEffect) -> None:
+        from griptape.utils import with_contextvars
+
+        effect.call = with_contextvars(effect.call)
+        with self._condition:
+            queue = self._queues.get(key)
+            pending_status = (
+                queue[-1].status if queue and queue[-1].status is not None else None
+            )
+            current_status = (
+                pending_status
+                if pending_status is not None
+                else self._statuses.get(key)
+            )
+            if effect.status is not None and effect.status == current_status:
+                metrics.increment("side_effects.dropped")
+                return
+            if self.workers > 0:
+                if effect.status is not None and pending_status is not None:
+                    # the status that was waiting would be replaced right away
+                    queue[-1] = effect
+                    metrics.increment("side_effects.coalesced")
+                    return
+                self._queues.setdefault(key, deque()).append(effect)
+                if key not in self._running and key not in self._ready:
+                    self._ready.append(key)
+                self._start()
+                self._condition.notify()
+                return
+
+        if self._make(effect):
+            with self._condition:
+                self._remember_status(key, effect.status)
+
+    def _start(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name="side-effects", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._ready)
+                key = self._ready.popleft()
+                queue = self._queues.get(key)
+                if not queue:
+                    # settled while it was waiting
+                    continue
+                effect = queue.popleft()
+                if not queue:
+                    del self._queues[key]
+                self._running.add(key)
+
+            if self._make(effect):
+                with self._condition:
+                    self._remember_status(key, effect.status)
+
+            with self._condition:
+                self._running.discard(key)
+                if key in self._queues:
+                    self._ready.append(key)
+                self._condition.notify_all()
+
+    def _make(self, effect: SideEffect) -> bool:
+        start = time.perf_counter()
+        try:
+            effect.call()
+        except Exception:
+            metrics.increment("side_effects.errors")
+            logger.exception("Error while making a background Slack call")
+            return False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.observe("side_effects.call_ms", elapsed_ms)
+        if self.workers > 0:
+            # the time the response would have waited for the call
+            metrics.increment("side_effects.saved_ms", elapsed_ms)
+        return True
+
+    def _remember_status(self, key: tuple[str, str], status: Optional[str]) -> None:
+        if status is None:
+            return
+        self._statuses[key] = status
+        self._statuses.move_to_end(key)
+        while len(self._statuses) > MAX_REMEMBERED_STATUSES:
+            self._statuses.popitem(last=False)
+
+
+side_effects = SideEffectLane(
+    workers=side_effect_workers(), settle_timeout=side_effect_settle_timeout()
+)
+atexit.register(side_effects.flush)
@@ -1,31 +1,46 @@
+from __future__ import annotations
+
 import os
+import json
 import logging
-from slack_bolt import App, BoltRequest
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Callable, Optional
+
+from slack_bolt import App, BoltContext, BoltRequest, BoltResponse
 from slack_sdk import WebClient
 
 from .slack_util import (
     error_payload,
+    markdown_payload,
     send_message,
     send_message_blocks,
-    typing_message,
-    react_to_message,
     integer_to_number_string,
+    get_thread_messages,
+    cached_block,
 )
-from .griptape_handler import (
-    agent,
-    get_rulesets,
-    try_add_to_thread,
-    is_relevant_response,
-)
-from .griptape_event_handlers import event_listeners
+from .side_effects import side_effects
+from .profiler import request_profiler
+from .http_pool import PooledWebClient, pooled_web_client
+from .llm_governor import llm_thread
+from .scheduler import ANSWER, PASSIVE, SHADOW, event_scheduler
+from .traced_web_client import traced_web_client
+from .tracing import tracer
 from .features import (
     stream_output_enabled,
     thread_history_enabled,
     shadow_user_enabled,
     shadow_user_always_respond_enabled,
+    shadow_pre_gate_enabled,
+    shadow_pre_gate_threshold,
+    shadow_pre_gate_context_messages,
+    shadow_early_abort_enabled,
     assistant_typing_message_enabled,
+    prefetch_enabled,
 )
 
+if TYPE_CHECKING:
+    from .prefetch import Prefetch
+
 logger = logging.getLogger("griptape_slack_handler")
 
 app: App = App(
@@ -33,9 +48,46 @@ app: App = App(
     signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
     logger=logger,
     process_before_response=True,  # required because of threading
+    # the token is verified by the first event that needs it, rather than on import
+    token_verification_enabled=False,
+    # lets the bot be pointed at a stand-in for the Slack API, such as the one in bench/
+    **(
+        {
+            "client": PooledWebClient(
+                token=os.environ.get("SLACK_BOT_TOKEN"),
+                base_url=os.environ["SLACK_API_URL"],
+            )
+        }
+        if "SLACK_API_URL" in os.environ
+        else {}
+    ),
 )
 
 SHADOW_USER_ID = os.environ.get("SHADOW_USER_ID")
+# sent as a plain reply instead of an answer when the bot is too overloaded to queue it
+BUSY_MESSAGE = (
+    "I'm answering a lot of messages right now, please try again in a minute."
+)
+
+
+@app.middleware
+def use_pooled_web_client(context: BoltContext, next: Callable[[], BoltResponse]):
+    # Bolt creates a new client for each request, swap it for one that reuses connections,
+    # and that traces its calls if tracing is enabled
+    if context.client is not None:
+        context["client"] = (
+            traced_web_client if tracer.enabled else pooled_web_client
+        )(context.client, team_id=context.team_id)
+    return next()
+
+
+@app.middleware
+def attribute_llm_calls(body: dict, next: Callable[[], BoltResponse]):
+    # the LLM governor queues calls fairly across the Slack threads they are made for
+    event = body.get("event", {})
+    with llm_thread(event.get("thread_ts", event.get("ts"))):
+        return next()
+
 
 ### Slack Event Handlers ###
 
@@ -47,13 +99,7 @@ def message(body: dict, payload: dict, client: WebClient):
     # will respond to every message in every channel it is in
     if payload.get("channel_type") == "im":
         logger.debug("Responding to direct message")
-        typing_message(
-            message="recieved the message...",
-            thread_ts=payload.get("thread_ts", payload["ts"]),
-            channel=payload["channel"],
-            client=client,
-        )
-        respond_in_thread(body, payload, client)
+        _answer(body, payload, client)
     # if the message body @ mentions the shadow user, then call the shadow_resopnse function
     elif (
         shadow_user_enabled()
@@ -61,46 +107,104 @@ def message(body: dict, payload: dict, client: WebClient):
         and SHADOW_USER_ID in payload.get("text", "")
     ):
         logger.debug("Shadow user mentioned")
-        typing_message(
-            message="recieved the message...",
-            thread_ts=payload.get("thread_ts", payload["ts"]),
-            channel=payload["channel"],
-            client=client,
-        )
-        shadow_respond_in_thread(body, payload, client)
+
+        def shadow_respond():
+            side_effects.set_status(
+                message="recieved the message...",
+                thread_ts=payload.get("thread_ts", payload["ts"]),
+                channel=payload["channel"],
+                client=client,
+            )
+            shadow_respond_in_thread(body, payload, client)
+
+        # a shadow response is only a suggestion, it is skipped if the bot is overloaded
+        if event_scheduler is not None:
+            event_scheduler.run(SHADOW, shadow_respond)
+        else:
+            shadow_respond()
     elif payload.get("subtype") != "bot_message" and thread_history_enabled():
+        from .griptape_handler import try_add_to_thread
+
         logger.debug("Adding message to thread without responding")
+
         # add the message to the cloud thread
         # so the bot can use it for context when
         # responding to future messages in a thread
-        try_add_to_thread(
-            payload["text"],
-            thread_alias=payload.get("thread_ts", payload["ts"]),
-            user_id=payload["user"],
-        )
+        def add_to_thread():
+            try_add_to_thread(
+                payload["text"],
+                thread_alias=payload.get("thread_ts", payload["ts"]),
+                user_id=payload["user"],
+            )
+
+        # nothing waits on the message being added, it is deferred if the bot is busy
+        if event_scheduler is not None:
+            event_scheduler.defer(PASSIVE, add_to_thread)
+        else:
+            add_to_thread()
 
 
 @app.event("app_mention")
 def app_mention(body: dict, payload: dict, client: WebClient):
     logger.debug("Handling app_mention event")
-    typing_message(
-        message="recieved the message...",
-        thread_ts=payload.get("thread_ts", payload["ts"]),
-        channel=payload["channel"],
-        client=client,
-    )
-    respond_in_thread(body, payload, client)
+    _answer(body, payload, client)
+
+
+def _answer(body: dict, payload: dict, client: WebClient):
+    def answer():
+        prefetched = _prefetch(body, payload, stream=stream_output_enabled())
+        side_effects.set_status(
+            message="recieved the message...",
+            thread_ts=payload.get("thread_ts", payload["ts"]),
+            channel=payload["channel"],
+            client=client,
+        )
+        respond_in_thread(body, payload, client, prefetched=prefetched)
+
+    if event_scheduler is None:
+        answer()
+    elif not event_scheduler.run(ANSWER, answer):
+        send_message(
+            **markdown_payload(BUSY_MESSAGE),
+            thread_ts=payload.get("thread_ts", payload["ts"]),
+            channel=payload["channel"],
+            client=client,
+        )
 
 
 def shadow_respond_in_thread(body: dict, payload: dict, client: WebClient):
+    from .griptape_event_handlers import event_listeners
+    from .griptape_handler import agent, get_rulesets, is_relevant_response
+    from .shadow import ShadowAbortMonitor, ShadowRunAborted, shadow_pre_gate
+
     thread_ts = payload.get("thread_ts", payload["ts"])
 
+    # skip running the Agent for mentions that it very likely can't answer,
+    # unless every response is going to be sent anyway
+    if shadow_pre_gate_enabled() and not shadow_user_always_respond_enabled():
+        decision = shadow_pre_gate(
+            payload["text"],
+            context=_recent_thread_context(payload, client),
+            threshold=shadow_pre_gate_threshold(),
+        )
+        if not decision.attempt:
+            logger.debug("Shadow pre-gate skipped the response")
+            side_effects.set_status(
+                thread_ts=thread_ts, channel=payload["channel"], client=client
+            )
+            return
+
+    prefetched = _prefetch(body, payload, stream=False)
     try:
-        rulesets = get_rulesets(
-            user_id=payload["user"],
-            channel_id=payload["channel"],
-            team_id=body["team_id"],
-            app_id=body["api_app_id"],
+        rulesets = (
+            prefetched.rulesets()
+            if prefetched is not None
+            else get_rulesets(
+                user_id=payload["user"],
+                channel_id=payload["channel"],
+                team_id=body["team_id"],
+                app_id=body["api_app_id"],
+            )
         )
         logger.debug(f"Loaded {len(rulesets)} rulesets")
         logger.debug(
@@ -120,12 +224,32 @@ def shadow_respond_in_thread(body: dict, payload: dict, client: WebClient):
                 typing_message=assistant_typing_message_enabled(),
             ),
             stream=False,
+            abort_monitor=(
+                ShadowAbortMonitor(message=payload["text"])
+                if shadow_early_abort_enabled()
+                and not shadow_user_always_respond_enabled()
+                else None
+            ),
+            prefetched=prefetched,
         )
+    except ShadowRunAborted as e:
+        logger.info(f"Shadow response aborted: {e}")
+        side_effects.set_status(
+            thread_ts=thread_ts, channel=payload["channel"], client=client
+        )
+        side_effects.react(
+            "zoom-eyes",
+            channel=payload["channel"],
+            ts=payload["ts"],
+            thread_ts=thread_ts,
+            client=client,
+        )
+        return
     except Exception:
         logger.exception("Error while processing shadow response")
         return
 
-    typing_message(
+    side_effects.set_status(
         "is deciding to respond...",
         thread_ts=thread_ts,
         channel=payload["channel"],
@@ -137,6 +261,7 @@ def shadow_respond_in_thread(body: dict, payload: dict, client: WebClient):
         or (score_tuple := is_relevant_response(payload["text"], agent_output))[0]
     ):
         logger.debug("Shadow response is relevant, sending")
+        side_effects.settle(thread_ts=thread_ts, channel=payload["channel"])
         send_message_blocks(
             agent_output,
             thread_ts=thread_ts,
@@ -145,19 +270,76 @@ def shadow_respond_in_thread(body: dict, payload: dict, client: WebClient):
         )
     else:
         logger.debug("Shadow response not relevant, not sending")
-        typing_message(thread_ts=thread_ts, channel=payload["channel"], client=client)
-        react_to_message(
-            "zoom-eyes", channel=payload["channel"], ts=payload["ts"], client=client
+        side_effects.set_status(
+            thread_ts=thread_ts, channel=payload["channel"], client=client
         )
-        react_to_message(
+        side_effects.react(
+            "zoom-eyes",
+            channel=payload["channel"],
+            ts=payload["ts"],
+            thread_ts=thread_ts,
+            client=client,
+        )
+        side_effects.react(
             integer_to_number_string(score_tuple[1]),
             channel=payload["channel"],
             ts=payload["ts"],
+            thread_ts=thread_ts,
+            client=client,
+        )
+
+
+def _recent_thread_context(payload: dict, client: WebClient) -> list[str]:
+    limit = shadow_pre_gate_context_messages()
+    if "thread_ts" not in payload or limit <= 0:
+        return []
+    try:
+        return get_thread_messages(
+            thread_ts=payload["thread_ts"],
+            channel=payload["channel"],
             client=client,
+            limit=limit,
+            latest=payload["ts"],
         )
+    except Exception:
+        logger.exception("Error while loading thread context for the shadow pre-gate")
+        return []
+
+
+def _prefetch(body: dict, payload: dict, *, stream: bool) -> Optional[Prefetch]:
+    if not prefetch_enabled():
+        return None
+
+    from .prefetch import prefetch
 
+    return prefetch(
+        payload["text"],
+        thread_alias=payload.get("thread_ts", payload["ts"]),
+        stream=stream,
+        user_id=payload["user"],
+        channel_id=payload["channel"],
+        team_id=body["team_id"],
+        app_id=body["api_app_id"],
+    )
+
+
+def respond_in_thread(
+    body: dict,
+    payload: dict,
+    client: WebClient,
+    *,
+    prefetched: Optional[Prefetch] = None,
+):
+    from .griptape_event_handlers import event_listeners
+    from .griptape_handler import (
+        add_cached_run_to_thread,
+        agent,
+        cache_response,
+        get_cached_response,
+        get_rulesets,
+        response_cache_opted_in,
+    )
 
-def respond_in_thread(body: dict, payload: dict, client: WebClient):
     team_id = body["team_id"]
     app_id = body["api_app_id"]
     thread_ts = payload.get("thread_ts", payload["ts"])
@@ -165,17 +347,56 @@ def respond_in_thread(body: dict, payload: dict, client: WebClient):
     stream = stream_output_enabled()
 
     try:
-        rulesets = get_rulesets(
-            user_id=payload["user"],
-            channel_id=payload["channel"],
-            team_id=team_id,
-            app_id=app_id,
+        rulesets = (
+            prefetched.rulesets()
+            if prefetched is not None
+            else get_rulesets(
+                user_id=payload["user"],
+                channel_id=payload["channel"],
+                team_id=team_id,
+                app_id=app_id,
+            )
         )
         logger.debug(f"Loaded {len(rulesets)} rulesets")
         logger.debug(
             f"Rulesets names: {', '.join([ruleset.name for ruleset in rulesets])}"
         )
 
+        # only messages that start a thread are cached, since replies
+        # in a thread depend on the conversation that came before them
+        use_cache = thread_ts == payload["ts"] and response_cache_opted_in(
+            rulesets, channel_id=payload["channel"]
+        )
+        cached_output = (
+            get_cached_response(
+                payload["text"],
+                user_id=payload["user"],
+                channel_id=payload["channel"],
+                rulesets=rulesets,
+            )
+            if use_cache
+            else None
+        )
+        if cached_output is not None:
+            logger.debug("Sending cached response")
+            if prefetched is not None:
+                prefetched.cancel()
+            side_effects.settle(thread_ts=thread_ts, channel=payload["channel"])
+            send_message_blocks(
+                cached_output,
+                thread_ts=thread_ts,
+                channel=payload["channel"],
+                client=client,
+                footer_blocks=[cached_block()],
+            )
+            try:
+                add_cached_run_to_thread(
+                    payload["text"], cached_output, thread_alias=thread_ts
+                )
+            except Exception:
+                logger.exception("Error while adding cached response to the thread")
+            return
+
         agent_output = agent(
             payload["text"],
             thread_alias=thread_ts,
@@ -189,6 +410,7 @@ def respond_in_thread(body: dict, payload: dict, client: WebClient):
                 typing_message=assistant_typing_message_enabled(),
             ),
             stream=stream,
+            prefetched=prefetched,
         )
     except Exception as e:
         logger.exception("Error while processing response")
@@ -200,9 +422,19 @@ def respond_in_thread(body: dict, payload: dict, client: WebClient):
         )
         return
 
+    if use_cache:
+        cache_response(
+            payload["text"],
+            agent_output,
+            user_id=payload["user"],
+            channel_id=payload["channel"],
+            rulesets=rulesets,
+        )
+
     # Assuming that the response is already sent if its being streamed
     if not stream:
         logger.debug("Sending response")
+        side_effects.settle(thread_ts=thread_ts, channel=payload["channel"])
         send_message_blocks(
             agent_output,
             thread_ts=thread_ts,
@@ -213,9 +445,46 @@ def respond_in_thread(body: dict, payload: dict, client: WebClient):
 
 def handle_slack_event(body: str, headers: dict) -> dict:
     req = BoltRequest(body=body, headers=headers)
-    bolt_response = app.dispatch(req=req)
+    event_body = (
+        _event_body(body) if tracer.enabled or request_profiler is not None else {}
+    )
+    event = event_body.get("event", {})
+    event_id = event_body.get("event_id")
+    thread_ts = event.get("thread_ts", event.get("ts"))
+    with (
+        request_profiler.profile(
+            {
+                "event_id": event_id,
+                "event_type": event.get("type"),
+                "thread_ts": thread_ts,
+                "channel": event.get("channel"),
+            }
+        )
+        if request_profiler is not None
+        else nullcontext()
+    ):
+        with tracer.trace(
+            "slack.dispatch",
+            {
+                "slack.event_type": event.get("type"),
+                "slack.retry_num": req.headers.get("x-slack-retry-num", [None])[0],
+            },
+            event_id=event_id,
+            thread_ts=thread_ts,
+        ) as span:
+            bolt_response = app.dispatch(req=req)
+            span.set_attribute("http.status_code", bolt_response.status)
     return {
         "status": bolt_response.status,
         "body": bolt_response.body,
         "headers": bolt_response.headers,
     }
+
+
+def _event_body(body: str) -> dict:
+    # interactivity payloads are form encoded, only Events API payloads are keyed by an event ID
+    try:
+        event_body = json.loads(body)
+    except ValueError:
+        return {}
+    return event_body if isinstance(event_body, dict) else {}
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Generator, TYPE_CHECKING
+from collections import deque
+from typing import Generator, Optional, TYPE_CHECKING
 
 
 if TYPE_CHECKING:
@@ -68,11 +69,44 @@ def react_to_message(
     )
 
 
+def get_thread_messages(
+    *, thread_ts: str, channel: str, client: WebClient, limit: int, latest: str
+) -> list[str]:
+    """Gets the text of up to `limit` thread messages posted before `latest`, oldest first."""
+    # replies are paged oldest first, so long threads are read to the end to get the recent ones
+    messages: deque[str] = deque(maxlen=limit)
+    cursor = None
+    while True:
+        res = client.conversations_replies(
+            channel=channel,
+            ts=thread_ts,
+            latest=latest,
+            inclusive=False,
+            limit=200,
+            cursor=cursor,
+        )
+        messages.extend(message.get("text", "") for message in res.get("messages", []))
+        cursor = (res.get("response_metadata") or {}).get("next_cursor")
+        if not res.get("has_more") or not cursor:
+            return list(messages)
+
+
 def send_message_blocks(
-    message: str, *, thread_ts: str, channel: str, client: WebClient
+    message: str,
+    *,
+    thread_ts: str,
+    channel: str,
+    client: WebClient,
+    footer_blocks: Optional[list[dict]] = None,
 ) -> None:
-    """Sends a message to the channel. Block formatted messages are split into multiple messages if they exceed the block limit."""
-    for blocks in markdown_blocks_list(message):
+    """Sends a message to the channel. Block formatted messages are split into multiple messages if they exceed the block limit. Footer blocks are added to the end of the last message."""
+    blocks_list = markdown_blocks_list(message)
+    if footer_blocks:
+        if len(blocks_list[-1]) + len(footer_blocks) > SLACK_MAX_BLOCKS:
+            blocks_list.append(footer_blocks)
+        else:
+            blocks_list[-1] = blocks_list[-1] + footer_blocks
+    for blocks in blocks_list:
         send_message(
             blocks, message, thread_ts=thread_ts, channel=channel, client=client
         )
@@ -175,6 +209,19 @@ def error_block(error: str, **kwargs) -> dict:
     }
 
 
+def cached_block(**kwargs) -> dict:
+    """Gets a block that marks a response as served from the response cache."""
+    return {
+        "type": "context",
+        "elements": [
+            {
+                "type": "mrkdwn",
+                "text": ":zap: _Answered from a recent response to the same question._",
+            },
+        ],
+    }
+
+
 def emoji_block(emoji: str, text: str, *, format: bool = True, **kwargs) -> dict:
     """Gets a block with the emoji and text. Truncates the text to the max block text length."""
     return emoji_blocks(emoji, text, **kwargs)[0]
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from slack_sdk import WebClient
+from slack_sdk.web import SlackResponse
+
+from .http_pool import PooledWebClient, web_client_kwargs
+from .tracing import SPAN_KIND_CLIENT, tracer
+
+
+class TracedWebClient(PooledWebClient):
+    """A Slack WebClient that records every Slack API call as a span."""
+
+    def api_call(self, api_method: str, **kwargs) -> SlackResponse:
+        with tracer.span(
+            f"slack.{api_method}", {"slack.method": api_method}, kind=SPAN_KIND_CLIENT
+        ) as span:
+            response = super().api_call(api_method, **kwargs)
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+
+
+def traced_web_client(
+    client: WebClient, *, team_id: Optional[str] = None
+) -> TracedWebClient:
+    """Gets a copy of the WebClient that records every Slack API call as a span."""
+    return TracedWebClient(**web_client_kwargs(client, team_id=team_id))
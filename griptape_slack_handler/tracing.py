@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent import futures
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from attrs import define, field
+
+from .features import tracing_enabled, tracing_file, tracing_otlp_endpoint
+from .http_pool import shared_session
+
+logger = logging.getLogger("griptape_slack_handler")
+
+# https://opentelemetry.io/docs/specs/otel/trace/api/#spankind
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+SCOPE_NAME = "griptape_slack_handler"
+
+
+@define
+class Span:
+    """
+    A timed operation in a trace, with the same fields as an OpenTelemetry span.
+
+    Attributes:
+        name: The name of the operation.
+        trace_id: The ID of the trace the span is in.
+        span_id: The ID of the span.
+        parent_span_id: The ID of the parent span, or None for the root span of a trace.
+        kind: The OpenTelemetry span kind.
+        attributes: The attributes of the span.
+        trace_attributes: The attributes shared by every span in the trace, such as the Slack event ID.
+        events: Things that happened during the span, such as the first token of an LLM call.
+    """
+
+    name: str = field(kw_only=True)
+    trace_id: str = field(kw_only=True)
+    span_id: str = field(factory=lambda: secrets.token_hex(8), kw_only=True)
+    parent_span_id: Optional[str] = field(default=None, kw_only=True)
+    kind: int = field(default=SPAN_KIND_INTERNAL, kw_only=True)
+    attributes: dict[str, Any] = field(factory=dict, kw_only=True)
+    trace_attributes: dict[str, Any] = field(factory=dict, kw_only=True)
+    events: list[dict] = field(factory=list, kw_only=True)
+    start_time_ns: int = field(factory=time.time_ns, kw_only=True)
+    end_time_ns: Optional[int] = field(default=None, kw_only=True)
+    error: Optional[str] = field(default=None, kw_only=True)
+
+    @property
+    def elapsed_ms(self) -> float:
+        """How long the span has been running, or ran for if it ended."""
+        end_time_ns = (
+            self.end_time_ns if self.end_time_ns is not None else time.time_ns()
+        )
+        return (end_time_ns - self.start_time_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[dict] = None) -> None:
+        """Records something that happened during the span."""
+        self.events.append(
+            {"name": name, "time_ns": time.time_ns(), "attributes": attributes or {}}
+        )
+
+    def to_otlp(self) -> dict:
+        """Converts the span to OTLP JSON."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            **(
+                {"parentSpanId": self.parent_span_id}
+                if self.parent_span_id is not None
+                else {}
+            ),
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns or time.time_ns()),
+            "attributes": _otlp_attributes(
+                {**self.trace_attributes, **self.attributes}
+            ),
+            "events": [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time_ns"]),
+                    "attributes": _otlp_attributes(event["attributes"]),
+                }
+                for event in self.events
+            ],
+            "status": (
+                {"code": STATUS_CODE_ERROR, "message": self.error}
+                if self.error is not None
+                else {"code": STATUS_CODE_OK}
+            ),
+        }
+
+
+@define
+class OtlpFileSpanExporter:
+    """
+    Appends spans to a file as OTLP JSON, one export request per line,
+    like the OpenTelemetry Collector's file exporter.
+
+    Attributes:
+        path: The file to append spans to.
+    """
+
+    path: str = field(kw_only=True)
+
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+
+    def export(self, request: dict) -> None:
+        line = json.dumps(request, separators=(",", ":")) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+@define
+class OtlpHttpSpanExporter:
+    """
+    Sends spans to an OTLP/HTTP endpoint as JSON.
+
+    Attributes:
+        endpoint: The base URL of the endpoint, such as http://localhost:4318.
+        timeout: How many seconds to wait for the endpoint.
+    """
+
+    endpoint: str = field(kw_only=True)
+    timeout: float = field(default=10, kw_only=True)
+
+    def export(self, request: dict) -> None:
+        shared_session().post(
+            f"{self.endpoint.rstrip('/')}/v1/traces",
+            json=request,
+            timeout=self.timeout,
+        ).raise_for_status()
+
+
+@define
+class Tracer:
+    """
+    Records spans, and exports each trace once its root span ends.
+    The current span is kept in a context variable, so spans started in threads that copy the
+    context, like the ones griptape runs tools in, are children of the span that started them.
+    Spans are exported on a background thread, so that exporting never delays a response.
+
+    Attributes:
+        exporters: Where finished traces are exported to. Spans are only recorded if there are any.
+        service_name: The service name of the exported spans.
+    """
+
+    exporters: list = field(factory=list, kw_only=True)
+    service_name: str = field(default="griptape-slack-handler", kw_only=True)
+
+    _current: contextvars.ContextVar[Optional[Span]] = field(
+        factory=lambda: contextvars.ContextVar("current_span", default=None),
+        init=False,
+    )
+    _pending: dict[str, list[Span]] = field(factory=dict, init=False)
+    _lock: threading.Lock = field(factory=threading.Lock, init=False)
+    _executor: futures.ThreadPoolExecutor = field(
+        factory=lambda: futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tracing"
+        ),
+        init=False,
+    )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    @contextmanager
+    def trace(
+        self,
+        name: str,
+        attributes: Optional[dict] = None,
+        *,
+        event_id: Optional[str],
+        thread_ts: Optional[str],
+    ) -> Iterator[Span]:
+        """Starts a new trace for a Slack event, keyed by the event ID and thread timestamp."""
+        with self.span(
+            name,
+            attributes,
+            kind=SPAN_KIND_SERVER,
+            root=True,
+            trace_attributes={"slack.event_id": event_id, "slack.thread_ts": thread_ts},
+        ) as span:
+            yield span
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: Optional[dict] = None,
+        *,
+        kind: int = SPAN_KIND_INTERNAL,
+        root: bool = False,
+        trace_attributes: Optional[dict] = None,
+    ) -> Iterator[Span]:
+        """Starts a span as a child of the current span, and makes it the current span until it ends."""
+        parent = None if root else self._current.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else secrets.token_hex(16),
+            parent_span_id=parent.span_id if parent is not None else None,
+            kind=kind,
+            attributes=dict(attributes or {}),
+            trace_attributes={
+                **(parent.trace_attributes if parent is not None else {}),
+                **(trace_attributes or {}),
+            },
+        )
+        if parent is None and self.enabled:
+            with self._lock:
+                self._pending[span.trace_id] = []
+
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current.reset(token)
+            span.end_time_ns = time.time_ns()
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if span.parent_span_id is None:
+                spans = [*self._pending.pop(span.trace_id, []), span]
+            elif span.trace_id in self._pending:
+                self._pending[span.trace_id].append(span)
+                return
+            else:
+                # the root span already ended, such as a span in a thread that outlived the request
+                spans = [span]
+        self._executor.submit(self._export, spans)
+
+    def _export(self, spans: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": SCOPE_NAME},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        for exporter in self.exporters:
+            try:
+                exporter.export(request)
+            except Exception:
+                logger.exception(
+                    f"Error while exporting spans with {type(exporter).__name__}"
+                )
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _exporters() -> list:
+    if not tracing_enabled():
+        return []
+    return [
+        OtlpFileSpanExporter(path=tracing_file()),
+        *(
+            [OtlpHttpSpanExporter(endpoint=tracing_otlp_endpoint())]
+            if tracing_otlp_endpoint()
+            else []
+        ),
+    ]
+
+
+tracer = Tracer(exporters=_exporters())
@@ -0,0 +1,108 @@
+import json
+from typing import Optional
+
+import pytest
+from attrs import define, field
+from griptape.artifacts import TextArtifact
+from griptape.memory.structure import ConversationMemory, Run
+
+from griptape_slack_handler.griptape import griptape_cloud
+from griptape_slack_handler.griptape.griptape_cloud import (
+    PooledGriptapeCloudConversationMemoryDriver,
+)
+from griptape_slack_handler.shared_cache import SqliteCacheTier, TieredCache
+
+
+class FakeResponse:
+    def __init__(self, body: dict) -> None:
+        self.body = body
+        self.status_code = 200
+
+    def json(self) -> dict:
+        return self.body
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class FakeGriptapeCloud:
+    """One Griptape Cloud thread, with the messages it was last patched with."""
+
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+        self.metadata: dict = {}
+
+    def call(self, method: str, path: str, json: Optional[dict]) -> FakeResponse:
+        if method == "get" and path.startswith("/threads?alias="):
+            return FakeResponse({"threads": [{"thread_id": "T1", "alias": "ts1"}]})
+        if method == "get" and path == "/threads/T1/messages":
+            return FakeResponse({"messages": [dict(m) for m in self.messages]})
+        if method == "get" and path == "/threads/T1":
+            return FakeResponse({"thread_id": "T1", "metadata": self.metadata})
+        if method == "patch" and path == "/threads/T1":
+            self.messages = [
+                {**message, "metadata": dict(message["metadata"])}
+                for message in json["messages"]
+            ]
+            return FakeResponse({})
+        raise AssertionError(f"unexpected call: {method} {path}")
+
+
+@define
+class FakeDriver(PooledGriptapeCloudConversationMemoryDriver):
+    cloud: FakeGriptapeCloud = field(kw_only=True)
+
+    def _call_api(
+        self,
+        method: str,
+        path: str,
+        json: Optional[dict] = None,
+        *,
+        raise_for_status: bool = True,
+    ) -> FakeResponse:
+        return self.cloud.call(method, path, json)
+
+
+@pytest.fixture(autouse=True)
+def conversation_cache(tmp_path, monkeypatch) -> TieredCache:
+    cache = TieredCache(
+        name="conversation_cache",
+        ttl=600,
+        local_ttl=0,
+        shared=SqliteCacheTier(path=str(tmp_path / "cache.sqlite")),
+    )
+    monkeypatch.setattr(griptape_cloud, "conversation_cache", cache)
+    return cache
+
+
+def _answer(cloud: FakeGriptapeCloud, question: str, answer: str) -> list[str]:
+    # every event loads the thread with a new driver, given only the thread's alias
+    memory = ConversationMemory(
+        conversation_memory_driver=FakeDriver(api_key="key", alias="ts1", cloud=cloud)
+    )
+    history = [run.input.value for run in memory.runs]
+    memory.add_run(Run(input=TextArtifact(question), output=TextArtifact(answer)))
+    return history
+
+
+def _inputs(messages: list[dict]) -> list[str]:
+    return [json.loads(message["input"])["value"] for message in messages]
+
+
+def test_events_with_new_drivers_keep_the_thread_history() -> None:
+    cloud = FakeGriptapeCloud()
+
+    assert _answer(cloud, "q1", "a1") == []
+    assert _answer(cloud, "q2", "a2") == ["q1"]
+    assert _answer(cloud, "q3", "a3") == ["q1", "q2"]
+
+    assert _inputs(cloud.messages) == ["q1", "q2", "q3"]
+
+
+def test_stored_thread_is_served_from_the_cache(conversation_cache) -> None:
+    cloud = FakeGriptapeCloud()
+    _answer(cloud, "q1", "a1")
+
+    cached = conversation_cache.get("alias:ts1")
+    assert cached is not None
+    assert _inputs(cached["messages"]) == ["q1"]
@@ -0,0 +1,153 @@
+import json
+import multiprocessing
+import threading
+from concurrent import futures
+
+import pytest
+
+from griptape_slack_handler.dispatcher import (
+    ACK_RESPONSE,
+    UNAVAILABLE_RESPONSE,
+    Dispatcher,
+    HashRing,
+    Worker,
+    event_key,
+)
+
+
+class FakeProcess:
+    pid = 1234
+    exitcode = -9
+
+    def is_alive(self) -> bool:
+        return False
+
+    def join(self, timeout=None) -> None:
+        pass
+
+    def terminate(self) -> None:
+        pass
+
+
+def _event_body(event_id: str = "Ev1", **event) -> str:
+    return json.dumps(
+        {
+            "type": "event_callback",
+            "team_id": "T1",
+            "event_id": event_id,
+            "event": {"type": "message", "channel": "C1", "ts": "1.000", **event},
+        }
+    )
+
+
+def _add_worker(dispatcher: Dispatcher, name: str):
+    """Adds a worker whose process is the returned end of its pipe."""
+    connection, worker_connection = multiprocessing.Pipe()
+    worker = Worker(name, process=FakeProcess(), connection=connection)
+    with dispatcher._lock:
+        dispatcher._workers[name] = worker
+    threading.Thread(target=dispatcher._read, args=(worker,), daemon=True).start()
+    worker_connection.send(None)
+    assert worker.ready.wait(5)
+    return worker, worker_connection
+
+
+@pytest.fixture
+def dispatcher() -> Dispatcher:
+    dispatcher = Dispatcher(workers=2)
+    yield dispatcher
+    dispatcher.stop()
+
+
+@pytest.fixture
+def restarted(monkeypatch) -> list:
+    # (dispatcher, worker name, restarts) of every worker that would be replaced
+    restarted = []
+    monkeypatch.setattr(
+        Dispatcher,
+        "_start_worker",
+        lambda self, name, *, restarts=0: restarted.append((self, name, restarts)),
+    )
+    return restarted
+
+
+def test_hash_ring_only_moves_the_keys_of_a_removed_node() -> None:
+    ring = HashRing()
+    for node in ("a", "b", "c", "d"):
+        ring.add(node)
+    keys = [f"T1:C1:{i}" for i in range(1000)]
+    before = {key: ring.node_for(key) for key in keys}
+    assert set(before.values()) == {"a", "b", "c", "d"}
+
+    ring.remove("b")
+    after = {key: ring.node_for(key) for key in keys}
+    assert "b" not in after.values()
+    assert all(after[key] == before[key] for key in keys if before[key] != "b")
+
+    ring.add("b")
+    assert {key: ring.node_for(key) for key in keys} == before
+
+
+def test_hash_ring_without_nodes() -> None:
+    assert HashRing().node_for("T1:C1:1.000") is None
+
+
+def test_event_key_is_the_team_channel_and_thread() -> None:
+    assert event_key(_event_body(thread_ts="0.500")) == "T1:C1:0.500"
+    # a message that starts a thread is its own thread
+    assert event_key(_event_body()) == "T1:C1:1.000"
+    assert event_key(json.dumps({"type": "url_verification"})) is None
+    assert event_key("payload=%7B%7D") is None
+
+
+def test_events_are_acknowledged_and_retries_dropped(dispatcher, restarted) -> None:
+    _, worker_connection = _add_worker(dispatcher, "worker-0")
+
+    assert dispatcher.handle_slack_event(_event_body(), {}) == ACK_RESPONSE
+    request_id, key, _, _ = worker_connection.recv()
+    assert key == "T1:C1:1.000"
+
+    retry = dispatcher.handle_slack_event(_event_body(), {"X-Slack-Retry-Num": "1"})
+    assert retry == ACK_RESPONSE
+    assert not worker_connection.poll(0.2)
+
+    # a retry of an event that was never accepted is handled
+    dispatcher.handle_slack_event(_event_body("Ev2"), {"X-Slack-Retry-Num": "1"})
+    assert worker_connection.recv()[1] == key
+
+
+def test_other_requests_wait_for_the_worker(dispatcher, restarted) -> None:
+    _, worker_connection = _add_worker(dispatcher, "worker-0")
+    response = {"status": 200, "body": "challenge", "headers": {}}
+
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+            dispatcher.handle_slack_event,
+            json.dumps({"type": "url_verification", "challenge": "challenge"}),
+            {},
+        )
+        request_id, key, _, _ = worker_connection.recv()
+        assert key is None
+        worker_connection.send((request_id, response))
+        assert future.result(timeout=5) == response
+
+
+def test_dead_worker_fails_its_events_and_is_replaced(dispatcher, restarted) -> None:
+    connections = {
+        name: _add_worker(dispatcher, name)[1] for name in ("worker-0", "worker-1")
+    }
+    key = event_key(_event_body())
+    name = dispatcher._ring.node_for(key)
+    worker_connection = connections[name]
+
+    future = dispatcher.dispatch(_event_body(), {}, key=key)
+    worker_connection.recv()
+    worker_connection.close()
+
+    assert future.result(timeout=5) == UNAVAILABLE_RESPONSE
+    assert name not in dispatcher.load()
+    # its threads move to the other worker until it is replaced
+    assert dispatcher._ring.node_for(key) != name
+    threading.Event().wait(1)
+    # other tests' workers die when their pipes are closed
+    assert [(n, r) for d, n, r in restarted if d is dispatcher] == [(name, 1)]
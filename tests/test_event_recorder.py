@@ -0,0 +1,87 @@
+import json
+
+from griptape_slack_handler.event_recorder import redact
+
+
+def test_redact_keeps_routing_keys_and_redacts_contents() -> None:
+    body = {
+        "token": "verification-token",
+        "team_id": "T123",
+        "api_app_id": "A123",
+        "type": "event_callback",
+        "event_id": "Ev123",
+        "event": {
+            "type": "message",
+            "subtype": "file_share",
+            "channel": "C123",
+            "channel_type": "channel",
+            "user": "U123",
+            "ts": "1700000000.000100",
+            "thread_ts": "1700000000.000001",
+            "text": "<@U456> see https://secret.example.com",
+            "blocks": [
+                {
+                    "type": "rich_text",
+                    "block_id": "b1",
+                    "elements": [
+                        {
+                            "type": "rich_text_section",
+                            "elements": [
+                                {"type": "user", "user_id": "U456"},
+                                {"type": "link", "url": "https://secret.example.com"},
+                            ],
+                        }
+                    ],
+                }
+            ],
+            "files": [
+                {
+                    "id": "F123",
+                    "name": "payroll.xlsx",
+                    "title": "Payroll",
+                    "preview": "salaries",
+                    "permalink": "https://acme.slack.com/files/payroll.xlsx",
+                    "url_private": "https://files.slack.com/payroll.xlsx",
+                }
+            ],
+            "attachments": [
+                {
+                    "fallback": "Quarterly results",
+                    "title": "Quarterly results",
+                    "title_link": "https://secret.example.com/q3",
+                    "pretext": "confidential",
+                }
+            ],
+        },
+    }
+
+    redacted = redact(body)
+
+    event = redacted["event"]
+    assert redacted["team_id"] == "T123"
+    assert redacted["api_app_id"] == "A123"
+    assert redacted["type"] == "event_callback"
+    assert redacted["event_id"] == "Ev123"
+    assert event["type"] == "message"
+    assert event["subtype"] == "file_share"
+    assert event["channel"] == "C123"
+    assert event["channel_type"] == "channel"
+    assert event["user"] == "U123"
+    assert event["ts"] == "1700000000.000100"
+    assert event["thread_ts"] == "1700000000.000001"
+    assert event["files"][0]["id"] == "F123"
+    assert event["blocks"][0]["elements"][0]["elements"][0]["user_id"] == "U456"
+    # mentions and the shape of the text are kept
+    assert event["text"] == "<@U456> xxx xxxxx://xxxxxx.xxxxxxx.xxx"
+
+    recorded = json.dumps(redacted)
+    for secret in (
+        "verification-token",
+        "secret",
+        "payroll",
+        "Payroll",
+        "salaries",
+        "Quarterly",
+        "confidential",
+    ):
+        assert secret not in recorded
@@ -0,0 +1,63 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from github import Github
+
+from griptape_slack_handler.griptape.github_tool.client import (
+    CountingRetry,
+    track_usage,
+)
+from griptape_slack_handler.metrics import metrics
+
+ETAG = '"v1"'
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            body = b""
+        else:
+            self.send_response(200)
+            url = f"http://{self.headers['Host']}{self.path}"
+            body = json.dumps({"login": "octocat", "id": 1, "url": url}).encode()
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", "4999")
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def github_url() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_are_counted_on_the_activity(github_url) -> None:
+    client = Github(
+        base_url=github_url,
+        retry=CountingRetry(),
+        seconds_between_requests=None,
+    )
+    api_calls = metrics.counter("github.test_usage.api_calls")
+    not_modified = metrics.counter("github.test_usage.not_modified")
+
+    # requests outside of an activity aren't counted
+    client.get_user("octocat")
+    with track_usage(client, "test_usage"):
+        user = client.get_user("octocat")
+        assert not user.update()
+
+    assert metrics.counter("github.test_usage.api_calls") == api_calls + 1
+    assert metrics.counter("github.test_usage.not_modified") == not_modified + 1
@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from griptape_slack_handler.llm_governor import LlmGovernor, RateBudget, llm_thread
+
+
+def test_budget_waits_for_the_buckets_to_refill() -> None:
+    # 10 tokens a second
+    budget = RateBudget(600, 60)
+
+    assert budget.try_take(600) == 0
+    assert budget.try_take(60) == pytest.approx(6, abs=0.1)
+    # nothing was taken while waiting
+    assert budget.try_take(60) == pytest.approx(6, abs=0.1)
+
+
+def test_budget_settles_the_actual_usage() -> None:
+    budget = RateBudget(600, 0)
+    budget.try_take(600)
+
+    budget.settle(-300)
+    assert budget.try_take(300) == 0
+    # tokens given back never overflow the bucket
+    budget.settle(-10_000)
+    assert budget.try_take(600) == 0
+    assert budget.try_take(1) > 0
+
+
+def test_observe_only_lowers_the_buckets() -> None:
+    budget = RateBudget(600, 60)
+
+    budget.observe(remaining_tokens=100, remaining_requests=None)
+    assert budget.try_take(200) == pytest.approx(10, abs=0.1)
+    # the provider saying more is left doesn't give more than the bucket has
+    budget.observe(remaining_tokens=10_000, remaining_requests=10_000)
+    assert budget.try_take(200) == pytest.approx(10, abs=0.1)
+
+    budget.observe(remaining_tokens=None, remaining_requests=0)
+    assert budget.try_take(1) == pytest.approx(1, abs=0.1)
+
+
+def test_budget_is_shared_through_its_file(tmp_path) -> None:
+    path = str(tmp_path / "budget.json")
+    budget = RateBudget(600, 60, path=path)
+    other = RateBudget(600, 60, path=path)
+
+    assert budget.try_take(600) == 0
+    assert other.try_take(60) == pytest.approx(6, abs=0.1)
+
+
+def test_threads_take_turns() -> None:
+    governor = LlmGovernor(RateBudget(0, 0), max_concurrency=1)
+    admissions = queue.Queue()
+
+    def call(name: str, thread_ts: str) -> None:
+        with llm_thread(thread_ts):
+            admission = governor.acquire(1)
+        admissions.put((name, admission))
+
+    with llm_thread("1.000"):
+        admission = governor.acquire(1)
+    for name, thread_ts, queued in (
+        ("first", "1.000", 1),
+        ("second", "1.000", 2),
+        ("other", "2.000", 1),
+    ):
+        threading.Thread(target=call, args=(name, thread_ts), daemon=True).start()
+        while len(governor._queues.get(thread_ts, ())) < queued:
+            time.sleep(0.01)
+
+    order = []
+    for _ in range(3):
+        governor.release(admission, used_tokens=None)
+        name, admission = admissions.get(timeout=5)
+        order.append(name)
+    governor.release(admission, used_tokens=None)
+
+    # the other thread goes before the busy thread's second call
+    assert order == ["first", "other", "second"]
+
+
+def test_rate_limit_holds_back_calls() -> None:
+    governor = LlmGovernor(RateBudget(0, 0), max_concurrency=2)
+
+    governor.rate_limited(0.3)
+    admission = governor.acquire(1)
+
+    assert admission.queue_wait >= 0.25
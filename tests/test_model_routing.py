@@ -0,0 +1,65 @@
+from griptape.drivers import AzureOpenAiChatPromptDriver
+
+from griptape_slack_handler.model_routing import (
+    LARGE_ROUTE,
+    SMALL_ROUTE,
+    ModelRoute,
+    routed_prompt_driver,
+)
+
+
+def _azure_driver() -> AzureOpenAiChatPromptDriver:
+    driver = AzureOpenAiChatPromptDriver(
+        model="gpt-4o",
+        azure_deployment="big",
+        azure_endpoint="https://example.openai.azure.com",
+        api_key="key",
+    )
+    # the default driver's client is built when it is governed, before any routing
+    assert "/deployments/big/" in str(driver.client.base_url)
+    return driver
+
+
+def test_small_route_calls_the_small_deployment() -> None:
+    driver = _azure_driver()
+    prepared = []
+
+    small_driver = routed_prompt_driver(
+        driver,
+        ModelRoute(SMALL_ROUTE),
+        small_model="gpt-4o-mini",
+        prepare=prepared.append,
+    )
+
+    assert small_driver.model == "gpt-4o-mini"
+    assert small_driver.client is not driver.client
+    assert "/deployments/gpt-4o-mini/" in str(small_driver.client.base_url)
+    assert "/deployments/big/" in str(driver.client.base_url)
+    assert prepared == [small_driver]
+
+
+def test_small_driver_is_made_and_prepared_once() -> None:
+    driver = _azure_driver()
+    prepared = []
+
+    drivers = [
+        routed_prompt_driver(
+            driver,
+            ModelRoute(SMALL_ROUTE),
+            small_model="gpt-4o-mini",
+            prepare=prepared.append,
+        )
+        for _ in range(3)
+    ]
+
+    assert drivers[0] is drivers[1] is drivers[2]
+    assert len(prepared) == 1
+
+
+def test_large_route_keeps_the_default_driver() -> None:
+    driver = _azure_driver()
+
+    assert (
+        routed_prompt_driver(driver, ModelRoute(LARGE_ROUTE), small_model="gpt-4o-mini")
+        is driver
+    )
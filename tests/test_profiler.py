@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent import futures
+
+from griptape.utils import with_contextvars
+
+from griptape_slack_handler.profiler import RequestProfiler, profiled
+
+
+def _spin(seconds: float) -> None:
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def other_request_work(stop: threading.Event) -> None:
+    while not stop.is_set():
+        _spin(0.01)
+
+
+def tool_work() -> None:
+    _spin(0.2)
+
+
+def request_work() -> None:
+    _spin(0.1)
+
+
+def test_profile_only_has_the_requests_own_threads(tmp_path) -> None:
+    profiler = RequestProfiler(directory=str(tmp_path), sample_rate=1, interval_ms=5)
+    stop = threading.Event()
+    # a concurrent request that isn't profiled, whose stacks must not show up
+    other = threading.Thread(target=other_request_work, args=(stop,))
+    other.start()
+    try:
+        with profiler.profile({"event_id": "Ev1"}):
+            request_work()
+            with futures.ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(with_contextvars(profiled(tool_work))).result()
+    finally:
+        stop.set()
+        other.join()
+
+    (folded,) = tmp_path.glob("*.folded")
+    stacks = folded.read_text()
+    assert "request_work" in stacks
+    assert "tool_work" in stacks
+    assert "other_request_work" not in stacks
+
+
+def test_slow_requests_are_sampled_once_slow(tmp_path) -> None:
+    profiler = RequestProfiler(
+        directory=str(tmp_path), sample_rate=0, slow_ms=100, interval_ms=5
+    )
+
+    with profiler.profile({"event_id": "Ev1"}):
+        _spin(0.05)
+    assert not list(tmp_path.glob("*.folded"))
+
+    with profiler.profile({"event_id": "Ev2"}):
+        _spin(0.25)
+    (folded,) = tmp_path.glob("*.folded")
+    assert "Ev2" in folded.name
@@ -0,0 +1,100 @@
+from griptape.drivers import LocalRulesetDriver
+from griptape.rules import Rule, Ruleset
+
+from griptape_slack_handler.response_cache import (
+    ResponseCache,
+    agent_fingerprint,
+    channel_opted_in,
+)
+
+
+def _ruleset(name: str, **meta) -> Ruleset:
+    return Ruleset(name=name, meta=meta, ruleset_driver=LocalRulesetDriver())
+
+
+def test_only_the_channels_own_ruleset_opts_it_in() -> None:
+    team = _ruleset("T1", response_cache="true")
+    channel = _ruleset("C1", response_cache="True")
+
+    assert channel_opted_in([team, channel], channel_id="C1")
+    # a team wide opt-in would share answers between every channel of the team
+    assert not channel_opted_in([team, _ruleset("C2")], channel_id="C2")
+    assert not channel_opted_in(
+        [_ruleset("C1", response_cache="false")], channel_id="C1"
+    )
+    assert not channel_opted_in([], channel_id="C1")
+
+
+def test_fingerprint_is_per_channel() -> None:
+    rulesets = [_ruleset("T1", response_cache="true"), _ruleset("C1")]
+
+    assert agent_fingerprint(rulesets, ["WebSearch"], channel_id="C1") == (
+        agent_fingerprint(rulesets, ["WebSearch"], channel_id="C1")
+    )
+    assert agent_fingerprint(rulesets, ["WebSearch"], channel_id="C1") != (
+        agent_fingerprint(rulesets, ["WebSearch"], channel_id="D1")
+    )
+
+
+def test_exact_matches_hit_within_the_channel() -> None:
+    cache = ResponseCache()
+    rulesets = [_ruleset("C1", response_cache="true")]
+    public = agent_fingerprint(rulesets, [], channel_id="C1")
+    private = agent_fingerprint(rulesets, [], channel_id="D1")
+
+    cache.set(
+        "How do I deploy?", "<@U1> run make deploy", fingerprint=public, user_id="U1"
+    )
+
+    hit = cache.get("<@BOT> how do I deploy", fingerprint=public, user_id="U2")
+    assert hit is not None
+    assert hit.response == "<@U2> run make deploy"
+    assert hit.similarity == 1.0
+    assert cache.get("How do I deploy?", fingerprint=private, user_id="U1") is None
+    # without fuzzy matching only the same words are a hit
+    assert (
+        cache.get("How do I deploy please?", fingerprint=public, user_id="U1") is None
+    )
+
+
+def test_rules_change_the_fingerprint() -> None:
+    plain = _ruleset("C1", response_cache="true")
+    strict = Ruleset(
+        name="C1",
+        meta={"response_cache": "true"},
+        rules=[Rule("Answer in French.")],
+        ruleset_driver=LocalRulesetDriver(),
+    )
+
+    assert agent_fingerprint([plain], [], channel_id="C1") != agent_fingerprint(
+        [strict], [], channel_id="C1"
+    )
+
+
+def test_fuzzy_matches_need_the_same_content_words() -> None:
+    cache = ResponseCache(fuzzy=True, similarity_threshold=0.6)
+    fingerprint = agent_fingerprint([], [], channel_id="C1")
+    cache.set(
+        "how do I deploy to staging",
+        "run make deploy",
+        fingerprint=fingerprint,
+        user_id="U1",
+    )
+
+    hit = cache.get(
+        "hey how do I deploy to staging please", fingerprint=fingerprint, user_id="U1"
+    )
+    assert hit is not None
+    assert hit.similarity < 1.0
+    assert (
+        cache.get(
+            "how do I deploy to production", fingerprint=fingerprint, user_id="U1"
+        )
+        is None
+    )
+    assert (
+        cache.get(
+            "how do I not deploy to staging", fingerprint=fingerprint, user_id="U1"
+        )
+        is None
+    )
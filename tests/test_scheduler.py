@@ -0,0 +1,89 @@
+import threading
+import time
+
+from griptape_slack_handler.metrics import metrics
+from griptape_slack_handler.scheduler import ANSWER, PASSIVE, SHADOW, EventScheduler
+
+
+def _scheduler(**queue_limits) -> EventScheduler:
+    return EventScheduler(
+        max_active=1, queue_limits={ANSWER: 5, SHADOW: 5, **queue_limits}
+    )
+
+
+def _occupy(scheduler: EventScheduler) -> threading.Event:
+    """Keeps the scheduler busy with an answer until the returned event is set."""
+    started, done = threading.Event(), threading.Event()
+
+    def work() -> None:
+        started.set()
+        done.wait(5)
+
+    threading.Thread(target=scheduler.run, args=(ANSWER, work), daemon=True).start()
+    assert started.wait(5)
+    return done
+
+
+def _queue(scheduler: EventScheduler, event_class: str, work) -> threading.Thread:
+    """Runs the work on a thread, once it is waiting in its class's queue."""
+    waiting = len(scheduler._queues[event_class])
+    thread = threading.Thread(
+        target=scheduler.run, args=(event_class, work), daemon=True
+    )
+    thread.start()
+    while len(scheduler._queues[event_class]) == waiting:
+        time.sleep(0.01)
+    return thread
+
+
+def test_answers_overtake_queued_shadow_work() -> None:
+    scheduler = _scheduler()
+    done = _occupy(scheduler)
+    order = []
+
+    threads = [
+        _queue(scheduler, SHADOW, lambda: order.append(SHADOW)),
+        _queue(scheduler, ANSWER, lambda: order.append(ANSWER)),
+    ]
+    done.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [ANSWER, SHADOW]
+
+
+def test_full_queue_sheds() -> None:
+    scheduler = _scheduler(**{SHADOW: 1})
+    done = _occupy(scheduler)
+    shed = metrics.counter(f"scheduler.{SHADOW}.shed")
+    ran = []
+
+    waiting = _queue(scheduler, SHADOW, lambda: ran.append("queued"))
+    assert not scheduler.run(SHADOW, lambda: ran.append("shed"))
+    assert metrics.counter(f"scheduler.{SHADOW}.shed") == shed + 1
+
+    done.set()
+    waiting.join(5)
+    assert ran == ["queued"]
+
+
+def test_deferred_work_runs_once_the_scheduler_is_idle() -> None:
+    scheduler = _scheduler()
+    done = _occupy(scheduler)
+    ran = threading.Event()
+
+    scheduler.defer(PASSIVE, ran.set)
+    assert not ran.wait(0.2)
+
+    done.set()
+    assert ran.wait(5)
+    scheduler.flush()
+
+
+def test_deferred_work_runs_right_away_when_idle() -> None:
+    scheduler = _scheduler()
+    ran = []
+
+    scheduler.defer(PASSIVE, lambda: ran.append(threading.current_thread()))
+
+    assert ran == [threading.current_thread()]
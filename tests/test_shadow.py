@@ -0,0 +1,126 @@
+import logging
+from typing import Iterator
+
+import pytest
+from attrs import define, field
+from griptape.artifacts import ErrorArtifact
+from griptape.common import DeltaMessage, Message, PromptStack, TextDeltaMessageContent
+from griptape.drivers import BasePromptDriver
+from griptape.structures import Agent
+from griptape.tokenizers import BaseTokenizer, SimpleTokenizer
+
+from griptape_slack_handler.features import (
+    shadow_pre_gate_enabled,
+    shadow_pre_gate_threshold,
+)
+from griptape_slack_handler.shadow import (
+    ShadowAbortMonitor,
+    ShadowRunAborted,
+    shadow_pre_gate,
+)
+
+UNSURE_ANSWER = "I'm not sure which deployment you are asking about here. " * 6
+
+
+@define
+class StreamingPromptDriver(BasePromptDriver):
+    """Streams a canned answer a word at a time."""
+
+    answer: str = field(kw_only=True)
+    model: str = field(default="test", kw_only=True)
+    tokenizer: BaseTokenizer = field(
+        factory=lambda: SimpleTokenizer(
+            characters_per_token=4, max_input_tokens=4096, max_output_tokens=1024
+        ),
+        kw_only=True,
+    )
+
+    def try_run(self, prompt_stack: PromptStack) -> Message:
+        raise NotImplementedError
+
+    def try_stream(self, prompt_stack: PromptStack) -> Iterator[DeltaMessage]:
+        for word in self.answer.split(" "):
+            yield DeltaMessage(content=TextDeltaMessageContent(f"{word} "))
+
+
+class Records(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def griptape_records() -> Records:
+    records = Records()
+    griptape_logger = logging.getLogger("griptape")
+    griptape_logger.addHandler(records)
+    yield records
+    griptape_logger.removeHandler(records)
+
+
+def _run(monitor: ShadowAbortMonitor, answer: str):
+    agent = Agent(
+        prompt_driver=monitor.prompt_driver(StreamingPromptDriver(answer=answer))
+    )
+    with monitor.monitoring():
+        return agent.run("How do I deploy?").output
+
+
+def test_unsure_answers_are_aborted_quietly(griptape_records) -> None:
+    output = _run(ShadowAbortMonitor(message="How do I deploy?"), UNSURE_ANSWER)
+
+    assert isinstance(output, ErrorArtifact)
+    assert isinstance(output.exception, ShadowRunAborted)
+    assert not [
+        record
+        for record in griptape_records.records
+        if record.exc_info and isinstance(record.exc_info[1], ShadowRunAborted)
+    ]
+    # the filter only applies to shadow runs
+    assert not logging.getLogger("griptape").filters
+
+
+def test_useful_answers_are_left_alone() -> None:
+    answer = "Run make deploy from the repository root once the tests pass. " * 6
+
+    output = _run(ShadowAbortMonitor(message="How do I deploy?"), answer)
+
+    assert not isinstance(output, ErrorArtifact)
+    assert "make deploy" in output.value
+
+
+def test_pre_gate_attempts_questions_and_requests() -> None:
+    for message in (
+        "<@U1> how do I deploy to staging?",
+        "<@U1> can you review <https://github.com/org/repo/pull/1>",
+        "the deploy fails on staging with a timeout",
+    ):
+        assert shadow_pre_gate(message, context=[], threshold=0.4).attempt, message
+
+
+def test_pre_gate_skips_chatter() -> None:
+    for message in ("<@U1>", "<@U1> thanks!", "fyi <@U1> the deploy is done"):
+        decision = shadow_pre_gate(message, context=[], threshold=0.4)
+        assert not decision.attempt, message
+        assert decision.reasons
+
+
+def test_pre_gate_counts_an_open_question_in_the_thread() -> None:
+    alone = shadow_pre_gate("<@U1> still broken", context=[], threshold=0.4)
+    follow_up = shadow_pre_gate(
+        "<@U1> still broken", context=["why does the deploy fail?"], threshold=0.4
+    )
+
+    assert follow_up.score > alone.score
+    assert "thread has question" in follow_up.reasons
+
+
+def test_pre_gate_is_off_by_default(monkeypatch) -> None:
+    monkeypatch.delenv("FEATURE_SHADOW_PRE_GATE", raising=False)
+    assert not shadow_pre_gate_enabled()
+
+    monkeypatch.setenv("FEATURE_SHADOW_PRE_GATE_THRESHOLD", "0.7")
+    assert shadow_pre_gate_threshold() == 0.7
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from griptape_slack_handler.side_effects import SideEffectLane
+
+
+class FakeClient:
+    """Records the Slack calls, and holds the statuses until it is released."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.release = threading.Event()
+        self.status_started = threading.Event()
+
+    def assistant_threads_setStatus(self, *, thread_ts, status, channel_id) -> None:
+        self.status_started.set()
+        self.release.wait(5)
+        self.calls.append(("status", thread_ts, status))
+
+    def reactions_add(self, *, name, channel, timestamp) -> None:
+        self.calls.append(("reaction", timestamp, name))
+
+
+def test_reactions_are_ordered_with_their_threads_statuses() -> None:
+    lane = SideEffectLane(workers=2)
+    client = FakeClient()
+
+    lane.set_status("is thinking...", thread_ts="1.000", channel="C1", client=client)
+    assert client.status_started.wait(5)
+    # a reply in the thread, which another worker is free to react to
+    lane.react("eyes", ts="2.000", thread_ts="1.000", channel="C1", client=client)
+    time.sleep(0.2)
+    assert client.calls == []
+
+    client.release.set()
+    lane.flush()
+    assert client.calls == [
+        ("status", "1.000", "is thinking..."),
+        ("reaction", "2.000", "eyes"),
+    ]
+
+
+def test_settle_only_waits_briefly_for_a_call_in_progress() -> None:
+    lane = SideEffectLane(workers=1, settle_timeout=0.1)
+    client = FakeClient()
+    lane.set_status("is thinking...", thread_ts="1.000", channel="C1", client=client)
+    assert client.status_started.wait(5)
+
+    start = time.perf_counter()
+    lane.settle(thread_ts="1.000", channel="C1")
+    assert time.perf_counter() - start < 1
+
+    client.release.set()
+    lane.flush()
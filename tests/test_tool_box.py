@@ -0,0 +1,37 @@
+from griptape.memory import TaskMemory
+from griptape.structures import Agent
+from griptape.tools import DateTimeTool
+
+from griptape_slack_handler.griptape.tool_output_governor import ToolOutputGovernor
+from griptape_slack_handler.griptape_tool_box import _init_tools
+
+
+def _activity_names(tool) -> list[str]:
+    return [getattr(activity, "name") for activity in tool.activities()]
+
+
+def test_governor_is_added_after_the_tools_output_memory() -> None:
+    task_memory = TaskMemory()
+    tool = DateTimeTool()
+    tool.output_memory = {name: [task_memory] for name in _activity_names(tool)}
+    cloud_tools = {"DateTime": (tool, "Tells the time")}
+
+    # the tool is reused by the next request, which has its own governor
+    for _ in range(2):
+        (tool,) = _init_tools(["DateTime"], cloud_tools)
+
+    for name in _activity_names(tool):
+        memory, governor = tool.output_memory[name]
+        assert memory is task_memory
+        assert isinstance(governor, ToolOutputGovernor)
+    assert len({id(memories[1]) for memories in tool.output_memory.values()}) == 1
+
+
+def test_off_prompt_tools_keep_the_agents_task_memory() -> None:
+    cloud_tools = {"DateTime": (DateTimeTool(off_prompt=True), "Tells the time")}
+
+    (tool,) = _init_tools(["DateTime"], cloud_tools)
+    agent = Agent(tools=[tool])
+
+    for name in _activity_names(tool):
+        assert tool.output_memory[name] == [agent.task_memory]
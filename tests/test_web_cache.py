@@ -0,0 +1,51 @@
+import time
+from concurrent import futures
+
+import pytest
+from griptape.drivers import TrafilaturaWebScraperDriver
+
+from griptape_slack_handler.griptape import web_cache
+from griptape_slack_handler.griptape.web_cache import CachedTrafilaturaWebScraperDriver
+
+PAGE = """
+<html>
+  <head><title>Deploying</title></head>
+  <body>
+    <nav><a href="/">Home</a></nav>
+    <article>
+      <h1>Deploying the bot</h1>
+      <p>Run <a href="https://example.com/make">make deploy</a> from the repository root,
+      after the tests pass on the main branch.</p>
+      <p>The deploy takes a few minutes, and posts its status in the deploys channel
+      once the new version is serving traffic.</p>
+    </article>
+  </body>
+</html>
+"""
+
+
+def test_pool_extracts_like_the_base_driver(monkeypatch) -> None:
+    monkeypatch.setenv("WEB_EXTRACTION_WORKERS", "1")
+    driver = CachedTrafilaturaWebScraperDriver()
+    try:
+        pooled = driver.extract_page(PAGE)
+    finally:
+        web_cache._reset_extraction_executor(web_cache._extraction_executor())
+
+    assert pooled.value == TrafilaturaWebScraperDriver().extract_page(PAGE).value
+    assert "make deploy" in pooled.value
+
+
+def test_slow_extraction_is_an_extraction_error(monkeypatch) -> None:
+    executor = futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(web_cache, "_extraction_executor", lambda: executor)
+    monkeypatch.setattr(web_cache, "_executor", executor)
+    monkeypatch.setattr(
+        web_cache, "_extract_page", lambda page, include_links: time.sleep(1)
+    )
+    driver = CachedTrafilaturaWebScraperDriver(timeout=0.1)
+
+    with pytest.raises(Exception, match="can't extract page"):
+        driver.extract_page(PAGE)
+    # the stuck pool isn't used for later extractions
+    assert web_cache._executor is None